@@ -0,0 +1,308 @@
+import os, sys, json, time, shutil, platform, argparse, tempfile, statistics, dataclasses
+from typing import Any, Callable
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from modules import ros2_action_analyzer
+from modules import case_formatter
+from modules import name_generator
+from modules import bt_action_cpp_generator
+from modules import bt_node_generator
+from benchmarks import workspace_generator
+
+SCALES = {"small": 10, "medium": 1000, "large": 10000}
+WIDE_GOAL_FIELDS = 240
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+    "assets",
+    "bt_action_cpp_template.h",
+)
+
+
+def measure(fn: Callable[[], Any], repeat: int) -> dict[str, float]:
+    """関数の実行時間を計測する. 1回目はウォームアップとして計測に含めない
+
+    Args:
+        fn (Callable[[], Any]): 計測する関数
+        repeat (int): 計測回数
+
+    Returns:
+        dict[str, float]: {"min_s": float, "median_s": float}
+    """
+    fn()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn()
+        times.append(time.perf_counter() - start)
+    return {"min_s": min(times), "median_s": statistics.median(times)}
+
+
+def run_benchmarks(scale_names: list[str], repeat: int, work_dir: str) -> dict[str, Any]:
+    """各段階のベンチマークを実行する
+
+    Args:
+        scale_names (list[str]): 実行する規模の名前
+        repeat (int): 計測回数
+        work_dir (str): 合成ワークスペースを生成するディレクトリ
+
+    Returns:
+        dict[str, Any]: {"<段階>/<規模>": {"items": int, "min_s": float, "median_s": float, "per_item_us": float}}
+    """
+    results = {}
+
+    def record(name: str, items: int, fn: Callable[[], Any]):
+        result = measure(fn, repeat)
+        result["items"] = items
+        result["per_item_us"] = result["median_s"] / max(items, 1) * 1e6
+        results[name] = result
+        print(f'{name:<45} {items:>7} items  median {result["median_s"] * 1e3:10.3f} ms', flush=True)
+
+    for scale_name in scale_names:
+        action_count = SCALES[scale_name]
+        scale_dir = os.path.join(work_dir, scale_name)
+        pkg_paths = workspace_generator.generate_workspace(
+            os.path.join(scale_dir, "src"), action_count
+        )
+        action_files = [
+            (pkg_path, rel_path)
+            for pkg_path in pkg_paths
+            for rel_path in ros2_action_analyzer.pick_action_rel_path(pkg_path)
+        ]
+
+        record(
+            f"pick_action_rel_path/{scale_name}",
+            len(pkg_paths),
+            lambda: [ros2_action_analyzer.pick_action_rel_path(p) for p in pkg_paths],
+        )
+        record(
+            f"analize_action/{scale_name}",
+            len(action_files),
+            lambda: [ros2_action_analyzer.analize_action(p, f) for p, f in action_files],
+        )
+
+        actions = []
+        for pkg_path, rel_path in action_files:
+            action = ros2_action_analyzer.analize_action(pkg_path, rel_path)
+            actions.append(
+                dataclasses.replace(
+                    action,
+                    bt_plugin_file_name=name_generator.generate_bt_plugin_file_name(
+                        action.ros2_pkg_name, action.ros2_action_name, ["interfaces"]
+                    ),
+                    bt_action_name=name_generator.generate_bt_action_name(
+                        action.ros2_pkg_name, action.ros2_action_name, ["interfaces"]
+                    ),
+                )
+            )
+
+        identifiers = [a.ros2_pkg_name + "_" + a.ros2_action_name for a in actions]
+
+        def format_all():
+            # ウォームアップや前回の計測で埋まったキャッシュを空にし, 1回の実行と同じく変換を計測する
+            case_formatter.case_formatter.cache_clear()
+            return [
+                case_formatter.case_formatter(i, case_type)
+                for i in identifiers
+                for case_type in ["lower_snake_case", "UpperCamelCase", "UPPER_SNAKE_CASE"]
+            ]
+
+        record(f"case_formatter/{scale_name}", len(identifiers) * 3, format_all)
+
+        plugin_dir = os.path.join(scale_dir, "plugins")
+        os.makedirs(plugin_dir, exist_ok=True)
+        plugin_paths = []
+        for action in actions:
+            plugin_path = os.path.join(plugin_dir, action.bt_plugin_file_name)
+            shutil.copy(TEMPLATE_PATH, plugin_path)
+            plugin_paths.append(plugin_path)
+
+        def render_all():
+            for action, plugin_path in zip(actions, plugin_paths):
+                bt_action_cpp_generator.bt_action_cpp_editor(
+                    plugin_path,
+                    "BENCH",
+                    action,
+                    action.ros2_pkg_name,
+                    [".*_address", ".*_port"],
+                    ["success"],
+                )
+
+        record(f"bt_action_cpp_editor/{scale_name}", len(actions), render_all)
+
+        template = bt_action_cpp_generator.compile_bt_action_cpp_template(TEMPLATE_PATH)
+        record(
+            f"render_bt_action_cpp/{scale_name}",
+            len(actions),
+            lambda: [
+                bt_action_cpp_generator.render_bt_action_cpp(
+                    template,
+                    "BENCH",
+                    action,
+                    action.ros2_pkg_name,
+                    [".*_address", ".*_port"],
+                    ["success"],
+                )
+                for action in actions
+            ],
+        )
+        record(
+            f"get_plugin_from_cpp/{scale_name}",
+            len(plugin_paths),
+            lambda: [
+                bt_node_generator.get_plugin_from_cpp(p, "node", ["interfaces"])
+                for p in plugin_paths
+            ],
+        )
+
+        bt_source_path = os.path.join(scale_dir, "bt.cc")
+        workspace_generator.generate_bt_source(bt_source_path, action_count)
+        plugins_info = workspace_generator.generate_plugins_info(action_count)
+        record(
+            f"edit_bt_source_action_area/{scale_name}",
+            action_count,
+            lambda: bt_node_generator.edit_bt_source_action_area(bt_source_path, plugins_info),
+        )
+
+        btproj_path = os.path.join(scale_dir, "bench.btproj")
+        workspace_generator.generate_btproj(btproj_path, action_count)
+        record(
+            f"edit_bt_tree_models_action/{scale_name}",
+            action_count,
+            lambda: bt_node_generator.edit_bt_tree_models_action(btproj_path, plugins_info),
+        )
+
+    # goal のメンバ変数が多い action
+    wide_dir = os.path.join(work_dir, "wide")
+    wide_pkg_paths = workspace_generator.generate_workspace(
+        os.path.join(wide_dir, "src"), 10, goal_fields=WIDE_GOAL_FIELDS, seed=1
+    )
+    wide_files = [
+        (pkg_path, rel_path)
+        for pkg_path in wide_pkg_paths
+        for rel_path in ros2_action_analyzer.pick_action_rel_path(pkg_path)
+    ]
+    record(
+        "analize_action/wide",
+        len(wide_files),
+        lambda: [ros2_action_analyzer.analize_action(p, f) for p, f in wide_files],
+    )
+    wide_actions = []
+    wide_plugin_paths = []
+    for pkg_path, rel_path in wide_files:
+        action = ros2_action_analyzer.analize_action(pkg_path, rel_path)
+        action = dataclasses.replace(
+            action,
+            bt_plugin_file_name=f"{action.ros2_action_name}.h",
+            bt_action_name=action.ros2_action_name,
+        )
+        plugin_path = os.path.join(wide_dir, action.bt_plugin_file_name)
+        shutil.copy(TEMPLATE_PATH, plugin_path)
+        wide_actions.append(action)
+        wide_plugin_paths.append(plugin_path)
+
+    record(
+        "bt_action_cpp_editor/wide",
+        len(wide_actions),
+        lambda: [
+            bt_action_cpp_generator.bt_action_cpp_editor(
+                p, "BENCH", a, "bench0_interfaces", [".*_address", ".*_port"], ["success"]
+            )
+            for a, p in zip(wide_actions, wide_plugin_paths)
+        ],
+    )
+    record(
+        "get_plugin_from_cpp/wide",
+        len(wide_plugin_paths),
+        lambda: [
+            bt_node_generator.get_plugin_from_cpp(p, "node", ["interfaces"])
+            for p in wide_plugin_paths
+        ],
+    )
+    return results
+
+
+def compare_with_baseline(
+    results: dict[str, Any], baseline: dict[str, Any], threshold: float
+) -> list[str]:
+    """ベースラインと比較し, 遅くなった段階を列挙する
+
+    Args:
+        results (dict[str, Any]): 今回の結果
+        baseline (dict[str, Any]): ベースラインの結果
+        threshold (float): 許容する遅延の割合 (0.2 で 20%)
+
+    Returns:
+        list[str]: 遅くなった段階の説明
+    """
+    regressions = []
+    for name, result in results.items():
+        if name not in baseline:
+            continue
+        base = baseline[name]["median_s"]
+        ratio = result["median_s"] / base if base > 0 else 1.0
+        marker = ""
+        if ratio > 1.0 + threshold:
+            marker = "  <-- regression"
+            regressions.append(f"{name}: {ratio:.2f}x slower than baseline")
+        print(f"{name:<45} {ratio:6.2f}x{marker}")
+    return regressions
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark every stage of the generator on synthetic workspaces.")
+    parser.add_argument(
+        "-s",
+        "--scales",
+        type=str,
+        default="small,medium",
+        help=f"comma separated scales to run ({', '.join(f'{k}={v}' for k, v in SCALES.items())} .action files, default: small,medium)",
+    )
+    parser.add_argument("-r", "--repeat", type=int, default=3, help="measured repetitions per stage (default: 3)")
+    parser.add_argument("-o", "--output", type=str, default="bench_results.json", help="path of the JSON result file")
+    parser.add_argument("-b", "--baseline", type=str, default=None, help="baseline JSON result file to compare against")
+    parser.add_argument(
+        "-t",
+        "--threshold",
+        type=float,
+        default=0.2,
+        help="allowed slowdown ratio before a stage counts as a regression (default: 0.2)",
+    )
+    parser.add_argument("--keep", action="store_true", help="keep the generated synthetic workspace")
+    args = parser.parse_args()
+
+    scale_names = [s for s in args.scales.split(",") if s]
+    for scale_name in scale_names:
+        if scale_name not in SCALES:
+            parser.error(f"unknown scale: {scale_name}")
+
+    work_dir = tempfile.mkdtemp(prefix="bt_action_generator_bench_")
+    try:
+        results = run_benchmarks(scale_names, args.repeat, work_dir)
+    finally:
+        if args.keep:
+            print(f"synthetic workspace: {work_dir}")
+        else:
+            shutil.rmtree(work_dir, ignore_errors=True)
+
+    report = {
+        "meta": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "scales": scale_names,
+            "repeat": args.repeat,
+        },
+        "results": results,
+    }
+    with open(args.output, "w") as f:
+        json.dump(report, f, indent=2, sort_keys=True)
+    print(f"results written to {args.output}")
+
+    if args.baseline:
+        with open(args.baseline, "r") as f:
+            baseline = json.load(f)["results"]
+        regressions = compare_with_baseline(results, baseline, args.threshold)
+        if regressions:
+            print("\n".join(regressions), file=sys.stderr)
+            sys.exit(1)
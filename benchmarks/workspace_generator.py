@@ -0,0 +1,160 @@
+import os, random
+from modules.specs import PluginSpec, PortSpec
+
+ROS_TYPES = ["uint8", "int32", "int64", "float32", "float64", "string", "bool"]
+UNITS = [None, "m", "s", "rad", "m/s", "deg"]
+
+
+def generate_action_file(rng: random.Random, goal_fields: int, result_fields: int, feedback_fields: int) -> str:
+    """ランダムな .action ファイルの内容を生成する
+
+    Args:
+        rng (random.Random): 乱数生成器
+        goal_fields (int): goal のメンバ変数の数
+        result_fields (int): result のメンバ変数の数
+        feedback_fields (int): feedback のメンバ変数の数
+
+    Returns:
+        str: .action ファイルの内容
+    """
+    sections = []
+    for prefix, field_count in [("goal", goal_fields), ("result", result_fields), ("feedback", feedback_fields)]:
+        lines = [f"# {prefix}"]
+        for i in range(field_count):
+            ros_type = rng.choice(ROS_TYPES)
+            unit = rng.choice(UNITS)
+            suffix = "_address" if i % 17 == 3 else "_port" if i % 19 == 5 else ""
+            comment = f"  # field {i} [{unit}]" if unit else ""
+            lines.append(f"{ros_type} {prefix}_field_{i}{suffix}{comment}")
+        if prefix == "result":
+            lines.append("bool success")
+        sections.append("\n".join(lines))
+    return "\n---\n".join(sections) + "\n"
+
+
+def generate_workspace(
+    root: str,
+    action_count: int,
+    actions_per_pkg: int = 10,
+    goal_fields: int = 6,
+    seed: int = 0,
+) -> list[str]:
+    """ros2 pkg の src ディレクトリを模したワークスペースを生成する
+
+    各 pkg には action/ ディレクトリの他に, 探索の負荷になる build/ とソースのディレクトリを含める
+
+    Args:
+        root (str): 生成先のディレクトリ
+        action_count (int): .action ファイルの総数
+        actions_per_pkg (int, optional): pkg あたりの .action ファイルの数. デフォルト値は10.
+        goal_fields (int, optional): goal のメンバ変数の数. デフォルト値は6.
+        seed (int, optional): 乱数のシード. デフォルト値は0.
+
+    Returns:
+        list[str]: 生成した ros2 pkg のディレクトリのリスト
+    """
+    rng = random.Random(seed)
+    pkg_paths = []
+    pkg_count = max(1, (action_count + actions_per_pkg - 1) // actions_per_pkg)
+    remaining = action_count
+    for pkg_index in range(pkg_count):
+        pkg_path = os.path.join(root, f"bench{pkg_index}_interfaces")
+        pkg_paths.append(pkg_path)
+        os.makedirs(os.path.join(pkg_path, "action"), exist_ok=True)
+        os.makedirs(os.path.join(pkg_path, "src", "detail"), exist_ok=True)
+        os.makedirs(os.path.join(pkg_path, "build", "rosidl"), exist_ok=True)
+        with open(os.path.join(pkg_path, "package.xml"), "w") as f:
+            f.write("<package/>\n")
+        for i in range(5):
+            with open(os.path.join(pkg_path, "src", "detail", f"file{i}.cpp"), "w") as f:
+                f.write("int main() {}\n")
+            with open(os.path.join(pkg_path, "build", "rosidl", f"gen{i}.hpp"), "w") as f:
+                f.write("#pragma once\n")
+
+        for action_index in range(min(actions_per_pkg, remaining)):
+            action_name = f"DoTask{pkg_index}x{action_index}"
+            with open(os.path.join(pkg_path, "action", action_name + ".action"), "w") as f:
+                f.write(generate_action_file(rng, goal_fields, 3, 2))
+        remaining -= min(actions_per_pkg, remaining)
+    return pkg_paths
+
+
+def generate_bt_source(path: str, registration_count: int, named_action_count: int = 0):
+    """auto generate 領域に大量の登録がある bt ソースを生成する
+
+    Args:
+        path (str): 生成先のファイルのパス
+        registration_count (int): 登録済みの action の数
+        named_action_count (int, optional): named action の数. デフォルト値は0.
+    """
+    lines = ['#include "behaviortree_cpp/bt_factory.h"', "/* named action list"]
+    if named_action_count:
+        lines += ["[BenchAction0]", "instance_name, arg_address"]
+        lines += [f"Instance{i}, addr{i}" for i in range(named_action_count)]
+    lines += [
+        "*/",
+        "int main() {",
+        "  BT::BehaviorTreeFactory factory;",
+        "  BT::RosNodeParams params;",
+        "  // auto generate action area start",
+    ]
+    lines += [
+        f'  factory.registerNodeType<BenchAction{i}>("BenchAction{i}", params);'
+        for i in range(registration_count)
+    ]
+    lines += [
+        "  // auto generate action area end",
+        "  // auto generate named action area start",
+        "  // auto generate named action area end",
+        "}",
+    ]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def generate_btproj(path: str, action_count: int, ports_per_action: int = 8):
+    """TreeNodesModel に大量の Action がある btproj を生成する
+
+    Args:
+        path (str): 生成先のファイルのパス
+        action_count (int): Action の数
+        ports_per_action (int, optional): Action あたりのポート数. デフォルト値は8.
+    """
+    lines = [
+        '<?xml version="1.0" encoding="UTF-8"?>',
+        '<root BTCPP_format="4" project_name="Bench">',
+        '    <include path="main.xml"/>',
+        "    <TreeNodesModel>",
+    ]
+    for i in range(action_count):
+        lines.append(f'        <Action ID="BenchAction{i}" editable="true">')
+        lines.append(f'            <input_port name="action_name" default="/bench_node/task{i}"/>')
+        for j in range(ports_per_action):
+            lines.append(f'            <input_port name="port{j}" default="0"/>')
+        lines.append("        </Action>")
+    lines += ["    </TreeNodesModel>", "</root>"]
+    with open(path, "w") as f:
+        f.write("\n".join(lines) + "\n")
+
+
+def generate_plugins_info(action_count: int, ports_per_action: int = 8) -> list[PluginSpec]:
+    """btproj の編集に渡す bt plugin 情報を生成する
+
+    Args:
+        action_count (int): bt plugin の数
+        ports_per_action (int, optional): bt plugin あたりのポート数. デフォルト値は8.
+
+    Returns:
+        list[PluginSpec]: bt_node_generator.get_plugin_from_cpp と同じ形式の bt plugin 情報
+    """
+    return [
+        PluginSpec(
+            action_class_name=f"BenchAction{i}",
+            ros2_action_name=f"/bench_node/task{i}",
+            non_default_input_ports=tuple(
+                PortSpec(name=f"port{j}", type="int32_t") for j in range(ports_per_action)
+            ),
+            output_ports=(PortSpec(name="out0"),),
+        )
+        for i in range(action_count)
+    ]
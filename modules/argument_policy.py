@@ -0,0 +1,175 @@
+import re, functools
+from dataclasses import dataclass, field
+
+from modules.specs import ActionSpec
+
+# goal, result のメンバ変数の扱い
+# ignore: ポートにしない, default: コンストラクタの default 引数をとる, required: default 引数をとらない
+IGNORE = "ignore"
+DEFAULT = "default"
+REQUIRED = "required"
+DECISIONS = (IGNORE, DEFAULT, REQUIRED)
+
+
+@dataclass(frozen=True, slots=True)
+class ArgumentRule:
+    """bt_action_argument_rules の1件. "<pkg>.<field>" または "<pkg>/<Action>.<field>" の形式"""
+
+    # "<pkg>" または "<pkg>/<Action>"
+    scope: str
+    # メンバ変数名全体と一致させる正規表現
+    pattern: re.Pattern
+    decision: str
+    # 設定ファイルでのキー
+    source: str
+
+
+@dataclass(frozen=True, slots=True)
+class ArgumentPolicy:
+    """bt_action_default_arguments, bt_action_ignore_arguments, bt_action_argument_rules を解析したもの"""
+
+    ignore_names: frozenset[str]
+    # bt_action_default_arguments のパターン. 後方参照やフラグの意味を変えないよう, まとめずに1つずつ試す
+    default_patterns: tuple[re.Pattern, ...]
+    # scope ごとの規則. 設定ファイルでの順に試す
+    rules: dict[str, tuple[ArgumentRule, ...]]
+    # 判定結果のキャッシュ. 規則のない action はメンバ変数名だけをキーにする
+    decisions: dict[tuple[str, ...], tuple[str, str]] = field(
+        default_factory=dict, compare=False
+    )
+
+
+def compile_argument_policy(
+    bt_action_default_arguments: list[str] = [],
+    bt_action_ignore_arguments: list[str] = [],
+    bt_action_argument_rules: dict[str, str] = {},
+) -> ArgumentPolicy:
+    """メンバ変数の扱いの設定を解析する
+
+    同じ設定に対しては解析結果をキャッシュするため, 実行中に1回だけ解析する.
+
+    Args:
+        bt_action_default_arguments (list[str], optional): default 引数をとるメンバ変数名のパターン. デフォルト値は[].
+        bt_action_ignore_arguments (list[str], optional): ポートにしないメンバ変数名. デフォルト値は[].
+        bt_action_argument_rules (dict[str, str], optional): pkg, action ごとの規則.
+            {"<pkg>.<field>" または "<pkg>/<Action>.<field>": "ignore" | "default" | "required"}. デフォルト値は{}.
+
+    Returns:
+        ArgumentPolicy: 解析結果
+    """
+    return _compile_argument_policy(
+        tuple(bt_action_default_arguments),
+        tuple(bt_action_ignore_arguments),
+        tuple(bt_action_argument_rules.items()),
+    )
+
+
+@functools.lru_cache(maxsize=None)
+def _compile_argument_policy(
+    bt_action_default_arguments: tuple[str, ...],
+    bt_action_ignore_arguments: tuple[str, ...],
+    bt_action_argument_rules: tuple[tuple[str, str], ...],
+) -> ArgumentPolicy:
+    rules = {}
+    for key, decision in bt_action_argument_rules:
+        scope, separator, field_pattern = key.partition(".")
+        if not separator or not scope or not field_pattern:
+            raise ValueError(
+                f'Invalid argument rule "{key}": expected "<pkg>.<field>" or "<pkg>/<Action>.<field>"'
+            )
+        if decision not in DECISIONS:
+            raise ValueError(
+                f'Invalid argument rule "{key}": "{decision}" is not one of {", ".join(DECISIONS)}'
+            )
+        rule = ArgumentRule(
+            scope=scope, pattern=re.compile(field_pattern), decision=decision, source=key
+        )
+        rules[scope] = rules.get(scope, ()) + (rule,)
+
+    return ArgumentPolicy(
+        ignore_names=frozenset(bt_action_ignore_arguments),
+        default_patterns=tuple(re.compile(pattern) for pattern in bt_action_default_arguments),
+        rules=rules,
+    )
+
+
+def decide(policy: ArgumentPolicy, action: ActionSpec, var_name: str) -> str:
+    """メンバ変数の扱いを判定する
+
+    Args:
+        policy (ArgumentPolicy): compile_argument_policy の解析結果
+        action (ActionSpec): ros2_action_analyzer の解析結果
+        var_name (str): メンバ変数名
+
+    Returns:
+        str: "ignore" | "default" | "required"
+    """
+    return explain(policy, action, var_name)[0]
+
+
+def explain(policy: ArgumentPolicy, action: ActionSpec, var_name: str) -> tuple[str, str]:
+    """メンバ変数の扱いと, その扱いを決めた設定を取得する
+
+    action の規則, pkg の規則, bt_action_ignore_arguments, bt_action_default_arguments の順に判定する.
+
+    Args:
+        policy (ArgumentPolicy): compile_argument_policy の解析結果
+        action (ActionSpec): ros2_action_analyzer の解析結果
+        var_name (str): メンバ変数名
+
+    Returns:
+        tuple[str, str]: 扱い, 扱いを決めた設定
+    """
+    scopes = tuple(
+        scope
+        for scope in (f"{action.ros2_pkg_name}/{action.ros2_action_name}", action.ros2_pkg_name)
+        if scope in policy.rules
+    )
+    key = scopes + (var_name,)
+    decision = policy.decisions.get(key)
+    if decision is None:
+        decision = _explain(policy, scopes, var_name)
+        policy.decisions[key] = decision
+    return decision
+
+
+def _explain(policy: ArgumentPolicy, scopes: tuple[str, ...], var_name: str) -> tuple[str, str]:
+    for scope in scopes:
+        for rule in policy.rules[scope]:
+            if rule.pattern.fullmatch(var_name):
+                return rule.decision, f'bt_action_argument_rules "{rule.source}"'
+
+    if var_name in policy.ignore_names:
+        return IGNORE, "bt_action_ignore_arguments"
+
+    for pattern in policy.default_patterns:
+        if pattern.match(var_name):
+            return DEFAULT, f'bt_action_default_arguments "{pattern.pattern}"'
+
+    return REQUIRED, "-"
+
+
+def explain_action(policy: ArgumentPolicy, action: ActionSpec) -> list[str]:
+    """action の goal, result のメンバ変数の扱いを表にする
+
+    Args:
+        policy (ArgumentPolicy): compile_argument_policy の解析結果
+        action (ActionSpec): ros2_action_analyzer の解析結果
+
+    Returns:
+        list[str]: 表の行. 1行目は action 名と .action ファイルのパス
+    """
+    rows = []
+    for member, fields in (("goal", action.goal), ("result", action.result)):
+        for field_spec in fields:
+            decision, reason = explain(policy, action, field_spec.var_name)
+            if member == "result" and decision != IGNORE:
+                # result は default 引数をとらないため, 出力ポートになるかどうかだけを表示する
+                decision = "output"
+            rows.append((member, field_spec.var_name, decision, reason))
+
+    name_width = max([len(row[1]) for row in rows], default=0)
+    lines = [f"{action.ros2_pkg_name}/{action.ros2_action_name} ({action.action_path})"]
+    for member, var_name, decision, reason in rows:
+        lines.append(f"  {member:<6} {var_name:<{name_width}}  {decision:<8}  {reason}")
+    return lines
@@ -1,28 +1,75 @@
-import os, shutil, re
-from typing import Any
+import os, functools
+from concurrent.futures import ThreadPoolExecutor
+from modules import argument_policy
 from modules import case_formatter
 from modules import cpp_code_editor
+from modules import cpp_lexer
+from modules import cpp_emitter
+from modules import cpp_template
+from modules import name_generator
+from modules import source_edit
+from modules import file_writer
+from modules import profiler
+from modules.specs import ActionSpec, FieldSpec, PluginSpec, PortSpec
+
+
+# テンプレートのプレースホルダー
+PLUGIN_TEMPLATE_PLACEHOLDERS = (
+    "PATHTOFILE",
+    "ACTIONCLASSNAME_H",
+    "ActionClassName",
+    "action_package_name",
+    "ActionName",
+    "action_name",
+)
+PLUGIN_TEMPLATE_PLACEHOLDER_PATTERN = cpp_template.compile_placeholder_pattern(
+    PLUGIN_TEMPLATE_PLACEHOLDERS
+)
+
+# onResultReceived の結果の判定
+ON_RESULT_RECEIVED_STATEMENTS = (
+    "if (result.code ==  rclcpp_action::ResultCode::SUCCEEDED) {",
+    "  return BT::NodeStatus::SUCCESS;",
+    "} else {",
+    "  return BT::NodeStatus::FAILURE;",
+    "}",
+)
 
 
 def bt_action_cpp_generator(
     bt_plugin_save_path: str,
     bt_plugin_cpp_template: str,
     bt_plugin_cpp_include_guard_prefix: str,
-    actions: list[Any],
+    actions: list[ActionSpec],
     ros2_pkg_name: str,
     bt_action_default_arguments: list[str] = [],
     bt_action_ignore_arguments: list[str] = [],
+    bt_action_argument_rules: dict[str, str] = {},
+    render_threads: int = 1,
 ):
     # プラグインの保存先のディレクトリを作成
     os.makedirs(os.path.expanduser(bt_plugin_save_path), exist_ok=True)
 
-    for action in actions:
+    # テンプレートは実行中に1回だけ解析する
+    template = compile_bt_action_cpp_template(os.path.expanduser(bt_plugin_cpp_template))
+
+    def generate(action: ActionSpec):
         plugin_file_path = os.path.expanduser(
-            os.path.join(bt_plugin_save_path, action["bt_plugin_file_name"])
+            os.path.join(bt_plugin_save_path, action.bt_plugin_file_name)
         )
-        if os.path.exists(plugin_file_path) == False:
-            # ファイルをコピー
-            shutil.copy(os.path.expanduser(bt_plugin_cpp_template), plugin_file_path)
+        if file_writer.exists(plugin_file_path) == False:
+            # 新規のファイルはテンプレートからメモリ上で作成して書き込む
+            plugin_file = render_bt_action_cpp(
+                template,
+                bt_plugin_cpp_include_guard_prefix,
+                action,
+                ros2_pkg_name,
+                bt_action_default_arguments,
+                bt_action_ignore_arguments,
+                bt_action_argument_rules,
+            )
+            file_writer.write_if_changed(plugin_file_path, plugin_file)
+            return
 
         bt_action_cpp_editor(
             plugin_file_path,
@@ -31,189 +78,372 @@ def bt_action_cpp_generator(
             ros2_pkg_name,
             bt_action_default_arguments,
             bt_action_ignore_arguments,
+            bt_action_argument_rules,
         )
 
+    if render_threads <= 1 or len(actions) <= 1:
+        for action in actions:
+            generate(action)
+        return
 
-def bt_action_cpp_editor(
-    plugin_file_path: str,
-    bt_plugin_cpp_include_guard_prefix: str,
-    action: Any,
-    ros2_pkg_name: str,
-    bt_action_default_arguments: list[str] = [],
-    bt_action_ignore_arguments: list[str] = [],
-):
-    # action dictionary に["bt_arg_name"]を追加
-    for input_port in action["goal"]:
-        bt_arg_name = input_port["var_name"]
-        if input_port["unit"] != None:
-            bt_arg_name += f'__{input_port["unit"]}'
-        input_port["bt_arg_name"] = bt_arg_name
-
-    for output_port in action["result"]:
-        bt_arg_name = output_port["var_name"]
-        if output_port["unit"] != None:
-            bt_arg_name += f'__{output_port["unit"]}'
-        output_port["bt_arg_name"] = bt_arg_name
+    # action ごとに別のファイルに書き込むため, スレッドプールで並列に生成する
+    with ThreadPoolExecutor(max_workers=min(render_threads, len(actions))) as executor:
+        # 例外を呼び出し元に伝えるため結果を取り出す
+        list(executor.map(generate, actions))
 
-    # プラグインファイルの読み込み
-    with open(plugin_file_path, "r") as f:
-        plugin_file = f.read()
 
-    # プラグインファイルの編集
-    plugin_file = plugin_file.replace("PATHTOFILE", bt_plugin_cpp_include_guard_prefix)
+def compile_bt_action_cpp_template(bt_plugin_cpp_template: str) -> cpp_template.CompiledTemplate:
+    """bt plugin のテンプレートを解析する
 
-    plugin_file = plugin_file.replace(
-        "ACTIONCLASSNAME_H",
-        case_formatter.case_formatter(
-            action["bt_plugin_file_name"].replace(".", "_"), "UPPER_SNAKE_CASE"
-        ),
-    )
+    解析結果はファイルのパスと更新時刻ごとにキャッシュするため, 同じ実行中の2回目以降は解析しない.
 
-    plugin_file = plugin_file.replace("ActionClassName", action["bt_action_name"])
+    Args:
+        bt_plugin_cpp_template (str): テンプレートのパス
 
-    plugin_file = plugin_file.replace("action_package_name", ros2_pkg_name)
+    Returns:
+        cpp_template.CompiledTemplate: 解析したテンプレート
+    """
+    return _compile_bt_action_cpp_template(
+        bt_plugin_cpp_template, os.stat(bt_plugin_cpp_template).st_mtime_ns
+    )
 
-    plugin_file = plugin_file.replace("ActionName", action["ros2_action_name"])
 
-    plugin_file = plugin_file.replace(
-        "action_name",
-        case_formatter.case_formatter(action["ros2_action_name"], "lower_snake_case"),
+@functools.lru_cache(maxsize=None)
+@profiler.timed("render")
+def _compile_bt_action_cpp_template(
+    bt_plugin_cpp_template: str, mtime_ns: int
+) -> cpp_template.CompiledTemplate:
+    with open(bt_plugin_cpp_template, "r") as f:
+        template = f.read()
+    profiler.count_read(template)
+    profiler.count("templates_compiled")
+
+    # bt_action_cpp_editor と同じ編集で, 書き換える範囲にリージョンの目印を埋め込む
+    index = cpp_lexer.build_region_index(template)
+    batch = source_edit.EditBatch(template)
+    batch.add(
+        cpp_code_editor.block_after_keyword_edit(
+            index, "providedBasicPorts", cpp_template.region_marker("provided_ports")
+        )
+    )
+    batch.add(
+        cpp_code_editor.initializer_list_edit(
+            index, "ActionClassName", [cpp_template.region_marker("initializers")]
+        )
+    )
+    batch.add(
+        cpp_code_editor.function_arguments_edit(
+            index, "ActionClassName", [cpp_template.region_marker("constructor_args")]
+        )
+    )
+    batch.add(
+        cpp_code_editor.block_after_keyword_edit(
+            index, "setGoal", cpp_template.region_marker("set_goal")
+        )
+    )
+    batch.add(
+        cpp_code_editor.block_after_keyword_edit(
+            index, "onResultReceived", cpp_template.region_marker("on_result_received")
+        )
     )
+    batch.extend(
+        cpp_code_editor.private_members_edits(
+            index,
+            "ActionClassName",
+            ["default_arg.*"],
+            [cpp_template.region_marker("private_members")],
+        )
+    )
+    template = batch.apply()
 
-    # providedBasicPortsの編集
-    provided_basic_ports_str = ""
+    # リストのリージョンの区切りは要素ごとに render_bt_action_cpp で付ける
+    for region in ("initializers", "constructor_args"):
+        marker = cpp_template.region_marker(region)
+        template = template.replace(", " + marker, marker)
+    marker = cpp_template.region_marker("private_members")
+    template = template.replace(marker + "\n", marker)
 
-    for input_port in action["goal"]:
-        if input_port["var_name"] in bt_action_ignore_arguments:
-            continue
-        provided_basic_ports_str += f'BT::InputPort<{input_port["var_c_type"]}>("{input_port["bt_arg_name"]}"), '
+    return cpp_template.compile_template(template, PLUGIN_TEMPLATE_PLACEHOLDERS)
 
-    for output_port in action["result"]:
-        if output_port["var_name"] in bt_action_ignore_arguments:
-            continue
-        provided_basic_ports_str += f'BT::OutputPort<{output_port["var_c_type"]}>("{output_port["bt_arg_name"]}"), '
-    provided_basic_ports_str = provided_basic_ports_str[:-2]
 
-    plugin_file = cpp_code_editor.modify_block_after_keyword(
-        plugin_file, "providedBasicPorts", provided_basic_ports_str
+@profiler.timed("render")
+def render_bt_action_cpp(
+    template: cpp_template.CompiledTemplate,
+    bt_plugin_cpp_include_guard_prefix: str,
+    action: ActionSpec,
+    ros2_pkg_name: str,
+    bt_action_default_arguments: list[str] = [],
+    bt_action_ignore_arguments: list[str] = [],
+    bt_action_argument_rules: dict[str, str] = {},
+) -> str:
+    """解析したテンプレートから bt plugin のヘッダーを作成する
+
+    Args:
+        template (cpp_template.CompiledTemplate): compile_bt_action_cpp_template で解析したテンプレート
+        bt_plugin_cpp_include_guard_prefix (str): インクルードガードの接頭辞
+        action (ActionSpec): ros2_action_analyzer の解析結果に bt plugin の名前を設定したもの
+        ros2_pkg_name (str): ros2 pkg 名
+        bt_action_default_arguments (list[str], optional): default 引数をとるメンバ変数名のパターン. デフォルト値は[].
+        bt_action_ignore_arguments (list[str], optional): ポートにしないメンバ変数名. デフォルト値は[].
+        bt_action_argument_rules (dict[str, str], optional): pkg, action ごとのメンバ変数の扱い. デフォルト値は{}.
+
+    Returns:
+        str: bt plugin のヘッダーの内容
+    """
+    regions = get_plugin_regions(
+        action, bt_action_default_arguments, bt_action_ignore_arguments, bt_action_argument_rules
     )
+    values = get_placeholder_values(bt_plugin_cpp_include_guard_prefix, action, ros2_pkg_name)
+    values["provided_ports"] = regions["provided_ports"]
+    values["initializers"] = "".join(", " + item for item in regions["initializers"])
+    values["constructor_args"] = "".join(", " + item for item in regions["constructor_args"])
+    values["set_goal"] = regions["set_goal"]
+    values["on_result_received"] = regions["on_result_received"]
+    values["private_members"] = "".join(item + "\n" for item in regions["private_members"])
+    return template.render(values)
 
-    # default値をとるとらないで、argを分離
-    default_args = []
-    non_default_args = []
-    for input_port in action["goal"]:
-        if input_port["var_name"] in bt_action_ignore_arguments:
-            continue
-        elif len([
-            var_name
-            for var_name in bt_action_default_arguments
-            if re.match(var_name, input_port["var_name"])
-        ]) == 0:
-            non_default_args.append(input_port)
-        else:
-            default_args.append(input_port)
 
-    # 初期化リストの編集
-    initializers = []
-    for default_arg in default_args:
-        initializers.append(f'{default_arg["bt_arg_name"]}_({default_arg["bt_arg_name"]})')
+@profiler.timed("render")
+def bt_action_cpp_editor(
+    plugin_file_path: str,
+    bt_plugin_cpp_include_guard_prefix: str,
+    action: ActionSpec,
+    ros2_pkg_name: str,
+    bt_action_default_arguments: list[str] = [],
+    bt_action_ignore_arguments: list[str] = [],
+    bt_action_argument_rules: dict[str, str] = {},
+):
+    # プラグインファイルの読み込み
+    original_plugin_file = file_writer.read_file(plugin_file_path)
 
-    plugin_file = cpp_code_editor.modify_initializer_list(
-        plugin_file, action["bt_action_name"], initializers
+    # プラグインファイルの編集 - プレースホルダーが残っていれば1回の走査で置換する
+    plugin_file = cpp_template.substitute_placeholders(
+        original_plugin_file,
+        PLUGIN_TEMPLATE_PLACEHOLDER_PATTERN,
+        get_placeholder_values(bt_plugin_cpp_include_guard_prefix, action, ros2_pkg_name),
     )
 
-    # コンストラクタの引数リストの編集
-    constructor_args = []
-    for default_arg in default_args:
-        constructor_args.append(
-            f'std::optional<{input_port["var_c_type"]}> {default_arg["bt_arg_name"]} = std::nullopt'
-        )
-
-    plugin_file = cpp_code_editor.modify_function_arguments(
-        plugin_file, action["bt_action_name"], constructor_args
+    regions = get_plugin_regions(
+        action, bt_action_default_arguments, bt_action_ignore_arguments, bt_action_argument_rules
     )
 
-    # setGoalの編集 - 変数の定義
-    set_goal_content = "\n"
-
-    for default_arg in default_args:
-        set_goal_content += (
-            f'    {default_arg["var_c_type"]} {default_arg["bt_arg_name"]};\n'
+    # 編集する範囲は1回の走査で索引にし, すべての編集を元の内容に対する置換として集めて1回で適用する
+    index = cpp_lexer.build_region_index(plugin_file)
+    batch = source_edit.EditBatch(plugin_file)
+    batch.add(
+        cpp_code_editor.block_after_keyword_edit(
+            index, "providedBasicPorts", regions["provided_ports"]
         )
-
-    for non_default_arg in non_default_args:
-        set_goal_content += (
-            f'    {non_default_arg["var_c_type"]} {non_default_arg["bt_arg_name"]};\n'
+    )
+    batch.add(
+        cpp_code_editor.initializer_list_edit(
+            index, action.bt_action_name, regions["initializers"]
         )
+    )
+    batch.add(
+        cpp_code_editor.function_arguments_edit(
+            index, action.bt_action_name, regions["constructor_args"]
+        )
+    )
+    batch.add(cpp_code_editor.block_after_keyword_edit(index, "setGoal", regions["set_goal"]))
+    batch.add(
+        cpp_code_editor.block_after_keyword_edit(
+            index, "onResultReceived", regions["on_result_received"]
+        )
+    )
+    batch.extend(
+        cpp_code_editor.private_members_edits(
+            index, action.bt_action_name, ["default_arg.*"], regions["private_members"]
+        )
+    )
+    plugin_file = batch.apply()
 
-    # setGoalの編集 - default 引数の処理
-    set_goal_content += "\n"
+    # プラグインファイルの保存 (内容が変わった場合のみ)
+    return file_writer.write_if_changed(plugin_file_path, plugin_file, original_plugin_file)
 
-    for default_arg in default_args:
-        set_goal_content += f'    if ({default_arg["bt_arg_name"]}_.has_value()) {{\n'
-        set_goal_content += f'      {default_arg["bt_arg_name"]} = {default_arg["bt_arg_name"]}_.value();\n'
-        set_goal_content += f"    }} else {{\n"
-        set_goal_content += f'      getInput<{default_arg["var_c_type"]}>("{default_arg["bt_arg_name"]}", {default_arg["bt_arg_name"]});\n'
-        set_goal_content += f"    }}\n"
-        
-    # setGoalの編集 - 非 default 引数の処理
-    set_goal_content += "\n"
 
-    for non_default_arg in non_default_args:
-        set_goal_content += f'    getInput<{non_default_arg["var_c_type"]}>("{non_default_arg["bt_arg_name"]}", {non_default_arg["bt_arg_name"]});\n'
+def get_placeholder_values(
+    bt_plugin_cpp_include_guard_prefix: str,
+    action: ActionSpec,
+    ros2_pkg_name: str,
+) -> dict[str, str]:
+    """テンプレートのプレースホルダーの値を取得する
+
+    Args:
+        bt_plugin_cpp_include_guard_prefix (str): インクルードガードの接頭辞
+        action (ActionSpec): ros2_action_analyzer の解析結果に bt plugin の名前を設定したもの
+        ros2_pkg_name (str): ros2 pkg 名
+
+    Returns:
+        dict[str, str]: {プレースホルダー: 値}
+    """
+    return {
+        "PATHTOFILE": bt_plugin_cpp_include_guard_prefix,
+        "ACTIONCLASSNAME_H": case_formatter.case_formatter(
+            action.bt_plugin_file_name.replace(".", "_"), "UPPER_SNAKE_CASE"
+        ),
+        "ActionClassName": action.bt_action_name,
+        "action_package_name": ros2_pkg_name,
+        "ActionName": action.ros2_action_name,
+        "action_name": case_formatter.case_formatter(action.ros2_action_name, "lower_snake_case"),
+    }
 
-    # setGoalの編集 - ros2 actionのメンバ変数への代入
-    set_goal_content += "\n"
 
-    for default_arg in default_args:
-        set_goal_content += (
-            f'    goal.{default_arg["var_name"]} = {default_arg["bt_arg_name"]};\n'
-        )
+def get_plugin_regions(
+    action: ActionSpec,
+    bt_action_default_arguments: list[str] = [],
+    bt_action_ignore_arguments: list[str] = [],
+    bt_action_argument_rules: dict[str, str] = {},
+) -> dict[str, str | list[str]]:
+    """テンプレートの書き換える範囲の内容を取得する
+
+    Args:
+        action (ActionSpec): ros2_action_analyzer の解析結果に bt plugin の名前を設定したもの
+        bt_action_default_arguments (list[str], optional): default 引数をとるメンバ変数名のパターン. デフォルト値は[].
+        bt_action_ignore_arguments (list[str], optional): ポートにしないメンバ変数名. デフォルト値は[].
+        bt_action_argument_rules (dict[str, str], optional): pkg, action ごとのメンバ変数の扱い. デフォルト値は{}.
+
+    Returns:
+        dict[str, str | list[str]]: provided_ports, set_goal, on_result_received は {} の中身,
+            initializers, constructor_args, private_members は追加する要素のリスト
+    """
+    policy = argument_policy.compile_argument_policy(
+        bt_action_default_arguments, bt_action_ignore_arguments, bt_action_argument_rules
+    )
+    input_ports = tuple(
+        port
+        for port in action.goal
+        if argument_policy.decide(policy, action, port.var_name) != argument_policy.IGNORE
+    )
+    output_ports = tuple(get_output_ports(action, policy))
 
-    for non_default_arg in non_default_args:
-        set_goal_content += f'    goal.{non_default_arg["var_name"]} = {non_default_arg["bt_arg_name"]};\n'
+    # default値をとるとらないで、argを分離
+    default_args, non_default_args = split_input_ports(action, policy)
+    default_args = tuple(default_args)
+    non_default_args = tuple(non_default_args)
+
+    # setGoal: 変数の定義, default 引数の処理, 非 default 引数の処理, ros2 actionのメンバ変数への代入
+    set_goal = cpp_emitter.MethodBody((
+        (cpp_emitter.LocalDeclarations(default_args + non_default_args),),
+        (cpp_emitter.OptionalDefaults(default_args),),
+        (cpp_emitter.GetInputs(non_default_args),),
+        (
+            cpp_emitter.Assignments("goal", default_args + non_default_args),
+            cpp_emitter.Statements(("return true;",)),
+        ),
+    ))
+
+    # onResultReceived: 出力ポートの設定と結果の判定
+    on_result_received = cpp_emitter.MethodBody((
+        (cpp_emitter.SetOutputs("result.result", output_ports),),
+        (cpp_emitter.Statements(ON_RESULT_RECEIVED_STATEMENTS),),
+    ))
+
+    return {
+        "provided_ports": cpp_emitter.PortList(input_ports, output_ports).render(),
+        "initializers": [f"{arg.bt_arg_name}_({arg.bt_arg_name})" for arg in default_args],
+        "constructor_args": [
+            f"std::optional<{arg.var_c_type}> {arg.bt_arg_name} = std::nullopt"
+            for arg in default_args
+        ],
+        "set_goal": set_goal.render(),
+        "on_result_received": on_result_received.render(),
+        "private_members": [
+            f"  std::optional<{arg.var_c_type}> {arg.bt_arg_name}_;" for arg in default_args
+        ],
+    }
 
-    # setGoalの編集 - 残りの処理
-    set_goal_content += f"    return true;\n  "
 
-    plugin_file = cpp_code_editor.modify_block_after_keyword(
-        plugin_file, "setGoal", set_goal_content
-    )
+def split_input_ports(
+    action: ActionSpec, policy: argument_policy.ArgumentPolicy
+) -> tuple[list[FieldSpec], list[FieldSpec]]:
+    """goal のメンバ変数を default 引数をとるものととらないものに分離する
 
-    default_arg_menbers = []
+    Args:
+        action (ActionSpec): ros2_action_analyzer の解析結果
+        policy (argument_policy.ArgumentPolicy): argument_policy.compile_argument_policy の解析結果
 
-    for default_arg in default_args:
-        default_arg_menbers.append(
-            f'  std::optional<{default_arg["var_c_type"]}> {default_arg["bt_arg_name"]}_;'
-        )
+    Returns:
+        tuple[list[FieldSpec], list[FieldSpec]]: default 引数をとるメンバ変数, とらないメンバ変数
+    """
+    default_args = []
+    non_default_args = []
+    for input_port in action.goal:
+        decision = argument_policy.decide(policy, action, input_port.var_name)
+        if decision == argument_policy.DEFAULT:
+            default_args.append(input_port)
+        elif decision == argument_policy.REQUIRED:
+            non_default_args.append(input_port)
+    return default_args, non_default_args
 
-    # onResultReceivedの編集
-    on_result_received_content = "\n"
 
-    for output_port in action["result"]:
-        if output_port["var_name"] in bt_action_ignore_arguments:
-            continue
-        on_result_received_content += f'    setOutput<{output_port["var_c_type"]}>("{output_port["bt_arg_name"]}", result.result->{output_port["var_name"]});\n'
+def get_output_ports(
+    action: ActionSpec, policy: argument_policy.ArgumentPolicy
+) -> list[FieldSpec]:
+    """result のメンバ変数のうち出力ポートにするものを取得する
 
-    on_result_received_content += """
-    if (result.code ==  rclcpp_action::ResultCode::SUCCEEDED) {
-      return BT::NodeStatus::SUCCESS;
-    } else {
-      return BT::NodeStatus::FAILURE;
-    }
-  \
-"""
+    Args:
+        action (ActionSpec): ros2_action_analyzer の解析結果
+        policy (argument_policy.ArgumentPolicy): argument_policy.compile_argument_policy の解析結果
 
-    plugin_file = cpp_code_editor.modify_block_after_keyword(
-        plugin_file, "onResultReceived", on_result_received_content
-    )
+    Returns:
+        list[FieldSpec]: 出力ポートにするメンバ変数
+    """
+    return [
+        output_port
+        for output_port in action.result
+        if argument_policy.decide(policy, action, output_port.var_name) != argument_policy.IGNORE
+    ]
 
-    # praivate メンバの編集
-    plugin_file = cpp_code_editor.replace_private_members(
-        plugin_file, action["bt_action_name"], ["default_arg.*"], default_arg_menbers
-    )
 
-    # プラグインファイルの保存
-    with open(plugin_file_path, "w") as f:
-        f.write(plugin_file)
-    return
+def get_plugin_info(
+    action: ActionSpec,
+    ros2_pkg_name: str,
+    ros2_node_name_suffix: str,
+    ros2_node_name_exclude_words: list[str],
+    bt_action_default_arguments: list[str] = [],
+    bt_action_ignore_arguments: list[str] = [],
+    bt_action_argument_rules: dict[str, str] = {},
+    name_exclude_word_boundary: bool = False,
+) -> PluginSpec:
+    """生成する bt plugin の情報を bt_node_generator.get_plugin_from_cpp と同じ形式で取得する
+
+    生成したヘッダーを読み直して解析せずに, bt ソースと btproj の編集に渡すために使う
+
+    Args:
+        action (ActionSpec): ros2_action_analyzer の解析結果に bt plugin の名前を設定したもの
+        ros2_pkg_name (str): ros2 pkg 名
+        ros2_node_name_suffix (str): ros2 node 名の接尾辞
+        ros2_node_name_exclude_words (list[str]): ros2 node 名で除外する単語
+        bt_action_default_arguments (list[str], optional): default 引数をとるメンバ変数名のパターン. デフォルト値は[].
+        bt_action_ignore_arguments (list[str], optional): ポートにしないメンバ変数名. デフォルト値は[].
+        bt_action_argument_rules (dict[str, str], optional): pkg, action ごとのメンバ変数の扱い. デフォルト値は{}.
+        name_exclude_word_boundary (bool, optional): ros2 node 名の除外する単語を単語境界でのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        PluginSpec: bt plugin 情報
+    """
+    policy = argument_policy.compile_argument_policy(
+        bt_action_default_arguments, bt_action_ignore_arguments, bt_action_argument_rules
+    )
+    default_args, non_default_args = split_input_ports(action, policy)
+    return PluginSpec(
+        action_class_name=action.bt_action_name,
+        ros2_action_name=name_generator.generate_ros2_action_name(
+            ros2_pkg_name,
+            case_formatter.case_formatter(action.ros2_action_name, "lower_snake_case"),
+            ros2_node_name_suffix,
+            ros2_node_name_exclude_words,
+            name_exclude_word_boundary,
+        ),
+        non_default_input_ports=tuple(
+            PortSpec(name=arg.bt_arg_name, type=arg.var_c_type) for arg in non_default_args
+        ),
+        default_input_ports=tuple(
+            PortSpec(name=arg.bt_arg_name, type=arg.var_c_type, c_name=arg.bt_arg_name)
+            for arg in default_args
+        ),
+        output_ports=tuple(
+            PortSpec(name=port.bt_arg_name) for port in get_output_ports(action, policy)
+        ),
+    )
@@ -3,9 +3,18 @@ from typing import Any
 import fnmatch
 import json, csv
 from io import StringIO
+from dataclasses import dataclass
 import xml.etree.ElementTree as ET
 import xml.dom.minidom
-from modules import case_formatter
+from modules import build_manifest
+from modules import cpp_code_editor
+from modules import name_generator
+from modules import plugin_cache
+from modules import source_edit
+from modules.source_edit import Edit
+from modules import file_writer
+from modules import profiler
+from modules.specs import PluginSpec, PortSpec, NamedAction
 
 
 def bt_node_generator(
@@ -14,38 +23,77 @@ def bt_node_generator(
     btproj_abs_path: str,
     ros2_node_name_suffix: str,
     ros2_node_name_exclude_words: list[str],
+    generated_plugins_info: dict[str, PluginSpec] | None = None,
+    name_exclude_word_boundary: bool = False,
 ):
+    """bt plugin の情報をもとに bt ソースと btproj を編集する
+
+    Args:
+        bt_plugin_save_path (str): bt plugin の保存先のディレクトリ
+        ros2_bt_source_abs_path (str): ros2 の bt ソースのパス
+        btproj_abs_path (str): btproj のパス
+        ros2_node_name_suffix (str): ros2 node 名の接尾辞
+        ros2_node_name_exclude_words (list[str]): ros2 node 名で除外する単語
+        generated_plugins_info (dict[str, PluginSpec] | None, optional): 同じ実行で生成した bt plugin の情報.
+            {plugin_file_path: plugin_info}. 含まれる bt plugin はファイルを解析せずにこの情報を使う.
+            デフォルト値はNone.
+        name_exclude_word_boundary (bool, optional): ros2 node 名の除外する単語を単語境界でのみ除外する. デフォルト値はFalse.
+    """
 
     bt_plugin_dir = os.path.expanduser(bt_plugin_save_path)
     ros2_source_path = os.path.expanduser(ros2_bt_source_abs_path)
     btproj_path = os.path.expanduser(btproj_abs_path)
 
-    extensions = ["*.h", "*.hpp"]
-
     # ファイルの一覧を取得
-    files = [
-        os.path.join(bt_plugin_dir, f)
-        for f in os.listdir(bt_plugin_dir)
-        if any(fnmatch.fnmatch(f, ext) for ext in extensions)
-    ]
+    files = list_plugin_files(bt_plugin_dir)
+
+    if generated_plugins_info is None:
+        generated_plugins_info = {}
+    generated_plugins_info = {
+        os.path.abspath(path): info for path, info in generated_plugins_info.items()
+    }
+
+    # -p で生成し, その後変更されていないヘッダーは manifest の bt plugin 情報を使う.
+    # それ以外のヘッダーも前回から変更されていなければキャッシュの bt plugin 情報を使う
+    settings_digest = plugin_cache.settings_digest(
+        ros2_node_name_suffix, ros2_node_name_exclude_words, name_exclude_word_boundary
+    )
+    manifest_plugins = build_manifest.get_generated_plugins(
+        build_manifest.load_manifest(build_manifest.get_manifest_path(bt_plugin_dir)),
+        settings_digest,
+    )
+    cache_path = plugin_cache.get_cache_path(bt_plugin_dir)
+    cache = plugin_cache.load_cache(cache_path, settings_digest)
+    cache_entries = {}
 
     plugins_info = []
     for file in files:
-        plugin_info = get_plugin_from_cpp(
-            file, ros2_node_name_suffix, ros2_node_name_exclude_words
-        )
+        path = os.path.abspath(file)
+        # 同じ実行で生成した bt plugin はファイルを解析しない
+        plugin_info = generated_plugins_info.get(path)
+        if plugin_info is None:
+            plugin_info = get_generated_plugin_info(path, manifest_plugins)
+        if plugin_info is None:
+            plugin_info = get_plugin_from_cpp_cached(
+                file,
+                cache["entries"],
+                cache_entries,
+                ros2_node_name_suffix,
+                ros2_node_name_exclude_words,
+                name_exclude_word_boundary,
+            )
+        elif path in cache["entries"]:
+            cache_entries[path] = cache["entries"][path]
         plugins_info.append(plugin_info)
 
-    plugins_info = [item for item in plugins_info if item != []]
-
-    edit_bt_source_action_area(ros2_source_path, plugins_info)
+    # 削除されたヘッダーのエントリは除く. 書き込みを反映した後に保存する
+    cache["entries"] = cache_entries
+    file_writer.after_commit(lambda: plugin_cache.save_cache(cache_path, cache))
 
-    # named_actionsは、bt actionのcpp classのコンストラクタに、デフォルト引数を渡したものを意味する
-    named_actions_info = analyze_named_actions(ros2_source_path)
+    plugins_info = [item for item in plugins_info if item is not None]
 
-    named_actions_list_for_bt = edit_bt_source_named_action_area(
-        ros2_source_path, named_actions_info
-    )
+    # bt ソースは1回だけ読み込み, 2つの編集領域をまとめて編集して1回だけ書き込む
+    named_actions_list_for_bt = edit_bt_source(ros2_source_path, plugins_info)
 
     node_model_info = merge_named_actions_info_plugins_info(
         named_actions_list_for_bt, plugins_info
@@ -54,30 +102,167 @@ def bt_node_generator(
     edit_bt_tree_models_action(btproj_path, node_model_info)
 
 
+def list_plugin_files(bt_plugin_dir: str) -> list[str]:
+    """bt plugin のディレクトリから C++ ヘッダーの一覧を取得する
+
+    Args:
+        bt_plugin_dir (str): bt plugin のディレクトリ
+
+    Returns:
+        list[str]: C++ ヘッダーのパスのリスト
+    """
+    return [
+        os.path.join(bt_plugin_dir, f)
+        for f in file_writer.list_dir(bt_plugin_dir)
+        if is_plugin_file(f)
+    ]
+
+
+def is_plugin_file(file_name: str) -> bool:
+    """ファイル名が bt plugin の C++ ヘッダーかどうかを判定する
+
+    Args:
+        file_name (str): ファイル名
+
+    Returns:
+        bool: C++ ヘッダーの場合 True
+    """
+    extensions = ["*.h", "*.hpp"]
+    return any(fnmatch.fnmatch(file_name, ext) for ext in extensions)
+
+
+@profiler.timed("plugin_scan")
+def get_generated_plugin_info(
+    plugin_file_name: str, manifest_plugins: dict[str, dict[str, Any]]
+) -> PluginSpec | None:
+    """-p で生成した bt plugin の情報を manifest から取得する
+
+    Args:
+        plugin_file_name (str): plugin ファイル名
+        manifest_plugins (dict[str, dict[str, Any]]): build_manifest.get_generated_plugins の結果
+
+    Returns:
+        PluginSpec | None: bt plugin 情報. manifest にない, または生成後に変更されたヘッダーの場合は None
+    """
+    entry = manifest_plugins.get(os.path.abspath(plugin_file_name))
+    if entry is None or file_writer.is_staged(plugin_file_name):
+        return None
+    try:
+        stat = os.stat(plugin_file_name)
+    except OSError:
+        return None
+    if not build_manifest.is_generated_plugin_unchanged(entry, stat):
+        return None
+    profiler.count("plugin_manifest_hits")
+    return plugin_cache.plugin_from_dict(entry["plugin"])
+
+
+@profiler.timed("plugin_scan")
+def get_plugin_from_cpp_cached(
+    plugin_file_name: str,
+    cache_entries: dict[str, Any],
+    new_cache_entries: dict[str, Any],
+    ros2_node_name_suffix: str,
+    ros2_node_name_exclude_words: list[str],
+    name_exclude_word_boundary: bool = False,
+) -> PluginSpec | None:
+    """キャッシュを使って bt plugin ファイルから bt plugin 情報を取得する
+
+    mtime とサイズがキャッシュと一致する場合はファイルを読まない.
+    一致しない場合もファイルの内容の sha256 が一致すれば解析しない.
+
+    Args:
+        plugin_file_name (str): plugin ファイル名
+        cache_entries (dict[str, Any]): 前回のキャッシュのエントリ
+        new_cache_entries (dict[str, Any]): 今回のキャッシュのエントリ. 取得したヘッダーのエントリを追加する
+        ros2_node_name_suffix (str): ros2 node 名の接尾辞
+        ros2_node_name_exclude_words (list[str]): ros2 node 名で除外する単語
+        name_exclude_word_boundary (bool, optional): ros2 node 名の除外する単語を単語境界でのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        PluginSpec | None: bt plugin 情報. providedBasicPorts がない場合は None
+    """
+    # 同じ実行で書き込みを保持しているヘッダーはディスクの stat が使えないため, キャッシュを使わない
+    if file_writer.is_staged(plugin_file_name):
+        return get_plugin_from_cpp(
+            plugin_file_name,
+            ros2_node_name_suffix,
+            ros2_node_name_exclude_words,
+            name_exclude_word_boundary,
+        )
+
+    path = os.path.abspath(plugin_file_name)
+    entry = cache_entries.get(path)
+    stat = os.stat(path)
+    if plugin_cache.is_stat_unchanged(entry, stat):
+        profiler.count("plugin_cache_hits")
+        new_cache_entries[path] = entry
+        return plugin_cache.plugin_from_dict(entry["plugin"])
+
+    plugin_file = file_writer.read_file(plugin_file_name)
+    digest = plugin_cache.content_digest(plugin_file)
+    if entry is not None and entry["digest"] == digest:
+        profiler.count("plugin_cache_hits")
+        plugin_info = plugin_cache.plugin_from_dict(entry["plugin"])
+    else:
+        plugin_info = parse_plugin_cpp(
+            plugin_file,
+            ros2_node_name_suffix,
+            ros2_node_name_exclude_words,
+            name_exclude_word_boundary,
+        )
+    new_cache_entries[path] = plugin_cache.make_entry(stat, digest, plugin_info)
+    return plugin_info
+
+
+@profiler.timed("plugin_scan")
 def get_plugin_from_cpp(
     plugin_file_name: str,
     ros2_node_name_suffix: str,
     ros2_node_name_exclude_words: list[str],
-) -> list[Any]:
+    name_exclude_word_boundary: bool = False,
+) -> PluginSpec | None:
     """bt plugin ファイルから bt plugin 情報を取得する
 
     Args:
         plugin_file_name (str): plugin ファイル名
         ros2_node_name_suffix (str):
         ros2_node_name_exclude_words (list[str]):
+        name_exclude_word_boundary (bool, optional): ros2 node 名の除外する単語を単語境界でのみ除外する. デフォルト値はFalse.
 
     Returns:
-        list[Any]: ポート情報
-            {"action_class_name" : str,
-             "ros2_action_name" : str,
-             "non_default_input_ports" : [{"name": str, "type" : str}],
-             "default_input_ports" : [{"name" : str, "type" : str, "c_name" : str}],
-             "output_ports" : [{"name" : str}]}
+        PluginSpec | None: bt plugin 情報. providedBasicPorts がない場合は None
     """
 
     # プラグインファイルの読み込み
-    with open(plugin_file_name, "r") as f:
-        plugin_file = f.read()
+    plugin_file = file_writer.read_file(plugin_file_name)
+
+    return parse_plugin_cpp(
+        plugin_file,
+        ros2_node_name_suffix,
+        ros2_node_name_exclude_words,
+        name_exclude_word_boundary,
+    )
+
+
+def parse_plugin_cpp(
+    plugin_file: str,
+    ros2_node_name_suffix: str,
+    ros2_node_name_exclude_words: list[str],
+    name_exclude_word_boundary: bool = False,
+) -> PluginSpec | None:
+    """bt plugin ファイルの内容から bt plugin 情報を取得する
+
+    Args:
+        plugin_file (str): plugin ファイルの内容
+        ros2_node_name_suffix (str):
+        ros2_node_name_exclude_words (list[str]):
+        name_exclude_word_boundary (bool, optional): ros2 node 名の除外する単語を単語境界でのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        PluginSpec | None: bt plugin 情報. providedBasicPorts がない場合は None
+    """
+    profiler.count("plugin_headers_parsed")
 
     # class 名を取得する
     class_name = re.search(r"class\s+(\w+)\s*:", plugin_file).group(1)
@@ -86,14 +271,13 @@ def get_plugin_from_cpp(
     ros2_node_name = re.search(r'#include\s*["<](.+?)\/action\/.+?[">]', plugin_file)
     ros2_action_name = re.search(r'#include\s*["<].+?\/action\/(.+?)\.h.*?[">]', plugin_file)
     if ros2_node_name != None:
-        ros2_node_name = ros2_node_name.group(1)
-        for exclude_word in ros2_node_name_exclude_words:
-            ros2_node_name = ros2_node_name.replace(exclude_word, "")
-        ros2_node_name = ros2_node_name + "_" + ros2_node_name_suffix
-        ros2_node_name = case_formatter.case_formatter(
-            ros2_node_name, "lower_snake_case"
+        ros2_action_name = name_generator.generate_ros2_action_name(
+            ros2_node_name.group(1),
+            ros2_action_name.group(1),
+            ros2_node_name_suffix,
+            ros2_node_name_exclude_words,
+            name_exclude_word_boundary,
         )
-        ros2_action_name = '/' + ros2_node_name + '/' + ros2_action_name.group(1)
     else:
         ros2_action_name = ""
 
@@ -101,19 +285,19 @@ def get_plugin_from_cpp(
     constructor_str = re.search(r"(\w+)\s*\((.+)\)", plugin_file).group(2)
 
     # コンストラクタのデフォルト引数の名前と型を取得する
-    default_input_ports = []
-    argument_list = constructor_str.split(",")
+    default_args = []
+    # std::optional<std::array<uint8_t, 4>> のような型の中のカンマでは分割しない
+    argument_list = cpp_code_editor.split_ignoring_brackets(constructor_str)
     for arg in argument_list:
         if "=" in arg:
             matches = re.search(r"[\w\s:]*\s*<(.*?)>\s*(\w+)\s*=\s*(\w+)", arg)
-            default_input_ports.append(
-                {"c_name": matches.group(2), "type": matches.group(1)}
-            )
+            # [c_name, type, name]. name は providedBasicPorts から取得する
+            default_args.append([matches.group(2), matches.group(1), None])
 
     # providedBasicPortsのあとのブロックを取得する
     provided_basic_ports = re.search(r"(providedBasicPorts[^{]*?{(.+)})", plugin_file, re.DOTALL)
     if provided_basic_ports == None:
-        return []
+        return None
     else:
         provided_basic_ports = provided_basic_ports.group(1)
 
@@ -124,52 +308,67 @@ def get_plugin_from_cpp(
 
     non_default_input_ports = []
     for input_port in input_ports_str:
-        # input_port[1]が、default_input_portsの["c_name"]のうちどれかに文字列が含まれているかを調べる
-        if any(
-            input_port[1] in default_port["c_name"]
-            for default_port in default_input_ports
-        ):
-            for default_port in default_input_ports:
-                if input_port[1] in default_port["c_name"]:
-                    default_port["name"] = input_port[1]
+        # input_port[1]が、default引数のc_nameのうちどれかに文字列が含まれているかを調べる
+        if any(input_port[1] in default_arg[0] for default_arg in default_args):
+            for default_arg in default_args:
+                if input_port[1] in default_arg[0]:
+                    default_arg[2] = input_port[1]
         else:
-            non_default_input_ports.append(
-                {"name": input_port[1], "type": input_port[0]}
-            )
+            non_default_input_ports.append(PortSpec(name=input_port[1], type=input_port[0]))
 
     # providedBasicPortsのあとのブロックの中からOutputPortの名前を取得する
     output_ports_str = re.findall(
         r"OutputPort<(?:.+?)>\s*\([^\w]*?(\w*?)[^\w]*?\)", provided_basic_ports
     )
-    output_ports = []
-    for output_port in output_ports_str:
-        output_ports.append({"name": output_port})
+    output_ports = tuple(PortSpec(name=output_port) for output_port in output_ports_str)
 
     # print(class_name)
     # print(default_input_ports)
     # print(non_default_input_ports)
     # print(output_ports)
 
-    return {
-        "action_class_name": class_name,
-        "ros2_action_name" : ros2_action_name,
-        "non_default_input_ports": non_default_input_ports,
-        "default_input_ports": default_input_ports,
-        "output_ports": output_ports,
-    }
+    return PluginSpec(
+        action_class_name=class_name,
+        ros2_action_name=ros2_action_name,
+        non_default_input_ports=tuple(non_default_input_ports),
+        default_input_ports=tuple(
+            PortSpec(name=name, type=type, c_name=c_name) for c_name, type, name in default_args
+        ),
+        output_ports=output_ports,
+    )
 
 
-def edit_bt_source_action_area(ros2_source_path: str, plugins_info: list[Any]):
-    """bt plugin 情報を元に、ros2のbtソースを編集する
+@dataclass(frozen=True, slots=True)
+class BtSourceIndex:
+    """load_bt_source で作成した bt ソースの索引. 範囲はすべて元の bt ソースの位置で表す"""
+
+    path: str
+    code: str
+    # BT::BehaviorTreeFactory, BT::RosNodeParams のインスタンス名
+    factory: str
+    node_params: str
+    # 編集領域のマーカーの間の範囲. マーカーがない場合は None
+    action_area: tuple[int, int] | None
+    named_action_area: tuple[int, int] | None
+    # named action list のコメントの中身. コメントがない場合は None
+    named_action_list: str | None
+
+
+def load_bt_source(ros2_source_path: str) -> BtSourceIndex:
+    """bt ソースを1回だけ読み込み, 編集に使うインスタンス名と範囲を取得する
 
     Args:
         ros2_source_path (str): ros2のbtソースの絶対パス
-        plugins_info (list[Any]): bt plugin 情報
+
+    Returns:
+        BtSourceIndex: bt ソースの索引
+
+    Raises:
+        ValueError: BT::BehaviorTreeFactory または BT::RosNodeParams のインスタンスが宣言されていない場合
     """
 
     # bt ソースコードの読み込み
-    with open(ros2_source_path, "r") as f:
-        bt_source_code = f.read()
+    bt_source_code = file_writer.read_file(ros2_source_path)
 
     # 定義済みのインスタンスの取得
     factory_match = re.search(r"BT::BehaviorTreeFactory\s*(\w+)\s*;", bt_source_code)
@@ -177,66 +376,150 @@ def edit_bt_source_action_area(ros2_source_path: str, plugins_info: list[Any]):
         raise ValueError(
             f"BT::BehaviorTreeFactory instance does not declared in {ros2_source_path}."
         )
-    factory_str = factory_match.group(1)
 
     node_param_match = re.search(r"BT::RosNodeParams\s*(\w+)\s*;", bt_source_code)
     if node_param_match == None:
         raise ValueError(
             f"BT::RosNodeParams instance does not declared in {ros2_source_path}."
         )
-    node_param_str = node_param_match.group(1)
 
-    # 編集領域の取得
+    # 編集領域と named action list の取得
     edit_area_match = re.search(
         r"// auto generate action area start(.+)// auto generate action area end",
         bt_source_code,
         re.DOTALL,
     )
-    edit_area = edit_area_match.group(0)
-    edit_erea_content = edit_area_match.group(1)
+    named_edit_area_match = re.search(
+        r"// auto generate named action area start(.+)// auto generate named action area end",
+        bt_source_code,
+        re.DOTALL,
+    )
+    named_actions_area_match = re.search(
+        r"\/\* named action list(.+)\*\/", bt_source_code, re.DOTALL
+    )
 
-    # 編集領域の編集
-    modified_edit_erea_content = edit_erea_content
-    for plugin_info in plugins_info:
-        # プラグインファイルのクラス名を追加
-        if not plugin_info["action_class_name"] in modified_edit_erea_content:
-            modified_edit_erea_content += f'  {factory_str}.registerNodeType<{plugin_info["action_class_name"]}>("{plugin_info["action_class_name"]}", {node_param_str});\n'
+    return BtSourceIndex(
+        path=ros2_source_path,
+        code=bt_source_code,
+        factory=factory_match.group(1),
+        node_params=node_param_match.group(1),
+        action_area=edit_area_match.span(1) if edit_area_match else None,
+        named_action_area=named_edit_area_match.span(1) if named_edit_area_match else None,
+        named_action_list=named_actions_area_match.group(1) if named_actions_area_match else None,
+    )
+
+
+@profiler.timed("bt_source_edit")
+def edit_bt_source(
+    ros2_source_path: str, plugins_info: list[PluginSpec]
+) -> list[NamedAction]:
+    """bt plugin 情報と named action list を元に、ros2のbtソースの2つの編集領域をまとめて編集する
 
-    edit_area = edit_area.replace(edit_erea_content, modified_edit_erea_content)
+    bt ソースの読み込みと書き込みは1回ずつ行う.
 
-    bt_source_code = bt_source_code.replace(edit_area_match.group(0), edit_area)
+    Args:
+        ros2_source_path (str): ros2のbtソースの絶対パス
+        plugins_info (list[PluginSpec]): bt plugin 情報
+
+    Returns:
+        list[NamedAction]: bt に登録する named action
+    """
+    bt_source = load_bt_source(ros2_source_path)
 
-    # bt ソースコードの保存
-    with open(ros2_source_path, "w") as f:
-        f.write(bt_source_code)
+    # named_actionsは、bt actionのcpp classのコンストラクタに、デフォルト引数を渡したものを意味する
+    named_actions_info = parse_named_actions(bt_source)
+    named_action_edit, named_actions_list_for_bt = named_action_area_edit(
+        bt_source, named_actions_info
+    )
+
+    batch = source_edit.EditBatch(bt_source.code)
+    batch.add(action_area_edit(bt_source, plugins_info))
+    batch.add(named_action_edit)
+
+    # bt ソースコードの保存 (内容が変わった場合のみ)
+    file_writer.write_if_changed(ros2_source_path, batch.apply(), bt_source.code)
+    return named_actions_list_for_bt
+
+
+@profiler.timed("bt_source_edit")
+def edit_bt_source_action_area(ros2_source_path: str, plugins_info: list[PluginSpec]):
+    """bt plugin 情報を元に、ros2のbtソースを編集する
+
+    Args:
+        ros2_source_path (str): ros2のbtソースの絶対パス
+        plugins_info (list[PluginSpec]): bt plugin 情報
+    """
+    bt_source = load_bt_source(ros2_source_path)
+    bt_source_code = source_edit.apply_edits(
+        bt_source.code, [action_area_edit(bt_source, plugins_info)]
+    )
+
+    # bt ソースコードの保存 (内容が変わった場合のみ)
+    file_writer.write_if_changed(ros2_source_path, bt_source_code, bt_source.code)
     return
 
 
-def analyze_named_actions(ros2_source_path):
+def action_area_edit(bt_source: BtSourceIndex, plugins_info: list[PluginSpec]) -> Edit:
+    """bt plugin 情報を元に、action の編集領域の末尾に登録を挿入する置換を作成する
+
+    Args:
+        bt_source (BtSourceIndex): bt ソースの索引
+        plugins_info (list[PluginSpec]): bt plugin 情報
+
+    Returns:
+        Edit: 登録を挿入する置換
+
+    Raises:
+        ValueError: 編集領域が見つからない場合
+    """
+    if bt_source.action_area is None:
+        raise ValueError(f"auto generate action area is not found in {bt_source.path}.")
+    start, end = bt_source.action_area
+    edit_erea_content = bt_source.code[start:end]
+
+    # 編集領域の編集 - 追加する登録を編集領域の末尾に挿入する
+    new_registrations = ""
+    for plugin_info in plugins_info:
+        # プラグインファイルのクラス名を追加
+        if not (
+            plugin_info.action_class_name in edit_erea_content
+            or plugin_info.action_class_name in new_registrations
+        ):
+            new_registrations += f'  {bt_source.factory}.registerNodeType<{plugin_info.action_class_name}>("{plugin_info.action_class_name}", {bt_source.node_params});\n'
+
+    return Edit(end, end, new_registrations)
+
+
+@profiler.timed("bt_source_edit")
+def analyze_named_actions(ros2_source_path: str) -> list[NamedAction]:
     """bt ソースからnamed actionの情報を取得する
 
     Args:
         ros2_source_path (str): ros2のbtソースの絶対パス
 
     Returns:
-        list[Any]: named_actions_info
-            {"action_class_names" : [str],
-             "named_actions": [{
-                 "instance_name" : str,
-                 args : [{"name" : str, "value" : str}}]
-                ]
-            }
+        list[NamedAction]: named action list の各行を各 action class に適用したもの.
+            named action list の記述順 (セクション, 行, action class の順)
     """
+    return parse_named_actions(load_bt_source(ros2_source_path))
 
-    # bt ソースコードの読み込み
-    with open(ros2_source_path, "r") as f:
-        bt_source_code = f.read()
 
-    named_actions_area_match = re.search(
-        r"\/\* named action list(.+)\*\/", bt_source_code, re.DOTALL
-    )
-    named_actions_area = named_actions_area_match.group(0)
-    named_actions_erea_content = named_actions_area_match.group(1)
+def parse_named_actions(bt_source: BtSourceIndex) -> list[NamedAction]:
+    """bt ソースの索引の named action list からnamed actionの情報を取得する
+
+    Args:
+        bt_source (BtSourceIndex): bt ソースの索引
+
+    Returns:
+        list[NamedAction]: named action list の各行を各 action class に適用したもの.
+            named action list の記述順 (セクション, 行, action class の順)
+
+    Raises:
+        ValueError: named action list が見つからない, またはセクションに instance_name の列がない場合
+    """
+    named_actions_erea_content = bt_source.named_action_list
+    if named_actions_erea_content is None:
+        raise ValueError(f"named action list is not found in {bt_source.path}.")
 
     action_list_matches = re.findall(
         r"\[([\w,\s]+?)\](.*?)(?=\[|$)", named_actions_erea_content, re.DOTALL
@@ -254,129 +537,116 @@ def analyze_named_actions(ros2_source_path):
         )[0]
         if not "instance_name" in headers:
             raise ValueError(
-                f"instance_name header is not found in named action list of {action_class_names_str} in {ros2_source_path}"
+                f"instance_name header is not found in named action list of {action_class_names_str} in {bt_source.path}"
             )
 
         action_class_names = [i.strip() for i in action_class_names_str.split(",")]
-        named_actions_info.append(
-            {"action_class_names": action_class_names, "named_actions": []}
-        )
-        named_actions = named_actions_info[-1]["named_actions"]
 
         reader = csv.DictReader(csv_file)
-        # 各行を辞書として表示
         for row in reader:
-            named_actions.append({"instance_name": row["instance_name"], "args": []})
-            named_action = named_actions[-1]
             args = row.copy()
-            args.pop("instance_name")
-            for key, value in args.items():
-                named_action["args"].append({"name": key, "value": value})
+            instance_name = args.pop("instance_name")
+            for class_name in action_class_names:
+                named_actions_info.append(
+                    NamedAction(class_name, instance_name, tuple(args.items()))
+                )
 
     return named_actions_info
 
 
+@profiler.timed("bt_source_edit")
 def edit_bt_source_named_action_area(
-    ros2_source_path: str, named_actions_info: list[Any]
-):
+    ros2_source_path: str, named_actions_info: list[NamedAction]
+) -> list[NamedAction]:
     """named_actions 情報を元に、ros2のbtソースを編集する
 
     Args:
         ros2_source_path (str): ros2のbtソースの絶対パス
-        named_actions_info (list[Any]): named_actions 情報
-        plugins_info (list[Any]): bt plugin 情報
+        named_actions_info (list[NamedAction]): named_actions 情報
+
+    Returns:
+        list[NamedAction]: bt に登録する named action
     """
+    bt_source = load_bt_source(ros2_source_path)
+    edit, named_actions_list_for_bt = named_action_area_edit(bt_source, named_actions_info)
+    bt_source_code = source_edit.apply_edits(bt_source.code, [edit])
 
-    # bt ソースコードの読み込み
-    with open(ros2_source_path, "r") as f:
-        bt_source_code = f.read()
+    # bt ソースコードの保存 (内容が変わった場合のみ)
+    file_writer.write_if_changed(ros2_source_path, bt_source_code, bt_source.code)
 
-    # 定義済みのインスタンスの取得
-    factory_match = re.search(r"BT::BehaviorTreeFactory\s*(\w+)\s*;", bt_source_code)
-    if factory_match == None:
-        raise ValueError(
-            f"BT::BehaviorTreeFactory instance does not declared in {ros2_source_path}."
-        )
-    factory_str = factory_match.group(1)
+    return named_actions_list_for_bt
 
-    node_param_match = re.search(r"BT::RosNodeParams\s*(\w+)\s*;", bt_source_code)
-    if node_param_match == None:
-        raise ValueError(
-            f"BT::RosNodeParams instance does not declared in {ros2_source_path}."
-        )
-    node_param_str = node_param_match.group(1)
 
-    # 編集領域の取得
-    edit_area_match = re.search(
-        r"// auto generate named action area start(.+)// auto generate named action area end",
-        bt_source_code,
-        re.DOTALL,
-    )
-    edit_area = edit_area_match.group(0)
-    edit_erea_content = edit_area_match.group(1)
+def named_action_area_edit(
+    bt_source: BtSourceIndex, named_actions_info: list[NamedAction]
+) -> tuple[Edit, list[NamedAction]]:
+    """named_actions 情報を元に、named action の編集領域の末尾に登録を挿入する置換を作成する
 
-    # bt 向けに名前ありのactionのリストを作成しておく
-    named_actions_list_for_bt = []
+    Args:
+        bt_source (BtSourceIndex): bt ソースの索引
+        named_actions_info (list[NamedAction]): named_actions 情報
 
-    # 編集領域の編集
-    modified_edit_erea_content = edit_erea_content
-    for named_actions in named_actions_info:
-        for named_action in named_actions["named_actions"]:
-            action_name = named_action["instance_name"]
-            for class_name in named_actions["action_class_names"]:
-                named_actions_list_for_bt.append(
-                    {"class_name": class_name, "action_name": action_name + class_name}
-                )
-                if f"{action_name}{class_name}" in modified_edit_erea_content:
-                    continue
-                modified_edit_erea_content += f'  {factory_str}.registerNodeType<{action_name}{class_name}>("{class_name}", {node_param_str}'
-                for arg in named_action["args"]:
-                    modified_edit_erea_content += f', {arg["value"]}'
-                modified_edit_erea_content += ");\n"
-        # プラグインファイルのクラス名を追加
+    Returns:
+        tuple[Edit, list[NamedAction]]: 登録を挿入する置換と, bt に登録する named action
 
-    edit_area = edit_area.replace(edit_erea_content, modified_edit_erea_content)
+    Raises:
+        ValueError: 編集領域が見つからない場合
+    """
+    if bt_source.named_action_area is None:
+        raise ValueError(f"auto generate named action area is not found in {bt_source.path}.")
+    start, end = bt_source.named_action_area
+    edit_erea_content = bt_source.code[start:end]
 
-    bt_source_code = bt_source_code.replace(edit_area_match.group(0), edit_area)
+    # bt 向けに名前ありのactionのリストを作成しておく
+    named_actions_list_for_bt = []
 
-    # bt ソースコードの保存
-    with open(ros2_source_path, "w") as f:
-        f.write(bt_source_code)
+    # 編集領域の編集 - 追加する登録を編集領域の末尾に挿入する
+    new_registrations = ""
+    for named_action in named_actions_info:
+        named_actions_list_for_bt.append(named_action)
+        if (
+            named_action.action_name in edit_erea_content
+            or named_action.action_name in new_registrations
+        ):
+            continue
+        new_registrations += f'  {bt_source.factory}.registerNodeType<{named_action.action_name}>("{named_action.class_name}", {bt_source.node_params}'
+        for _, value in named_action.args:
+            new_registrations += f", {value}"
+        new_registrations += ");\n"
 
-    return named_actions_list_for_bt
+    return Edit(end, end, new_registrations), named_actions_list_for_bt
 
 
 def merge_named_actions_info_plugins_info(
-    named_actions_list_for_bt: list[Any], plugins_info: list[Any]
-) -> list[Any]:
+    named_actions_list_for_bt: list[NamedAction], plugins_info: list[PluginSpec]
+) -> list[PluginSpec]:
     node_model_info = plugins_info.copy()
 
     for named_action_info in named_actions_list_for_bt:
-        named_action = {}
-        named_action["action_class_name"] = named_action_info["action_name"]
-
         # named_action_infoのclass_nameから、action classに関する情報をplugins_infoから抽出
-        target_action_name = named_action_info["class_name"]
-        matching_dicts = [
-            d for d in plugins_info if d.get("action_class_name") == target_action_name
-        ]
-        
-        named_action["ros2_action_name"] = matching_dicts[0]["ros2_action_name"]
-        named_action["default_input_ports"] = []
-        named_action["non_default_input_ports"] = matching_dicts[0][
-            "non_default_input_ports"
+        target_action_name = named_action_info.class_name
+        matching_plugins = [
+            p for p in plugins_info if p.action_class_name == target_action_name
         ]
-        named_action["output_ports"] = matching_dicts[0]["output_ports"]
 
-        node_model_info.append(named_action)
+        node_model_info.append(
+            PluginSpec(
+                action_class_name=named_action_info.action_name,
+                ros2_action_name=matching_plugins[0].ros2_action_name,
+                non_default_input_ports=matching_plugins[0].non_default_input_ports,
+                default_input_ports=(),
+                output_ports=matching_plugins[0].output_ports,
+            )
+        )
 
     return node_model_info
 
 
-def edit_bt_tree_models_action(btproj_path, node_model_info):
+@profiler.timed("btproj_edit")
+def edit_bt_tree_models_action(btproj_path: str, node_model_info: list[PluginSpec]):
     # bt btprojファイルの読み込み
-    with open(btproj_path, "r") as f:
-        btproj_file = f.read()
+    original_btproj_file = file_writer.read_file(btproj_path)
+    btproj_file = original_btproj_file
 
     # 編集領域の取得
     edit_area_match = re.search(
@@ -393,7 +663,7 @@ def edit_bt_tree_models_action(btproj_path, node_model_info):
 
     # Actionを追加または更新
     for plugin in node_model_info:
-        action_name = plugin["action_class_name"]
+        action_name = plugin.action_class_name
 
         if action_name in existing_actions:
             # 既存のActionを更新
@@ -410,25 +680,25 @@ def edit_bt_tree_models_action(btproj_path, node_model_info):
                 action_input_port = ET.Element(
                     "input_port",
                     name="action_name",
-                    default=plugin["ros2_action_name"],
+                    default=plugin.ros2_action_name,
                 )
                 action_element.append(action_input_port)
 
-            for default_port in plugin["default_input_ports"]:
-                if default_port["name"] not in existing_input_ports:
+            for default_port in plugin.default_input_ports:
+                if default_port.name not in existing_input_ports:
                     new_input_port = ET.Element(
                         "input_port",
-                        name=default_port["name"],
-                        default=type_to_default_value(default_port["type"]),
+                        name=default_port.name,
+                        default=type_to_default_value(default_port.type),
                     )
                     action_element.append(new_input_port)
 
-            for non_default_port in plugin["non_default_input_ports"]:
-                if non_default_port["name"] not in existing_input_ports:
+            for non_default_port in plugin.non_default_input_ports:
+                if non_default_port.name not in existing_input_ports:
                     new_non_default_port = ET.Element(
                         "input_port",
-                        name=non_default_port["name"],
-                        default=type_to_default_value(non_default_port["type"]),
+                        name=non_default_port.name,
+                        default=type_to_default_value(non_default_port.type),
                     )
                     action_element.append(new_non_default_port)
 
@@ -437,25 +707,25 @@ def edit_bt_tree_models_action(btproj_path, node_model_info):
                 port.attrib["name"]: port
                 for port in action_element.findall("output_port")
             }
-            for output_port in plugin["output_ports"]:
-                if output_port["name"] not in existing_output_ports:
+            for output_port in plugin.output_ports:
+                if output_port.name not in existing_output_ports:
                     new_output_port = ET.Element(
-                        "output_port", name=output_port["name"], default="{}"
+                        "output_port", name=output_port.name, default="{}"
                     )
                     action_element.append(new_output_port)
 
             # 不要な要素の削除
             for existing_port_name in existing_input_ports:
                 if existing_port_name not in [
-                    port["name"] for port in plugin["default_input_ports"]
-                ] + [port["name"] for port in plugin["non_default_input_ports"]] + [
+                    port.name for port in plugin.default_input_ports
+                ] + [port.name for port in plugin.non_default_input_ports] + [
                     "action_name"
                 ]:
                     action_element.remove(existing_input_ports[existing_port_name])
 
             for existing_port_name in existing_output_ports:
                 if existing_port_name not in [
-                    port["name"] for port in plugin["output_ports"]
+                    port.name for port in plugin.output_ports
                 ]:
                     action_element.remove(existing_output_ports[existing_port_name])
 
@@ -467,32 +737,32 @@ def edit_bt_tree_models_action(btproj_path, node_model_info):
             action_input_port = ET.Element(
                 "input_port",
                 name="action_name",
-                default=plugin["ros2_action_name"],
+                default=plugin.ros2_action_name,
             )
             new_action.append(action_input_port)
 
             # default_input_portsの追加
-            for default_port in plugin["default_input_ports"]:
+            for default_port in plugin.default_input_ports:
                 new_input_port = ET.Element(
                     "input_port",
-                    name=default_port["name"],
-                    default=type_to_default_value(default_port["type"]),
+                    name=default_port.name,
+                    default=type_to_default_value(default_port.type),
                 )
                 new_action.append(new_input_port)
 
             # non_default_input_portsの追加
-            for non_default_port in plugin["non_default_input_ports"]:
+            for non_default_port in plugin.non_default_input_ports:
                 new_non_default_port = ET.Element(
                     "input_port",
-                    name=non_default_port["name"],
-                    default=type_to_default_value(non_default_port["type"]),
+                    name=non_default_port.name,
+                    default=type_to_default_value(non_default_port.type),
                 )
                 new_action.append(new_non_default_port)
 
             # output_portsの追加
-            for output_port in plugin["output_ports"]:
+            for output_port in plugin.output_ports:
                 new_output_port = ET.Element(
-                    "output_port", name=output_port["name"], default="{}"
+                    "output_port", name=output_port.name, default="{}"
                 )
                 new_action.append(new_output_port)
 
@@ -505,11 +775,12 @@ def edit_bt_tree_models_action(btproj_path, node_model_info):
     pretty_xml = "\n".join([line for line in pretty_xml.splitlines() if line.strip()])
     pretty_xml = pretty_xml.replace('<?xml version="1.0" ?>\n', "")
 
-    btproj_file = btproj_file.replace(edit_area, pretty_xml)
+    batch = source_edit.EditBatch(btproj_file)
+    batch.replace(edit_area_match.start(), edit_area_match.end(), pretty_xml)
+    btproj_file = batch.apply()
 
-    # btpojファイルの保存
-    with open(btproj_path, "w") as f:
-        f.write(btproj_file)
+    # btpojファイルの保存 (内容が変わった場合のみ)
+    file_writer.write_if_changed(btproj_path, btproj_file, original_btproj_file)
 
 
 def type_to_default_value(type: str):
@@ -0,0 +1,618 @@
+import os, sys, glob, dataclasses
+from concurrent.futures import ProcessPoolExecutor
+from typing import Any
+from modules import argument_policy
+from modules import ros2_action_analyzer
+from modules import bt_action_cpp_generator
+from modules import name_generator
+from modules import build_manifest
+from modules import plugin_cache
+from modules import file_writer
+from modules import profiler
+from modules.specs import ActionSpec
+
+# bt plugin を生成するスレッド数の既定値
+DEFAULT_RENDER_THREADS = 4
+
+
+def bt_plugin_pipeline(
+    config: dict[str, Any], jobs: int = 1, force: bool = False, prune: bool = False
+) -> dict[str, Any]:
+    """ros2 pkg の探索から bt plugin の生成までを実行する
+
+    jobs が 2 以上の場合は pkg 単位でプロセスプールに処理を分散する.
+    結果は pkg のパス順に処理されるため, 並列数によらず出力は同一になる.
+    manifest に記録された入力の sha256 が一致し, 生成したファイルが変更されていない
+    .action ファイルは解析も生成も行わない.
+
+    Args:
+        config (dict[str, Any]): 設定ファイルの内容
+        jobs (int, optional): 並列数. 0 の場合は CPU 数. デフォルト値は1.
+        force (bool, optional): manifest を無視してすべて再生成する. デフォルト値はFalse.
+        prune (bool, optional): 元の .action ファイルが無くなった bt plugin を削除する. デフォルト値はFalse.
+
+    Returns:
+        dict[str, Any]: 実行結果
+            {"errors": [str]: pkg ごとに収集したエラーメッセージ,
+             "plugins_info": {plugin_file_path: PluginSpec}: 今回生成した bt plugin の情報}
+    """
+    ros2_pkg_paths = discover_ros2_pkg_paths(config)
+    msg_type_index = build_msg_type_index(config, ros2_pkg_paths)
+
+    if jobs == 0:
+        jobs = os.cpu_count() or 1
+
+    os.makedirs(os.path.expanduser(config["bt_plugin_save_path"]), exist_ok=True)
+    manifest_path = build_manifest.get_manifest_path(config["bt_plugin_save_path"])
+    manifest = build_manifest.load_manifest(manifest_path)
+    previous_entries = {} if force else manifest["entries"]
+
+    # 前回の manifest のエントリを pkg ごとに分配する
+    config_digest = build_manifest.config_digest(config, msg_type_index)
+    build_contexts = [{"config_digest": config_digest, "entries": {}} for _ in ros2_pkg_paths]
+    pkg_indices = {path: i for i, path in enumerate(ros2_pkg_paths)}
+    for action_path, entry in previous_entries.items():
+        if entry["ros2_pkg_path"] in pkg_indices:
+            build_contexts[pkg_indices[entry["ros2_pkg_path"]]]["entries"][action_path] = entry
+
+    errors = []
+    entries = {}
+    # 今回生成した .action ファイルの manifest のエントリの材料. {action_path: (ros2_pkg_path, build_entry)}
+    rendered_entries = {}
+    plugins_info = {}
+    with _create_executor(
+        jobs,
+        msg_type_index,
+        config.get("max_open_files", file_writer.DEFAULT_MAX_OPEN_FILES),
+    ) as executor:
+        # ros2 action の探索と解析
+        analyzed_pkgs = list(
+            executor.map(
+                _analyze_ros2_pkg_in_worker,
+                ros2_pkg_paths,
+                [config] * len(ros2_pkg_paths),
+                build_contexts,
+            )
+        )
+
+        for analyzed_pkg in analyzed_pkgs:
+            if jobs > 1:
+                # 別プロセスでの計測結果を反映する
+                profiler.merge(analyzed_pkg["profile"])
+            errors += analyzed_pkg["errors"]
+
+        # bt action の class 名が pkg をまたいで重複している action を除外する
+        class_name_errors, duplicated_action_paths = find_duplicated_bt_action_names(
+            analyzed_pkgs, config
+        )
+        errors += class_name_errors
+
+        # 生成先のファイル名が重複している action を除外する
+        plugin_file_owners = {}
+        render_targets = []
+        for analyzed_pkg in analyzed_pkgs:
+            for action_path, entry in analyzed_pkg["up_to_date_entries"].items():
+                plugin_file_owners.setdefault(entry["output_path"], analyzed_pkg["ros2_pkg_name"])
+                entries[action_path] = entry
+            actions = []
+            for action in analyzed_pkg["actions"]:
+                if action.action_path in duplicated_action_paths:
+                    continue
+                owner = plugin_file_owners.setdefault(
+                    analyzed_pkg["build_entries"][action.action_path]["output_path"],
+                    analyzed_pkg["ros2_pkg_name"],
+                )
+                if owner != analyzed_pkg["ros2_pkg_name"]:
+                    errors.append(
+                        f'[{analyzed_pkg["ros2_pkg_name"]}] {action.ros2_action_name}: '
+                        f'bt plugin file name "{action.bt_plugin_file_name}" '
+                        f"is already generated by {owner}"
+                    )
+                    continue
+                actions.append(action)
+            if actions:
+                render_targets.append({**analyzed_pkg, "actions": actions})
+
+        # bt plugin の生成
+        for render_target, render_result in zip(
+            render_targets,
+            executor.map(render_ros2_pkg, render_targets, [config] * len(render_targets)),
+        ):
+            # 別プロセスで保持した書き込みを反映する
+            file_writer.merge_staged(render_result["staged_files"])
+            if jobs > 1:
+                # 別プロセスでの書き込みの集計と計測結果を反映する
+                file_writer.merge_write_counts(render_result["write_counts"])
+                profiler.merge(render_result["profile"])
+            errors += render_result["errors"]
+            if render_result["errors"]:
+                continue
+            plugins_info.update(render_result["plugins_info"])
+            for action in render_target["actions"]:
+                build_entry = render_target["build_entries"][action.action_path]
+                rendered_entries[build_entry["action_path"]] = (
+                    render_target["ros2_pkg_path"],
+                    build_entry,
+                )
+
+    # 元の .action ファイルが無くなった bt plugin の報告と削除
+    for action_path, entry in manifest["entries"].items():
+        if action_path in entries or action_path in rendered_entries or os.path.exists(action_path):
+            continue
+        output_path = entry["output_path"]
+        if prune and output_path not in plugin_file_owners and file_writer.exists(output_path):
+            file_writer.remove_file(output_path)
+            print(f"removed stale bt plugin: {output_path}", file=sys.stderr)
+        else:
+            print(
+                f"stale bt plugin: {output_path} (source {action_path} was removed)",
+                file=sys.stderr,
+            )
+            if file_writer.exists(output_path):
+                entries[action_path] = entry
+
+    plugin_settings_digest = plugin_cache.settings_digest(
+        config["ros2_node_name_suffix"],
+        config["ros2_node_name_exclude_words"],
+        config.get("name_exclude_word_boundary", False),
+    )
+
+    def save_manifest():
+        # 生成したファイルの stat を記録するため, 書き込みを反映した後に manifest を作成する.
+        # -b はこの manifest の bt plugin の情報を使い, 生成したヘッダーを解析しない
+        for action_path, (ros2_pkg_path, build_entry) in rendered_entries.items():
+            entries[action_path] = build_manifest.make_entry(
+                ros2_pkg_path,
+                build_entry["source_stat"],
+                build_entry["source_digest"],
+                build_entry["input_digest"],
+                build_entry["output_path"],
+                plugins_info.get(build_entry["output_path"]),
+            )
+        if (
+            entries != manifest["entries"]
+            or manifest.get("plugin_settings_digest") != plugin_settings_digest
+        ):
+            manifest["entries"] = entries
+            manifest["plugin_settings_digest"] = plugin_settings_digest
+            build_manifest.save_manifest(manifest_path, manifest)
+
+    file_writer.after_commit(save_manifest)
+
+    return {"errors": errors, "plugins_info": plugins_info}
+
+
+def explain_argument_policy(config: dict[str, Any]) -> dict[str, Any]:
+    """すべての action の goal, result のメンバ変数の扱いと, その扱いを決めた設定を表にする
+
+    manifest は参照も更新もせず, bt plugin も生成しない.
+
+    Args:
+        config (dict[str, Any]): 設定ファイルの内容
+
+    Returns:
+        dict[str, Any]: 実行結果
+            {"errors": [str], "lines": [str]: argument_policy.explain_action の表を action ごとに並べたもの}
+    """
+    ros2_pkg_paths = discover_ros2_pkg_paths(config)
+    msg_type_index = build_msg_type_index(config, ros2_pkg_paths)
+
+    errors = []
+    lines = []
+    try:
+        policy = argument_policy.compile_argument_policy(
+            config["bt_action_default_arguments"],
+            config["bt_action_ignore_arguments"],
+            config.get("bt_action_argument_rules", {}),
+        )
+    except Exception as e:
+        return {"errors": [f"{type(e).__name__}: {e}"], "lines": []}
+
+    for ros2_pkg_path in ros2_pkg_paths:
+        analyzed_pkg = analyze_ros2_pkg(ros2_pkg_path, config, None, msg_type_index)
+        errors += analyzed_pkg["errors"]
+        for action in sorted(analyzed_pkg["actions"], key=lambda action: action.action_path):
+            lines += argument_policy.explain_action(policy, action)
+    return {"errors": errors, "lines": lines}
+
+
+def find_duplicated_bt_action_names(
+    analyzed_pkgs: list[dict[str, Any]], config: dict[str, Any]
+) -> tuple[list[str], set[str]]:
+    """bt action の class 名が重複している .action ファイルを検出する
+
+    今回解析しなかった (前回から変更のない) .action ファイルも対象にする.
+    同じ class 名の .action ファイルのうち, pkg とパスの順で最初のもの以外を重複とする.
+
+    Args:
+        analyzed_pkgs (list[dict[str, Any]]): analyze_ros2_pkg の結果のリスト
+        config (dict[str, Any]): 設定ファイルの内容
+
+    Returns:
+        tuple[list[str], set[str]]: エラーメッセージと, 重複した .action ファイルのパス
+    """
+    sources = []
+    for analyzed_pkg in analyzed_pkgs:
+        action_paths = sorted(
+            list(analyzed_pkg["up_to_date_entries"])
+            + [action.action_path for action in analyzed_pkg["actions"]]
+        )
+        sources += [(analyzed_pkg["ros2_pkg_name"], action_path) for action_path in action_paths]
+
+    bt_action_names, collisions = name_generator.generate_bt_action_names(
+        [
+            (ros2_pkg_name, os.path.splitext(os.path.basename(action_path))[0])
+            for ros2_pkg_name, action_path in sources
+        ],
+        config["bt_action_name_exclude_words"],
+        config.get("name_exclude_word_boundary", False),
+    )
+
+    errors = []
+    duplicated_action_paths = set()
+    for bt_action_name, indices in collisions.items():
+        owner_pkg_name, owner_action_path = sources[indices[0]]
+        for i in indices[1:]:
+            ros2_pkg_name, action_path = sources[i]
+            duplicated_action_paths.add(action_path)
+            errors.append(
+                f"[{ros2_pkg_name}] {action_path}: "
+                f'bt action class name "{bt_action_name}" '
+                f"is already generated by {owner_pkg_name} ({owner_action_path})"
+            )
+    return errors, duplicated_action_paths
+
+
+def discover_ros2_pkg_paths(config: dict[str, Any]) -> list[str]:
+    """設定ファイルの ros2_action_discovery に応じて ros2 pkg のディレクトリを列挙する
+
+    Args:
+        config (dict[str, Any]): 設定ファイルの内容
+            "ros2_action_discovery":
+                - 'source': ros2_package_abs_path の glob からソースツリーを探索する (デフォルト)
+                - 'ament_index': ament_prefix_path (空の場合は AMENT_PREFIX_PATH) の ament index を読む
+
+    Returns:
+        list[str]: ros2 pkg のディレクトリのリスト. 'ament_index' の場合は share ディレクトリ
+    """
+    discovery = config.get("ros2_action_discovery", "source")
+    if discovery == "source":
+        return find_ros2_pkg_paths(config["ros2_package_abs_path"])
+    elif discovery == "ament_index":
+        return ros2_action_analyzer.find_ament_index_pkg_paths(
+            ros2_action_analyzer.get_ament_prefix_paths(config.get("ament_prefix_path", [])),
+            config.get("ament_index_package_names", ["*"]),
+        )
+    else:
+        raise ValueError("[bt_plugin_pipeline] Invalid ros2_action_discovery: " + discovery)
+
+
+def build_msg_type_index(config: dict[str, Any], ros2_pkg_paths: list[str]) -> dict[str, Any]:
+    """action の解析で msg 型を解決するための索引を作成する
+
+    探索した ros2 pkg, 設定ファイルの ros2_msg_package_abs_path の glob に一致する pkg,
+    ament_prefix_path (空の場合は AMENT_PREFIX_PATH) の install 空間の msg を対象にする.
+
+    Args:
+        config (dict[str, Any]): 設定ファイルの内容
+        ros2_pkg_paths (list[str]): 探索した ros2 pkg のディレクトリのリスト
+
+    Returns:
+        dict[str, Any]: ros2_action_analyzer.build_msg_type_index の索引
+    """
+    return ros2_action_analyzer.build_msg_type_index(
+        ros2_pkg_paths + find_ros2_pkg_paths(config.get("ros2_msg_package_abs_path", [])),
+        ros2_action_analyzer.get_ament_prefix_paths(config.get("ament_prefix_path", [])),
+    )
+
+
+def find_ros2_pkg_paths(ros2_package_abs_path: list[str]) -> list[str]:
+    """設定ファイルの glob から ros2 pkg のディレクトリを列挙する
+
+    Args:
+        ros2_package_abs_path (list[str]): ros2 pkg のパスの glob のリスト
+
+    Returns:
+        list[str]: ros2 pkg のディレクトリのリスト
+    """
+    ros2_pkg_paths = []
+    # 重複する glob で同じ pkg を2回探索しないよう, 実体のパスで重複を除く
+    real_paths = set()
+    for path in ros2_package_abs_path:
+        for d in sorted(glob.glob(os.path.expanduser(path))):
+            if not os.path.isdir(d):
+                continue
+            real_path = os.path.realpath(d)
+            if real_path in real_paths:
+                continue
+            real_paths.add(real_path)
+            ros2_pkg_paths.append(d)
+    return ros2_pkg_paths
+
+
+def get_ros2_pkg_name(ros2_pkg_path: str) -> str:
+    """ros2 pkg のディレクトリから pkg 名を取得する
+
+    Args:
+        ros2_pkg_path (str): ros2 pkg のディレクトリ
+
+    Returns:
+        str: ros2 pkg 名
+    """
+    ros2_pkg_name = os.path.basename(ros2_pkg_path)
+    # パスの末尾がスラッシュで終わっている場合を考慮
+    if ros2_pkg_name == "":
+        ros2_pkg_name = os.path.basename(os.path.dirname(ros2_pkg_path))
+    return ros2_pkg_name
+
+
+def analyze_ros2_pkg(
+    ros2_pkg_path: str,
+    config: dict[str, Any],
+    build_context: dict[str, Any] | None = None,
+    msg_type_index: dict[str, Any] | None = None,
+) -> dict[str, Any]:
+    """ros2 pkg の .action ファイルを解析し, bt plugin の名前を付与する
+
+    .action ファイル単位でエラーを収集するため, 1つの不正なファイルが
+    同じ pkg の他のファイルの解析を妨げることはない.
+    build_context が与えられた場合, 前回から入力が変わっていない .action ファイルは解析しない.
+    build_context が None の場合は manifest のエントリの材料を作成せず, テンプレートや .action ファイルの sha256 も計算しない.
+
+    Args:
+        ros2_pkg_path (str): ros2 pkg のディレクトリ
+        config (dict[str, Any]): 設定ファイルの内容
+        build_context (dict[str, Any] | None, optional): 差分生成の情報. デフォルト値はNone.
+            {"config_digest": str, "entries": {action_path: manifest のエントリ}}
+        msg_type_index (dict[str, Any] | None, optional): build_msg_type_index の索引. デフォルト値はNone.
+
+    Returns:
+        dict[str, Any]: 解析結果
+            {"ros2_pkg_path": str, "ros2_pkg_name": str,
+             "actions": [ActionSpec],
+             "build_entries": {action_path: 解析した .action ファイルの manifest のエントリの材料},
+             "up_to_date_entries": {action_path: manifest のエントリ},
+             (build_context が None の場合, build_entries と up_to_date_entries は空)
+             "errors": [str], "profile": profiler の計測結果の差分}
+    """
+    profile_before = profiler.snapshot()
+    ros2_pkg_name = get_ros2_pkg_name(ros2_pkg_path)
+    pkg_directory = os.path.expanduser(ros2_pkg_path)
+    actions = []
+    build_entries = {}
+    up_to_date_entries = {}
+    errors = []
+    try:
+        if config.get("ros2_action_discovery", "source") == "ament_index":
+            action_files = ros2_action_analyzer.pick_action_rel_path_from_ament_index(
+                pkg_directory
+            )
+        else:
+            action_files = ros2_action_analyzer.pick_action_rel_path(
+                pkg_directory,
+                config.get("ros2_action_search_ignore_dirs", []),
+                config.get("ros2_action_search_action_dir_only", False),
+            )
+    except Exception as e:
+        action_files = []
+        errors.append(f"[{ros2_pkg_name}] {type(e).__name__}: {e}")
+
+    # pkg 内の .action ファイルの bt plugin のファイル名をまとめて生成する
+    bt_plugin_file_names, collisions = name_generator.generate_bt_plugin_file_names(
+        [
+            (ros2_pkg_name, os.path.splitext(os.path.basename(action_file))[0])
+            for action_file in action_files
+        ],
+        config["bt_plugin_file_name_exclude_words"],
+        config.get("name_exclude_word_boundary", False),
+    )
+    duplicated_indices = set()
+    for bt_plugin_file_name, indices in collisions.items():
+        for i in indices[1:]:
+            duplicated_indices.add(i)
+            errors.append(
+                f"[{ros2_pkg_name}] {action_files[i]}: "
+                f'bt plugin file name "{bt_plugin_file_name}" '
+                f"is already generated by {action_files[indices[0]]}"
+            )
+
+    for i, action_file in enumerate(action_files):
+        if i in duplicated_indices:
+            continue
+        try:
+            action_path = os.path.join(pkg_directory, action_file)
+            if build_context is not None:
+                entry = build_context["entries"].get(action_path)
+
+                # 入力が変わっていなければ解析しない
+                source_digest, source_stat = build_manifest.source_digest(action_path, entry)
+                input_digest = build_manifest.input_digest(
+                    source_digest, build_context["config_digest"], ros2_pkg_name
+                )
+                output_path = os.path.expanduser(
+                    os.path.join(config["bt_plugin_save_path"], bt_plugin_file_names[i])
+                )
+                if build_manifest.is_up_to_date(entry, input_digest, output_path):
+                    up_to_date_entries[action_path] = {
+                        **entry,
+                        "source_mtime_ns": source_stat.st_mtime_ns,
+                        "source_size": source_stat.st_size,
+                    }
+                    profiler.count("actions_up_to_date")
+                    continue
+
+            action = analyze_action_file(
+                pkg_directory, action_file, ros2_pkg_name, config, msg_type_index
+            )
+            if build_context is not None:
+                build_entries[action_path] = {
+                    "action_path": action_path,
+                    "source_stat": source_stat,
+                    "source_digest": source_digest,
+                    "input_digest": input_digest,
+                    "output_path": output_path,
+                }
+        except Exception as e:
+            errors.append(f"[{ros2_pkg_name}] {action_file}: {type(e).__name__}: {e}")
+            continue
+        actions.append(action)
+        profiler.count("actions_analyzed")
+
+    return {
+        "ros2_pkg_path": ros2_pkg_path,
+        "ros2_pkg_name": ros2_pkg_name,
+        "actions": actions,
+        "build_entries": build_entries,
+        "up_to_date_entries": up_to_date_entries,
+        "errors": errors,
+        "profile": profiler.diff(profile_before, profiler.snapshot()),
+    }
+
+
+def analyze_action_file(
+    pkg_directory: str,
+    action_file: str,
+    ros2_pkg_name: str,
+    config: dict[str, Any],
+    msg_type_index: dict[str, Any] | None = None,
+) -> ActionSpec:
+    """.action ファイルを1つ解析し, bt plugin の名前を付与する
+
+    Args:
+        pkg_directory (str): ros2 pkg のディレクトリ
+        action_file (str): .action ファイルの pkg のディレクトリからの相対パス
+        ros2_pkg_name (str): ros2 pkg 名
+        config (dict[str, Any]): 設定ファイルの内容
+        msg_type_index (dict[str, Any] | None, optional): build_msg_type_index の索引. デフォルト値はNone.
+
+    Returns:
+        ActionSpec: ros2_action_analyzer.analize_action の結果に
+            bt_plugin_file_name と bt_action_name を設定したもの
+    """
+    action = ros2_action_analyzer.analize_action(pkg_directory, action_file, msg_type_index)
+    return dataclasses.replace(
+        action,
+        ros2_pkg_name=ros2_pkg_name,
+        bt_plugin_file_name=name_generator.generate_bt_plugin_file_name(
+            ros2_pkg_name,
+            action.ros2_action_name,
+            config["bt_plugin_file_name_exclude_words"],
+            config.get("name_exclude_word_boundary", False),
+        ),
+        bt_action_name=name_generator.generate_bt_action_name(
+            ros2_pkg_name,
+            action.ros2_action_name,
+            config["bt_action_name_exclude_words"],
+            config.get("name_exclude_word_boundary", False),
+        ),
+    )
+
+
+def render_ros2_pkg(analyzed_pkg: dict[str, Any], config: dict[str, Any]) -> dict[str, Any]:
+    """解析済みの ros2 pkg から bt plugin を生成する
+
+    Args:
+        analyzed_pkg (dict[str, Any]): analyze_ros2_pkg の結果
+        config (dict[str, Any]): 設定ファイルの内容
+
+    Returns:
+        dict[str, Any]: 生成結果
+            {"errors": [str],
+             "plugins_info": {plugin_file_path: PluginSpec},
+             "staged_files": file_writer.take_staged で取り出した書き込み,
+             "write_counts": {"changed": int, "unchanged": int},
+             "profile": profiler の計測結果の差分}
+    """
+    write_counts_before = file_writer.get_write_counts()
+    profile_before = profiler.snapshot()
+    errors = []
+    plugins_info = {}
+    try:
+        bt_action_cpp_generator.bt_action_cpp_generator(
+            config["bt_plugin_save_path"],
+            config["bt_plugin_cpp_template"],
+            config["bt_plugin_cpp_include_guard_prefix"],
+            analyzed_pkg["actions"],
+            analyzed_pkg["ros2_pkg_name"],
+            config["bt_action_default_arguments"],
+            config["bt_action_ignore_arguments"],
+            config.get("bt_action_argument_rules", {}),
+            config.get("bt_plugin_render_threads", DEFAULT_RENDER_THREADS),
+        )
+        for action in analyzed_pkg["actions"]:
+            plugin_file_path = os.path.expanduser(
+                os.path.join(config["bt_plugin_save_path"], action.bt_plugin_file_name)
+            )
+            plugins_info[plugin_file_path] = bt_action_cpp_generator.get_plugin_info(
+                action,
+                analyzed_pkg["ros2_pkg_name"],
+                config["ros2_node_name_suffix"],
+                config["ros2_node_name_exclude_words"],
+                config["bt_action_default_arguments"],
+                config["bt_action_ignore_arguments"],
+                config.get("bt_action_argument_rules", {}),
+                config.get("name_exclude_word_boundary", False),
+            )
+    except Exception as e:
+        errors.append(f'[{analyzed_pkg["ros2_pkg_name"]}] {type(e).__name__}: {e}')
+
+    write_counts = file_writer.get_write_counts()
+    return {
+        "errors": errors,
+        "plugins_info": plugins_info,
+        "staged_files": file_writer.take_staged(),
+        "write_counts": {
+            key: write_counts[key] - write_counts_before[key] for key in write_counts
+        },
+        "profile": profiler.diff(profile_before, profiler.snapshot()),
+    }
+
+
+# プロセスプールの各ワーカーで共有する状態. 索引を pkg ごとに送らないよう, ワーカーの初期化時に1回だけ渡す
+_worker_state = {"msg_type_index": None}
+
+
+def _init_worker(
+    msg_type_index: dict[str, Any] | None, max_open_files: int, staging: bool = False
+):
+    _worker_state["msg_type_index"] = msg_type_index
+    file_writer.set_max_open_files(max_open_files)
+    if staging:
+        file_writer.begin_staging()
+
+
+def _analyze_ros2_pkg_in_worker(
+    ros2_pkg_path: str, config: dict[str, Any], build_context: dict[str, Any]
+) -> dict[str, Any]:
+    return analyze_ros2_pkg(
+        ros2_pkg_path, config, build_context, _worker_state["msg_type_index"]
+    )
+
+
+class _SerialExecutor:
+    """jobs が 1 の場合にプロセスプールの代わりに使う同期実行器"""
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        return False
+
+    def map(self, fn, *iterables):
+        return map(fn, *iterables)
+
+
+def _create_executor(
+    jobs: int,
+    msg_type_index: dict[str, Any] | None = None,
+    max_open_files: int = file_writer.DEFAULT_MAX_OPEN_FILES,
+):
+    if jobs <= 1:
+        _init_worker(msg_type_index, max_open_files)
+        return _SerialExecutor()
+    # 書き込みを保持している場合は, ワーカーでも保持して親プロセスに渡す
+    return ProcessPoolExecutor(
+        max_workers=jobs,
+        initializer=_init_worker,
+        initargs=(msg_type_index, max_open_files, file_writer.is_staging()),
+    )
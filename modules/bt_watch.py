@@ -0,0 +1,407 @@
+import os, sys
+from typing import Any
+from modules import bt_plugin_pipeline
+from modules import ros2_action_analyzer
+from modules import bt_action_cpp_generator
+from modules import bt_node_generator
+from modules import file_watcher
+from modules import file_writer
+from modules.specs import PluginSpec
+
+
+def bt_watch(config: dict[str, Any], poll_interval: float = 1.0, debounce: float = 0.2):
+    """ファイルの変更を監視し, 影響のある生成物だけを再生成する
+
+    起動時に bt plugin, bt ソース, btproj をすべて生成し, 解析済みの action と
+    bt plugin の情報をメモリに保持する. 以降は変更されたファイルに応じて
+    必要な処理だけを実行する.
+
+    Args:
+        config (dict[str, Any]): 設定ファイルの内容
+        poll_interval (float, optional): inotify が使えない場合のポーリング間隔 [s]. デフォルト値は1.0.
+        debounce (float, optional): 連続するイベントをまとめる時間 [s]. デフォルト値は0.2.
+    """
+    file_writer.set_max_open_files(
+        config.get("max_open_files", file_writer.DEFAULT_MAX_OPEN_FILES)
+    )
+    state = create_watch_state(config)
+    rebuild_all(state)
+
+    watcher = file_watcher.create_watcher(poll_interval)
+    ignore_dir_names = ros2_action_analyzer.DEFAULT_IGNORE_DIR_NAMES.union(
+        config.get("ros2_action_search_ignore_dirs", [])
+    )
+    for ros2_pkg_path in state["ros2_pkg_names"]:
+        watcher.add_dir(ros2_pkg_path, recursive=True, ignore_dir_names=ignore_dir_names)
+    for watch_dir in sorted(
+        {
+            state["bt_plugin_dir"],
+            os.path.dirname(state["template_path"]),
+            os.path.dirname(state["ros2_source_path"]),
+            os.path.dirname(state["btproj_path"]),
+        }
+    ):
+        watcher.add_dir(watch_dir)
+    print(f"watching {len(state['ros2_pkg_names'])} ros2 pkgs (Ctrl+C to stop)")
+
+    try:
+        while True:
+            changes = watcher.read_changes(1.0)
+            if not changes and not watcher.overflowed:
+                continue
+            # 保存時に連続して発生するイベントをまとめる
+            while more_changes := watcher.read_changes(debounce):
+                changes |= more_changes
+
+            if watcher.overflowed:
+                watcher.overflowed = False
+                print("event queue overflowed, rebuilding everything", file=sys.stderr)
+                rebuild_all(state)
+                continue
+            handle_changes(state, changes)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+
+
+def create_watch_state(config: dict[str, Any]) -> dict[str, Any]:
+    """watch mode でメモリに保持する状態を作成する
+
+    Args:
+        config (dict[str, Any]): 設定ファイルの内容
+
+    Returns:
+        dict[str, Any]: 状態
+            {"config": dict,
+             "ros2_pkg_names": {ros2_pkg_path: ros2_pkg_name},
+             "msg_type_index": bt_plugin_pipeline.build_msg_type_index の索引,
+             "actions": {action_path: {"ros2_pkg_name": str, "action": ActionSpec}},
+             "plugins_info": {plugin_file_path: PluginSpec},
+             "named_actions_list_for_bt": [NamedAction],
+             "written": {path: (mtime_ns, size)}, ...}
+    """
+    ros2_pkg_paths = bt_plugin_pipeline.discover_ros2_pkg_paths(config)
+    return {
+        "config": config,
+        "ros2_pkg_names": {
+            os.path.abspath(os.path.expanduser(path)): bt_plugin_pipeline.get_ros2_pkg_name(path)
+            for path in ros2_pkg_paths
+        },
+        "bt_plugin_dir": os.path.abspath(os.path.expanduser(config["bt_plugin_save_path"])),
+        "template_path": os.path.abspath(os.path.expanduser(config["bt_plugin_cpp_template"])),
+        "ros2_source_path": os.path.abspath(os.path.expanduser(config["ros2_bt_source_abs_path"])),
+        "btproj_path": os.path.abspath(os.path.expanduser(config["btproj_abs_path"])),
+        "msg_type_index": bt_plugin_pipeline.build_msg_type_index(config, ros2_pkg_paths),
+        "actions": {},
+        "plugins_info": {},
+        "named_actions_list_for_bt": [],
+        "written": {},
+    }
+
+
+def rebuild_all(state: dict[str, Any]):
+    """すべての .action ファイルを解析し, bt plugin, bt ソース, btproj を生成する
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+    """
+    config = state["config"]
+    state["actions"] = {}
+    for ros2_pkg_path in state["ros2_pkg_names"]:
+        analyzed_pkg = bt_plugin_pipeline.analyze_ros2_pkg(
+            ros2_pkg_path, config, msg_type_index=state["msg_type_index"]
+        )
+        for error in analyzed_pkg["errors"]:
+            print(error, file=sys.stderr)
+        for action in analyzed_pkg["actions"]:
+            state["actions"][action.action_path] = {
+                "ros2_pkg_name": analyzed_pkg["ros2_pkg_name"],
+                "action": action,
+            }
+
+    rendered_plugins = render_actions(state, list(state["actions"]))
+
+    state["plugins_info"] = {}
+    refresh_plugins_info(
+        state,
+        set(bt_node_generator.list_plugin_files(state["bt_plugin_dir"])) | set(rendered_plugins),
+        rendered_plugins,
+    )
+    update_bt_source(state, register_actions=True, reload_named_actions=True)
+    update_btproj(state)
+    remember_written(state, set(rendered_plugins))
+
+
+def handle_changes(state: dict[str, Any], changed_paths: set[str]):
+    """変更されたファイルに応じて必要な処理だけを実行する
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+        changed_paths (set[str]): 変更されたファイルのパス
+    """
+    changed_paths = {
+        os.path.abspath(path) for path in changed_paths if not is_self_written(state, path)
+    }
+    if not changed_paths:
+        return
+
+    try:
+        # テンプレートが変わった場合は解析済みの action からすべて再生成する
+        if state["template_path"] in changed_paths:
+            rendered_plugins = render_actions(state, list(state["actions"]))
+        else:
+            rendered_plugins = {}
+
+        # 変更された .action ファイルだけを再解析, 再生成する
+        changed_action_paths = []
+        for path in sorted(changed_paths):
+            if not path.endswith(".action"):
+                continue
+            ros2_pkg_path = find_ros2_pkg_path(state, path)
+            if ros2_pkg_path is None or not ros2_action_analyzer.is_action_rel_path_included(
+                ros2_pkg_path,
+                os.path.relpath(path, ros2_pkg_path),
+                state["config"].get("ros2_action_search_ignore_dirs", []),
+                state["config"].get("ros2_action_search_action_dir_only", False),
+            ):
+                continue
+            if not os.path.exists(path):
+                removed = state["actions"].pop(path, None)
+                if removed is not None:
+                    print(
+                        f'stale bt plugin: {removed["action"].bt_plugin_file_name} '
+                        f"(source {path} was removed)",
+                        file=sys.stderr,
+                    )
+                continue
+            ros2_pkg_name = state["ros2_pkg_names"][ros2_pkg_path]
+            try:
+                action = bt_plugin_pipeline.analyze_action_file(
+                    ros2_pkg_path,
+                    os.path.relpath(path, ros2_pkg_path),
+                    ros2_pkg_name,
+                    state["config"],
+                    state["msg_type_index"],
+                )
+            except Exception as e:
+                print(f"[{ros2_pkg_name}] {path}: {type(e).__name__}: {e}", file=sys.stderr)
+                continue
+            state["actions"][path] = {"ros2_pkg_name": ros2_pkg_name, "action": action}
+            changed_action_paths.append(path)
+        rendered_plugins.update(render_actions(state, changed_action_paths))
+        rendered_paths = set(rendered_plugins)
+
+        # 再生成した, または手で編集された bt plugin の情報だけを再取得する
+        changed_plugin_paths = rendered_paths | {
+            path
+            for path in changed_paths
+            if os.path.dirname(path) == state["bt_plugin_dir"]
+            and bt_node_generator.is_plugin_file(os.path.basename(path))
+        }
+        plugins_changed, classes_added = refresh_plugins_info(
+            state, changed_plugin_paths, rendered_plugins
+        )
+
+        bt_source_changed = state["ros2_source_path"] in changed_paths
+        if classes_added or bt_source_changed:
+            update_bt_source(
+                state, register_actions=True, reload_named_actions=bt_source_changed
+            )
+        if plugins_changed or bt_source_changed or state["btproj_path"] in changed_paths:
+            update_btproj(state)
+
+        remember_written(state, rendered_paths)
+        print(f"regenerated {len(rendered_paths)} bt plugins")
+    except Exception as e:
+        print(f"{type(e).__name__}: {e}", file=sys.stderr)
+
+
+def find_ros2_pkg_path(state: dict[str, Any], path: str) -> str | None:
+    """ファイルを含む ros2 pkg のディレクトリを取得する
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+        path (str): ファイルのパス
+
+    Returns:
+        str | None: ros2 pkg のディレクトリ. 監視中の pkg に含まれない場合は None
+    """
+    candidates = [
+        ros2_pkg_path
+        for ros2_pkg_path in state["ros2_pkg_names"]
+        if path.startswith(ros2_pkg_path.rstrip(os.sep) + os.sep)
+    ]
+    if not candidates:
+        return None
+    return max(candidates, key=len)
+
+
+def render_actions(state: dict[str, Any], action_paths: list[str]) -> dict[str, PluginSpec]:
+    """解析済みの action から bt plugin を生成する
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+        action_paths (list[str]): 生成する .action ファイルのパス
+
+    Returns:
+        dict[str, PluginSpec]: {生成した bt plugin のパス: 生成した bt plugin の情報}.
+            -p と -b を同時に実行した場合と同じく, 生成したヘッダーを読み直さずに使う
+    """
+    config = state["config"]
+    rendered_plugins = {}
+    for action_path in action_paths:
+        entry = state["actions"][action_path]
+        action = entry["action"]
+        try:
+            bt_action_cpp_generator.bt_action_cpp_generator(
+                config["bt_plugin_save_path"],
+                config["bt_plugin_cpp_template"],
+                config["bt_plugin_cpp_include_guard_prefix"],
+                [action],
+                entry["ros2_pkg_name"],
+                config["bt_action_default_arguments"],
+                config["bt_action_ignore_arguments"],
+                config.get("bt_action_argument_rules", {}),
+            )
+        except Exception as e:
+            print(f'[{entry["ros2_pkg_name"]}] {action_path}: {type(e).__name__}: {e}', file=sys.stderr)
+            continue
+        plugin_path = os.path.join(state["bt_plugin_dir"], action.bt_plugin_file_name)
+        rendered_plugins[plugin_path] = bt_action_cpp_generator.get_plugin_info(
+            action,
+            entry["ros2_pkg_name"],
+            config["ros2_node_name_suffix"],
+            config["ros2_node_name_exclude_words"],
+            config["bt_action_default_arguments"],
+            config["bt_action_ignore_arguments"],
+            config.get("bt_action_argument_rules", {}),
+            config.get("name_exclude_word_boundary", False),
+        )
+    return rendered_plugins
+
+
+def refresh_plugins_info(
+    state: dict[str, Any],
+    plugin_paths: set[str],
+    rendered_plugins: dict[str, PluginSpec] = {},
+) -> tuple[bool, bool]:
+    """bt plugin の情報を再取得する
+
+    生成した bt plugin は render_actions の情報を使い, それ以外 (手書き, 手で編集したもの) だけを解析する.
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+        plugin_paths (set[str]): 再取得する bt plugin のパス
+        rendered_plugins (dict[str, PluginSpec], optional): render_actions の結果. デフォルト値は{}.
+
+    Returns:
+        tuple[bool, bool]: bt plugin の情報が変わったかどうか, bt plugin のクラスが増えたかどうか
+    """
+    config = state["config"]
+    plugins_info = state["plugins_info"]
+    class_names = {info.action_class_name for info in plugins_info.values()}
+
+    plugins_changed = False
+    for plugin_path in sorted(plugin_paths):
+        if plugin_path in rendered_plugins:
+            plugin_info = rendered_plugins[plugin_path]
+        elif os.path.exists(plugin_path):
+            try:
+                plugin_info = bt_node_generator.get_plugin_from_cpp(
+                    plugin_path,
+                    config["ros2_node_name_suffix"],
+                    config["ros2_node_name_exclude_words"],
+                    config.get("name_exclude_word_boundary", False),
+                )
+            except Exception as e:
+                print(f"{plugin_path}: {type(e).__name__}: {e}", file=sys.stderr)
+                plugin_info = None
+        else:
+            plugin_info = None
+
+        if plugin_info is None:
+            plugins_changed |= plugins_info.pop(plugin_path, None) is not None
+        elif plugins_info.get(plugin_path) != plugin_info:
+            plugins_info[plugin_path] = plugin_info
+            plugins_changed = True
+
+    classes_added = bool(
+        {info.action_class_name for info in plugins_info.values()} - class_names
+    )
+    return plugins_changed, classes_added
+
+
+def update_bt_source(state: dict[str, Any], register_actions: bool, reload_named_actions: bool):
+    """bt ソースを編集する
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+        register_actions (bool): action の登録領域を編集するかどうか
+        reload_named_actions (bool): named action の一覧を再解析するかどうか
+    """
+    ros2_source_path = state["ros2_source_path"]
+    if register_actions and reload_named_actions:
+        # 両方の編集領域を編集する場合は bt ソースを1回だけ読み書きする
+        state["named_actions_list_for_bt"] = bt_node_generator.edit_bt_source(
+            ros2_source_path, list(state["plugins_info"].values())
+        )
+    elif register_actions:
+        bt_node_generator.edit_bt_source_action_area(
+            ros2_source_path, list(state["plugins_info"].values())
+        )
+    elif reload_named_actions:
+        named_actions_info = bt_node_generator.analyze_named_actions(ros2_source_path)
+        state["named_actions_list_for_bt"] = bt_node_generator.edit_bt_source_named_action_area(
+            ros2_source_path, named_actions_info
+        )
+    remember_written(state, {ros2_source_path})
+
+
+def update_btproj(state: dict[str, Any]):
+    """btproj の TreeNodesModel を編集する
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+    """
+    plugins_info = list(state["plugins_info"].values())
+    node_model_info = bt_node_generator.merge_named_actions_info_plugins_info(
+        state["named_actions_list_for_bt"], plugins_info
+    )
+    bt_node_generator.edit_bt_tree_models_action(state["btproj_path"], node_model_info)
+    remember_written(state, {state["btproj_path"]})
+
+
+def remember_written(state: dict[str, Any], paths: set[str]):
+    """自身が書き込んだファイルの stat を記録し, その書き込みによるイベントを無視できるようにする
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+        paths (set[str]): 書き込んだファイルのパス
+    """
+    for path in paths:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        state["written"][path] = (stat.st_mtime_ns, stat.st_size)
+
+
+def is_self_written(state: dict[str, Any], path: str) -> bool:
+    """イベントが自身の書き込みによるものかどうかを判定する
+
+    Args:
+        state (dict[str, Any]): watch mode の状態
+        path (str): イベントが発生したファイルのパス
+
+    Returns:
+        bool: 最後に自身が書き込んだ後に変更されていない場合 True
+    """
+    written = state["written"].get(os.path.abspath(path))
+    if written is None:
+        return False
+    try:
+        stat = os.stat(path)
+    except OSError:
+        return False
+    return written == (stat.st_mtime_ns, stat.st_size)
@@ -0,0 +1,252 @@
+import os, json, hashlib
+from typing import Any
+
+from modules import plugin_cache
+from modules.specs import PluginSpec
+
+MANIFEST_VERSION = 2
+MANIFEST_FILE_NAME = ".bt_plugin_manifest.json"
+
+# 生成結果に影響する設定ファイルのキー. ros2 node 名の設定は manifest に記録する bt plugin の情報に影響する
+CONFIG_DIGEST_KEYS = [
+    "bt_plugin_cpp_include_guard_prefix",
+    "bt_plugin_file_name_exclude_words",
+    "bt_action_name_exclude_words",
+    "name_exclude_word_boundary",
+    "bt_action_default_arguments",
+    "bt_action_ignore_arguments",
+    "bt_action_argument_rules",
+    "ros2_node_name_suffix",
+    "ros2_node_name_exclude_words",
+]
+
+
+def get_manifest_path(bt_plugin_save_path: str) -> str:
+    """manifest ファイルのパスを取得する
+
+    Args:
+        bt_plugin_save_path (str): bt plugin の保存先のディレクトリ
+
+    Returns:
+        str: manifest ファイルのパス
+    """
+    return os.path.join(os.path.expanduser(bt_plugin_save_path), MANIFEST_FILE_NAME)
+
+
+def load_manifest(manifest_path: str) -> dict[str, Any]:
+    """manifest を読み込む. 存在しない, または形式が異なる場合は空の manifest を返す
+
+    Args:
+        manifest_path (str): manifest ファイルのパス
+
+    Returns:
+        dict[str, Any]: manifest
+            {"version": int,
+             "plugin_settings_digest": str,
+             "entries": {action_path: {"ros2_pkg_path": str,
+                                       "source_mtime_ns": int,
+                                       "source_size": int,
+                                       "source_digest": str,
+                                       "input_digest": str,
+                                       "output_path": str,
+                                       "output_mtime_ns": int,
+                                       "output_size": int,
+                                       "plugin": dict | None}}}
+            plugin は plugin_cache.plugin_to_dict の形式の bt plugin の情報,
+            plugin_settings_digest は plugin_cache.settings_digest で取得した生成時の ros2 node 名の設定の sha256
+    """
+    try:
+        with open(manifest_path, "r") as f:
+            manifest = json.load(f)
+    except (OSError, ValueError):
+        return {"version": MANIFEST_VERSION, "entries": {}}
+
+    if manifest.get("version") != MANIFEST_VERSION:
+        return {"version": MANIFEST_VERSION, "entries": {}}
+    return manifest
+
+
+def save_manifest(manifest_path: str, manifest: dict[str, Any]):
+    """manifest を保存する. 書き込み途中で中断しても壊れないよう一時ファイルを経由する
+
+    Args:
+        manifest_path (str): manifest ファイルのパス
+        manifest (dict[str, Any]): manifest
+    """
+    tmp_path = manifest_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(manifest, f, indent=1, sort_keys=True)
+    os.replace(tmp_path, manifest_path)
+
+
+def file_digest(path: str) -> str:
+    """ファイルの内容の sha256 を取得する
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        str: sha256 の16進数表記
+    """
+    with open(path, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()
+
+
+def config_digest(config: dict[str, Any], msg_type_index: dict[str, Any] | None = None) -> str:
+    """テンプレートと生成結果に影響する設定の sha256 を取得する
+
+    Args:
+        config (dict[str, Any]): 設定ファイルの内容
+        msg_type_index (dict[str, Any] | None, optional): msg 型の解決に使う索引. 含まれる型名も sha256 に含める. デフォルト値はNone.
+
+    Returns:
+        str: sha256 の16進数表記
+    """
+    digest_source = {key: config.get(key) for key in CONFIG_DIGEST_KEYS}
+    digest_source["bt_plugin_cpp_template"] = file_digest(
+        os.path.expanduser(config["bt_plugin_cpp_template"])
+    )
+    if msg_type_index is not None:
+        digest_source["msg_types"] = {
+            pkg_name: sorted(msg_types)
+            for pkg_name, msg_types in msg_type_index["packages"].items()
+        }
+    return hashlib.sha256(
+        json.dumps(digest_source, sort_keys=True).encode()
+    ).hexdigest()
+
+
+def source_digest(action_path: str, entry: dict[str, Any] | None) -> tuple[str, os.stat_result]:
+    """.action ファイルの sha256 を取得する
+
+    mtime とサイズが manifest と一致する場合はファイルを読まずに manifest の値を使う
+
+    Args:
+        action_path (str): .action ファイルのパス
+        entry (dict[str, Any] | None): 前回の manifest のエントリ
+
+    Returns:
+        tuple[str, os.stat_result]: sha256 の16進数表記と .action ファイルの stat
+    """
+    stat = os.stat(action_path)
+    if (
+        entry is not None
+        and entry["source_mtime_ns"] == stat.st_mtime_ns
+        and entry["source_size"] == stat.st_size
+    ):
+        return entry["source_digest"], stat
+    return file_digest(action_path), stat
+
+
+def input_digest(source_digest: str, config_digest: str, ros2_pkg_name: str) -> str:
+    """生成結果を決定する入力全体の sha256 を取得する
+
+    Args:
+        source_digest (str): .action ファイルの sha256
+        config_digest (str): テンプレートと設定の sha256
+        ros2_pkg_name (str): ros2 pkg 名
+
+    Returns:
+        str: sha256 の16進数表記
+    """
+    return hashlib.sha256(
+        f"{source_digest}\0{config_digest}\0{ros2_pkg_name}".encode()
+    ).hexdigest()
+
+
+def is_up_to_date(entry: dict[str, Any] | None, input_digest: str, output_path: str) -> bool:
+    """前回の生成結果がそのまま使えるかどうかを判定する
+
+    入力の sha256 が一致し, 生成したファイルが前回の書き込み後に変更されていない場合に True
+
+    Args:
+        entry (dict[str, Any] | None): 前回の manifest のエントリ
+        input_digest (str): 今回の入力の sha256
+        output_path (str): 生成先のファイルのパス
+
+    Returns:
+        bool: 再生成が不要な場合 True
+    """
+    if entry is None:
+        return False
+    if entry["input_digest"] != input_digest or entry["output_path"] != output_path:
+        return False
+    try:
+        stat = os.stat(output_path)
+    except OSError:
+        return False
+    return (
+        entry["output_mtime_ns"] == stat.st_mtime_ns
+        and entry["output_size"] == stat.st_size
+    )
+
+
+def make_entry(
+    ros2_pkg_path: str,
+    source_stat: os.stat_result,
+    source_digest: str,
+    input_digest: str,
+    output_path: str,
+    plugin_info: PluginSpec | None = None,
+) -> dict[str, Any]:
+    """manifest のエントリを作成する. 生成先のファイルの stat は生成後に取得する
+
+    Args:
+        ros2_pkg_path (str): ros2 pkg のディレクトリ
+        source_stat (os.stat_result): .action ファイルの stat
+        source_digest (str): .action ファイルの sha256
+        input_digest (str): 入力全体の sha256
+        output_path (str): 生成先のファイルのパス
+        plugin_info (PluginSpec | None, optional): 生成した bt plugin の情報. デフォルト値はNone.
+
+    Returns:
+        dict[str, Any]: manifest のエントリ
+    """
+    output_stat = os.stat(output_path)
+    return {
+        "ros2_pkg_path": ros2_pkg_path,
+        "source_mtime_ns": source_stat.st_mtime_ns,
+        "source_size": source_stat.st_size,
+        "source_digest": source_digest,
+        "input_digest": input_digest,
+        "output_path": output_path,
+        "output_mtime_ns": output_stat.st_mtime_ns,
+        "output_size": output_stat.st_size,
+        "plugin": plugin_cache.plugin_to_dict(plugin_info),
+    }
+
+
+def get_generated_plugins(
+    manifest: dict[str, Any], plugin_settings_digest: str
+) -> dict[str, dict[str, Any]]:
+    """manifest から生成した bt plugin の情報を生成先のパスごとに取得する
+
+    生成時と ros2 node 名の設定が異なる場合は bt plugin の情報が使えないため空を返す.
+
+    Args:
+        manifest (dict[str, Any]): load_manifest で読み込んだ manifest
+        plugin_settings_digest (str): plugin_cache.settings_digest で取得した今回の設定の sha256
+
+    Returns:
+        dict[str, dict[str, Any]]: {output_path: manifest のエントリ}. bt plugin の情報があるエントリのみ
+    """
+    if manifest.get("plugin_settings_digest") != plugin_settings_digest:
+        return {}
+    return {
+        os.path.abspath(entry["output_path"]): entry
+        for entry in manifest["entries"].values()
+        if entry.get("plugin") is not None
+    }
+
+
+def is_generated_plugin_unchanged(entry: dict[str, Any], stat: os.stat_result) -> bool:
+    """生成した bt plugin のファイルが manifest の記録後に変更されていないかどうか
+
+    Args:
+        entry (dict[str, Any]): manifest のエントリ
+        stat (os.stat_result): 生成先のファイルの stat
+
+    Returns:
+        bool: 変更されていない場合 True
+    """
+    return entry["output_mtime_ns"] == stat.st_mtime_ns and entry["output_size"] == stat.st_size
@@ -1,9 +1,19 @@
-import re
+import re, functools
 
+INVALID_CHARACTER_PATTERN = re.compile(r'[^a-zA-Z0-9-_]')
+UPPER_CASE_BOUNDARY_PATTERN = re.compile(r'(?<!^)(?=[A-Z])')
+NON_ALPHANUMERIC_PATTERN = re.compile(r'[^a-zA-Z0-9 ]')
 
+# case_formatter の結果をキャッシュする件数の上限
+CACHE_SIZE = 65536
+
+
+@functools.lru_cache(maxsize=CACHE_SIZE)
 def case_formatter(input_string: str, case_type: str) -> str:
     """文字列のcaseを整える
 
+    結果は (input_string, case_type) ごとにキャッシュする
+
     Args:
         input_string (str): 整える文字列
         case_type (str): 整えるcaseの種類
@@ -20,16 +30,16 @@ def case_formatter(input_string: str, case_type: str) -> str:
         str: _description_
     """
 
-    if bool(re.search(r'[^a-zA-Z0-9-_]', input_string)):
+    if bool(INVALID_CHARACTER_PATTERN.search(input_string)):
         raise ValueError(
             '[case_formatter] Invalid input_string: \"' + input_string +
             '\" The string must not contain anything other than alphanumeric characters, -, and _.'
         )
 
     # 大文字の前に空白を挿入（先頭以外の場合）
-    s = re.sub(r'(?<!^)(?=[A-Z])', ' ', input_string)
+    s = UPPER_CASE_BOUNDARY_PATTERN.sub(' ', input_string)
     # 非アルファベット文字を空白に置き換え
-    s = re.sub(r'[^a-zA-Z0-9 ]', ' ', s)
+    s = NON_ALPHANUMERIC_PATTERN.sub(' ', s)
     # 単語を分割し、各単語の最初の文字を大文字に変換
     string_word_list = s.lower().split()
     if case_type == 'lower_snake_case':
@@ -56,6 +66,23 @@ def case_formatter(input_string: str, case_type: str) -> str:
     return output_string
 
 
+def case_formatter_batch(input_strings: list[str], case_type: str) -> list[str]:
+    """複数の文字列のcaseをまとめて整える. 同じ文字列は1回だけ変換する
+
+    Args:
+        input_strings (list[str]): 整える文字列のリスト
+        case_type (str): 整えるcaseの種類. case_formatter と同じ
+
+    Raises:
+        ValueError
+
+    Returns:
+        list[str]: input_strings と同じ順の変換結果
+    """
+    converted = {s: case_formatter(s, case_type) for s in dict.fromkeys(input_strings)}
+    return [converted[s] for s in input_strings]
+
+
 if __name__ == '__main__':
     input = 'case-is-Not-onnnaji_denai_-yabame1Dana'
     output = case_formatter(input, 'UPPER_SNAKE_CASE')
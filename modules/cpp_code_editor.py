@@ -1,85 +1,67 @@
 import re
 
+from modules import cpp_lexer
+from modules import source_edit
+from modules.source_edit import Edit
+
+# 各編集は cpp_lexer.build_region_index で作成した索引から範囲を引き, 元のコードに対する置換 (Edit) を返す.
+# 同じコードに対する複数の編集は, 索引を1回だけ作成し source_edit.EditBatch でまとめて適用する.
+
+
 def modify_block_after_keyword(code, keyword, new_content):
-    # 1. 指定された文字列の位置を探す
-    keyword_index = code.find(keyword)
-
-    if keyword_index == -1:
-        # キーワードが見つからなければ何も変更せずに返す
-        return code
-
-    # 2. キーワードの後にある最初の '{' を探す
-    start_brace_index = code.find("{", keyword_index)
-
-    if start_brace_index == -1:
-        # '{' が見つからなければ何も変更せずに返す
-        return code
-
-    # 3. '{' と '}' のバランスを取る
-    open_braces = 1
-    current_index = start_brace_index + 1
-
-    while open_braces > 0 and current_index < len(code):
-        if code[current_index] == "{":
-            open_braces += 1
-        elif code[current_index] == "}":
-            open_braces -= 1
-        current_index += 1
-
-    # 4. 対応する '}' が見つかった場合、{}の中身を削除し、新しい内容を追加
-    if open_braces == 0:
-        # current_index は '}' の次の位置を指しているので、中身を削除して新しい内容を追加
-        new_code = (
-            code[: start_brace_index + 1]  # '{' まで保持
-            + new_content  # 新しい内容を追加
-            + code[current_index - 1 :]
-        )  # '}' 以降を保持
-        return new_code
-    else:
-        # 対応する '}' が見つからない場合は何も変更せずに返す
-        return code
+    index = cpp_lexer.build_region_index(code)
+    return source_edit.apply_edits(code, [block_after_keyword_edit(index, keyword, new_content)])
+
+
+def block_after_keyword_edit(index, keyword, new_content):
+    # 1. 指定された識別子の後にある最初の {} ブロックを索引から取得
+    block = index.block_after.get(keyword)
+
+    if block is None:
+        # キーワードまたは対応する '}' が見つからなければ何も変更しない
+        return None
+
+    # 2. {} の中身を新しい内容に置換
+    return Edit(block.open + 1, block.close, new_content)
 
 
 def modify_initializer_list(
     code: str, constructor_name: str, new_initialization: list[str]
 ):
-    # 1. コンストラクタの正規表現パターンを作成（イニシャライザリストの先頭 ':' を探す）
-    pattern = rf"{constructor_name}\s*\([^)]*\)\s*:\s*([^{{]*)"
-
-    # 2. イニシャライザリストのマッチを取得
-    match = re.search(pattern, code)
+    index = cpp_lexer.build_region_index(code)
+    return source_edit.apply_edits(
+        code, [initializer_list_edit(index, constructor_name, new_initialization)]
+    )
 
-    if not match:
-        # コンストラクタまたはイニシャライザリストが見つからなければ、そのまま返す
-        return code
 
-    # 3. イニシャライザリストの内容を取得
-    initializer_list = match.group(1)
+def initializer_list_edit(index, constructor_name, new_initialization):
+    # 1. イニシャライザリストを持つ最初のコンストラクタを索引から取得
+    class_region = index.classes.get(constructor_name)
+    constructors = class_region.constructors if class_region else ()
+    span = next(
+        (c.initializer_list for c in constructors if c.initializer_list is not None), None
+    )
 
-    # 4. カンマ区切りの初期化リストを分割
-    initializers = [item.strip() for item in split_ignoring_brackets(initializer_list)]
-
-    if len(initializers) <= 1:
-        # 初期化が1つしかない場合は何も変更しない
-        return code
+    if span is None:
+        # コンストラクタまたはイニシャライザリストが見つからなければ何も変更しない
+        return None
 
-    # 5. 2番目以降の初期化を削除し、1番目だけを保持
-    modified_initializers = initializers[:1]
+    # 2. イニシャライザリストの内容を取得
+    start, end = span
+    initializer_list = index.code[start:end]
 
-    # 6. 新しい初期化を追加
-    modified_initializers += new_initialization
+    # 3. カンマ区切りの初期化リストを分割
+    initializers = [item.strip() for item in split_ignoring_brackets(initializer_list)]
 
-    # 7. 修正したイニシャライザリストを再構築
-    modified_initializer_list = ", ".join(modified_initializers)
+    if len(initializers) <= 1 and not new_initialization:
+        # 初期化が1つしかなく, 追加する初期化もない場合は何も変更しない
+        return None
 
-    # 8. 修正後のコードを生成
-    new_code = (
-        code[: match.start(1)]  # イニシャライザリストの前の部分
-        + modified_initializer_list  # 修正後のイニシャライザリスト
-        + code[match.end(1) :]
-    )  # イニシャライザリストの後の部分
+    # 4. 2番目以降の初期化を削除し、1番目だけを保持して新しい初期化を追加
+    modified_initializers = initializers[:1] + list(new_initialization)
 
-    return new_code
+    # 5. 修正したイニシャライザリストで置換
+    return Edit(start, end, ", ".join(modified_initializers))
 
 
 def split_ignoring_brackets(s):
@@ -118,87 +100,100 @@ def split_ignoring_brackets(s):
 
     return result
 
-def modify_function_arguments(code, function_name, new_arguments):
-    # 関数の引数リストをキャプチャする正規表現
-    # function_name(<引数リスト>) の形式を探す
-    pattern = rf"({function_name}\s*\([^)]*\))"
-
-    # 関数定義部分を検索
-    match = re.search(pattern, code)
-    if match:
-        # 引数リスト全体を取得
-        full_match = match.group(1)
 
-        # 引数リストの部分のみを取り出す
-        # 最初の(と最後の)の間の部分
-        arg_list_start = full_match.index("(") + 1
-        arg_list_end = full_match.index(")")
-        argument_list = full_match[arg_list_start:arg_list_end].strip()
+def modify_function_arguments(code, function_name, new_arguments):
+    index = cpp_lexer.build_region_index(code)
+    return source_edit.apply_edits(
+        code, [function_arguments_edit(index, function_name, new_arguments)]
+    )
+
+
+def function_arguments_edit(index, function_name, new_arguments):
+    # 1. function_name(<引数リスト>) の形式の最初の位置を索引から取得
+    parentheses = index.parentheses_after.get(function_name)
+    if parentheses is None:
+        return None  # 見つからなければ何も変更しない
+
+    # 2. 前後の空白を除いた引数リストの範囲を取得
+    start, end = parentheses.open + 1, parentheses.close
+    argument_list = index.code[start:end]
+    if argument_list.strip():
+        start += len(argument_list) - len(argument_list.lstrip())
+        end -= len(argument_list) - len(argument_list.rstrip())
+    else:
+        end = start
 
-        # 引数をカンマで分割する
-        arguments = [arg.strip() for arg in argument_list.split(",")]
+    # 3. 引数をカンマで分割し、最初の3つの引数を残して新しい引数を追加
+    arguments = split_ignoring_brackets(index.code[start:end])[:3]
+    arguments.extend(new_arguments)
 
-        # 最初の3つの引数を残し、それ以降を削除
-        if len(arguments) > 3:
-            arguments = arguments[:3]
+    # 4. 新しい引数リストで置換
+    return Edit(start, end, ", ".join(arguments))
 
-        # 新しい引数を追加
-        arguments.extend(new_arguments)
 
-        # 新しい引数リストを作成
-        modified_arg_list = ", ".join(arguments)
+def replace_private_members(code, class_name, members_to_remove, new_members):
+    index = cpp_lexer.build_region_index(code)
+    return source_edit.apply_edits(
+        code, private_members_edits(index, class_name, members_to_remove, new_members)
+    )
 
-        # 元のコードの引数部分を置換
-        modified_code = code.replace(argument_list, modified_arg_list)
 
-        return modified_code
-    else:
-        return code  # マッチしなければそのまま返す
+def private_members_edits(index, class_name, members_to_remove, new_members):
+    # 1. クラス定義を索引から取得
+    class_region = index.classes.get(class_name)
 
+    if class_region is None:
+        print(f"Class {class_name} not found.")
+        return []
 
-def replace_private_members(code, class_name, members_to_remove, new_members):
-    # クラス定義の開始を検出
-    class_pattern = rf"class\s+{class_name}"
-    class_match = re.search(class_pattern, code)
+    # 2. 最初の private セクションを取得
+    section = next(
+        (s for s in class_region.access_sections if s.access == "private"), None
+    )
 
-    if not class_match:
-        print(f"Class {class_name} not found.")
-        return code
-
-    # クラスの終わりまでを取得
-    class_start = class_match.start()
-    class_body = code[class_start:]
-
-    # privateセクションの検出
-    private_pattern = r"(private\s*:(\s*\n)?)((\s*.+?)*?)\s*(public|protected|}\s*;)"
-    private_match = re.search(private_pattern, class_body, re.DOTALL)
-
-    if private_match:
-        private_section = private_match.group(3)  # privateセクションの中身
-        modified_private_section = private_section
-
-        # ;で分割してメンバの定義のリストを作成
-        member_list = re.findall(r"([^;]*?;)", modified_private_section)
-        # メンバの定義のリストのうち削除するメンバのパターンと一致するものを削除
-        for member_pattern in members_to_remove:
-            for member in member_list:
-                if re.match(rf".*{member_pattern}.*", member, re.DOTALL):
-                    modified_private_section = modified_private_section.replace(
-                        member, ""
-                    )
-
-        # 新しいメンバリストをprivateセクションの先頭に追加
-        new_member_code = ""
-
-        for new_member in new_members:
-            if not new_member in modified_private_section:
-                new_member_code += new_member + "\n"
-
-        modified_private_section = new_member_code + modified_private_section
-
-        # 元のコードで private セクションを置換
-        modified_code = code.replace(private_section, modified_private_section)
-        return modified_code
-    else:
+    if section is None:
         print(f"No private section found in class {class_name}.")
-        return code
\ No newline at end of file
+        return []
+
+    # 3. "private:" の後の改行までと, 次のアクセス指定子の前の空白を除いた範囲を中身とする
+    start, end = _strip_section(index.code, section.start, section.end)
+
+    # 4. メンバの宣言のうち, 削除するメンバのパターンと一致するものを削除
+    remove_patterns = [
+        re.compile(member_pattern, re.DOTALL) for member_pattern in members_to_remove
+    ]
+    edits = []
+    remaining_members = []
+    position = start
+    for member_start, member_end in section.members:
+        # 最初の宣言は "private:" の後の改行の次から, 最後の宣言はセクションの中身の末尾までとする
+        member_start, member_end = max(member_start, start), min(member_end, end)
+        if member_start >= member_end:
+            continue
+        member = index.code[member_start:member_end]
+        remaining_members.append(index.code[position:member_start])
+        if any(pattern.search(member) for pattern in remove_patterns):
+            edits.append(Edit(member_start, member_end, ""))
+        else:
+            remaining_members.append(member)
+        position = member_end
+    remaining_members.append(index.code[position:end])
+    remaining = "".join(remaining_members)
+
+    # 5. 残ったメンバにない新しいメンバを private セクションの先頭に追加
+    new_member_code = "".join(
+        new_member + "\n" for new_member in new_members if not new_member in remaining
+    )
+    if new_member_code:
+        edits.insert(0, Edit(start, start, new_member_code))
+    return edits
+
+
+def _strip_section(code, start, end):
+    # 中身の先頭は ":" の後の空白のうち最後の改行の次, 末尾は最後の空白以外の文字の次
+    section = code[start:end]
+    leading = len(section) - len(section.lstrip())
+    newline = section.rfind("\n", 0, leading)
+    if newline != -1:
+        start += newline + 1
+    return start, max(start, end - (len(section) - len(section.rstrip())))
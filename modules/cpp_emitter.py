@@ -0,0 +1,135 @@
+from dataclasses import dataclass
+from typing import Iterator
+
+from modules.specs import FieldSpec
+
+# 生成する C++ のメソッドの中身の構成要素. 各要素は行を順に返し, MethodBody がまとめて1回だけ文字列にする.
+# 行の連結は join で行うため, メンバ変数の数に対して線形の時間で生成できる.
+
+INDENT = "  "
+
+
+@dataclass(frozen=True, slots=True)
+class PortList:
+    """providedBasicPorts に渡すポートのリスト"""
+
+    input_ports: tuple[FieldSpec, ...] = ()
+    output_ports: tuple[FieldSpec, ...] = ()
+
+    def render(self) -> str:
+        """ポートのリストを ", " 区切りの1行にする
+
+        Returns:
+            str: ポートのリスト
+        """
+        ports = [
+            f'BT::InputPort<{port.var_c_type}>("{port.bt_arg_name}")'
+            for port in self.input_ports
+        ]
+        ports += [
+            f'BT::OutputPort<{port.var_c_type}>("{port.bt_arg_name}")'
+            for port in self.output_ports
+        ]
+        return ", ".join(ports)
+
+
+@dataclass(frozen=True, slots=True)
+class LocalDeclarations:
+    """ポートの値を受け取るローカル変数の定義"""
+
+    fields: tuple[FieldSpec, ...] = ()
+
+    def lines(self) -> Iterator[str]:
+        for field in self.fields:
+            yield f"{field.var_c_type} {field.bt_arg_name};"
+
+
+@dataclass(frozen=True, slots=True)
+class OptionalDefaults:
+    """コンストラクタの default 引数があればそれを, なければポートの値を使う処理"""
+
+    fields: tuple[FieldSpec, ...] = ()
+
+    def lines(self) -> Iterator[str]:
+        for field in self.fields:
+            yield f"if ({field.bt_arg_name}_.has_value()) {{"
+            yield f"{INDENT}{field.bt_arg_name} = {field.bt_arg_name}_.value();"
+            yield "} else {"
+            yield f'{INDENT}getInput<{field.var_c_type}>("{field.bt_arg_name}", {field.bt_arg_name});'
+            yield "}"
+
+
+@dataclass(frozen=True, slots=True)
+class GetInputs:
+    """ポートの値をローカル変数に読み込む処理"""
+
+    fields: tuple[FieldSpec, ...] = ()
+
+    def lines(self) -> Iterator[str]:
+        for field in self.fields:
+            yield f'getInput<{field.var_c_type}>("{field.bt_arg_name}", {field.bt_arg_name});'
+
+
+@dataclass(frozen=True, slots=True)
+class Assignments:
+    """ローカル変数を ros2 action のメンバ変数に代入する処理"""
+
+    target: str
+    fields: tuple[FieldSpec, ...] = ()
+
+    def lines(self) -> Iterator[str]:
+        for field in self.fields:
+            yield f"{self.target}.{field.var_name} = {field.bt_arg_name};"
+
+
+@dataclass(frozen=True, slots=True)
+class SetOutputs:
+    """ros2 action の結果を出力ポートに設定する処理"""
+
+    source: str
+    fields: tuple[FieldSpec, ...] = ()
+
+    def lines(self) -> Iterator[str]:
+        for field in self.fields:
+            yield f'setOutput<{field.var_c_type}>("{field.bt_arg_name}", {self.source}->{field.var_name});'
+
+
+@dataclass(frozen=True, slots=True)
+class Statements:
+    """そのまま出力する文"""
+
+    statements: tuple[str, ...] = ()
+
+    def lines(self) -> Iterator[str]:
+        yield from self.statements
+
+
+@dataclass(frozen=True, slots=True)
+class MethodBody:
+    """メソッドの {} の中身
+
+    groups の各要素は構成要素のタプルで, グループの間には空行を入れる.
+    """
+
+    groups: tuple[tuple, ...]
+    # メソッドの {} の字下げ. 中身はさらに1段字下げする
+    indent: str = INDENT
+
+    def render(self) -> str:
+        """メソッドの {} の中身を作成する
+
+        Returns:
+            str: "{" の直後から "}" の直前までの文字列
+        """
+        line_indent = self.indent + INDENT
+        buffer = ["\n"]
+        for index, group in enumerate(self.groups):
+            if index > 0:
+                buffer.append("\n")
+            for node in group:
+                for line in node.lines():
+                    buffer.append(line_indent)
+                    buffer.append(line)
+                    buffer.append("\n")
+        buffer.append(self.indent)
+        return "".join(buffer)
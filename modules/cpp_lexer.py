@@ -0,0 +1,292 @@
+import re
+from dataclasses import dataclass, field
+
+# C++ のヘッダーを1回だけ走査してトークンに分割し, 編集に使う範囲の索引を作成する.
+# コメント, 文字列, 文字リテラル, プリプロセッサの行は読み飛ばすため, その中の括弧やキーワードには反応しない.
+# 索引に使うのは括弧, ":", ";" と, 関数名やクラス名のように直後に "(", "{", ":", "final" が続く識別子, class, struct, enum のみ.
+# それ以外の識別子や記号は読み飛ばす部分に含め, 1回のマッチで1つのトークンを取り出す.
+# 範囲はすべて元の文字列の位置で表す.
+
+TOKEN_PATTERN = re.compile(
+    r"""
+    # 読み飛ばす部分. Python 3.10 は所有量指定子と atomic group を使えないため,
+    # 先読みで一致させた範囲を後方参照で消費し, 読み飛ばした部分を後から戻さないようにする
+    (?=(?P<skip>(?:
+        [^\w/\#"'{}()\[\];:]+
+      | (?!(?:class|struct|enum)\b|R")\w+\b(?!\s*(?:[({:]|final\b))
+      # 数値など英字と "_" 以外で始まる語はトークンにしない
+      | (?![A-Za-z_])\w+
+      | //[^\n]*
+      | /\*.*?\*/
+      | \#(?:\\\n|[^\n])*
+      | R"(?P<delimiter>[^(\s]*)\(.*?\)(?P=delimiter)"
+      | "(?:\\.|[^"\\\n])*"
+      | '(?:\\.|[^'\\\n])*'
+      | [/"']
+    )*))(?P=skip)
+    # 末尾にトークンがない場合も \Z で一致させ, 後ろの位置から走査し直さないようにする
+    (?:(?P<token>::|[{}()\[\];:]|[A-Za-z_]\w*)|\Z)
+    """,
+    re.DOTALL | re.VERBOSE,
+)
+
+
+OPEN_BRACKETS = {"(": ")", "{": "}", "[": "]"}
+CLOSE_BRACKETS = frozenset(OPEN_BRACKETS.values())
+PUNCTUATIONS = frozenset(("::", ":", ";", *OPEN_BRACKETS, *CLOSE_BRACKETS))
+ACCESS_SPECIFIERS = ("public", "protected", "private")
+
+
+@dataclass(frozen=True, slots=True)
+class Token:
+    """括弧, ":", ";", 索引に使う識別子のトークン"""
+
+    text: str
+    start: int
+    end: int
+    is_identifier: bool
+
+
+@dataclass(frozen=True, slots=True)
+class Block:
+    """対応する括弧の位置. open は開き括弧, close は閉じ括弧の位置"""
+
+    open: int
+    close: int
+
+
+@dataclass(frozen=True, slots=True)
+class AccessSection:
+    """アクセス指定子から次のアクセス指定子, またはクラスの閉じ括弧までの範囲"""
+
+    access: str
+    # アクセス指定子の位置
+    label_start: int
+    # ":" の直後の位置
+    start: int
+    # 次のアクセス指定子, またはクラスの閉じ括弧の位置
+    end: int
+    # メンバの宣言ごとの範囲. 前の宣言の終わり (最初の宣言は ":" の直後) から ";" または関数の本体の "}" の直後まで
+    members: tuple[tuple[int, int], ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class Constructor:
+    """コンストラクタの引数リスト, 初期化リスト, 本体"""
+
+    parameters: Block
+    # ":" の後の最初のトークンから本体の "{" までの範囲. 初期化リストがない場合は None
+    initializer_list: tuple[int, int] | None
+    body: Block | None
+
+
+@dataclass(frozen=True, slots=True)
+class ClassRegion:
+    """クラスの定義"""
+
+    name: str
+    # "class" キーワードの位置
+    start: int
+    body: Block
+    access_sections: tuple[AccessSection, ...] = ()
+    constructors: tuple[Constructor, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class RegionIndex:
+    """build_region_index で作成した索引"""
+
+    code: str
+    # クラス名ごとの最初の定義
+    classes: dict[str, ClassRegion] = field(default_factory=dict)
+    # 関数名などの識別子ごとに, 最初に現れた位置の後にある最初の {} ブロック
+    block_after: dict[str, Block] = field(default_factory=dict)
+    # 識別子ごとに, 直後に "(" が続く最初の位置の () ブロック
+    parentheses_after: dict[str, Block] = field(default_factory=dict)
+
+
+def tokenize(code: str) -> list[Token]:
+    """C++ のコードを括弧, ":", ";", 索引に使う識別子のトークンに分割する
+
+    空白, コメント, 文字列, プリプロセッサの行, その他の識別子や記号は除く.
+
+    Args:
+        code (str): C++ のコード
+
+    Returns:
+        list[Token]: トークン
+    """
+    texts, starts, ends = _scan(code)
+    return [
+        Token(text, start, end, text not in PUNCTUATIONS)
+        for text, start, end in zip(texts, starts, ends)
+    ]
+
+
+def build_region_index(code: str) -> RegionIndex:
+    """C++ のコードを1回だけ走査し, 編集に使う範囲の索引を作成する
+
+    Args:
+        code (str): C++ のコード
+
+    Returns:
+        RegionIndex: 索引
+    """
+    texts, starts, ends = _scan(code)
+    count = len(texts)
+
+    # 対応する括弧のトークンの番号
+    matching = [-1] * count
+    stack = []
+    for i, text in enumerate(texts):
+        if text in OPEN_BRACKETS:
+            stack.append(i)
+        elif text in CLOSE_BRACKETS:
+            while stack and OPEN_BRACKETS[texts[stack[-1]]] != text:
+                stack.pop()
+            if stack:
+                j = stack.pop()
+                matching[i] = j
+                matching[j] = i
+
+    # 各トークン以降で最初の "{" のトークンの番号
+    next_open_brace = [-1] * (count + 1)
+    for i in range(count - 1, -1, -1):
+        next_open_brace[i] = i if texts[i] == "{" else next_open_brace[i + 1]
+
+    index = RegionIndex(code)
+    for i, text in enumerate(texts):
+        if text in PUNCTUATIONS:
+            continue
+        if text not in index.block_after:
+            brace = next_open_brace[i + 1]
+            if brace != -1 and matching[brace] != -1:
+                index.block_after[text] = Block(starts[brace], starts[matching[brace]])
+        if (
+            text not in index.parentheses_after
+            and i + 1 < count
+            and texts[i + 1] == "("
+            and matching[i + 1] != -1
+        ):
+            index.parentheses_after[text] = Block(starts[i + 1], starts[matching[i + 1]])
+        if text in ("class", "struct") and not (i > 0 and texts[i - 1] == "enum"):
+            class_region = _read_class(texts, starts, ends, matching, i)
+            if class_region is not None and class_region.name not in index.classes:
+                index.classes[class_region.name] = class_region
+    return index
+
+
+def _scan(code: str) -> tuple[list[str], list[int], list[int]]:
+    # トークンの文字列, 開始位置, 終了位置を別々のリストで返す
+    texts = []
+    starts = []
+    ends = []
+    for match in TOKEN_PATTERN.finditer(code):
+        if match["token"] is None:
+            # 末尾の読み飛ばす部分
+            break
+        texts.append(match["token"])
+        starts.append(match.start("token"))
+        ends.append(match.end())
+    return texts, starts, ends
+
+
+def _read_class(
+    texts: list[str], starts: list[int], ends: list[int], matching: list[int], i: int
+) -> ClassRegion | None:
+    # "class <name> [final] [: base, ...] {" の形式のみをクラスの定義とする
+    count = len(texts)
+    if i + 1 >= count or texts[i + 1] in PUNCTUATIONS:
+        return None
+    name = texts[i + 1]
+    j = i + 2
+    if j < count and texts[j] == "final":
+        j += 1
+    if j < count and texts[j] == ":":
+        while j < count and texts[j] not in ("{", ";"):
+            j += 1
+    if j >= count or texts[j] != "{" or matching[j] == -1:
+        return None
+    body_open = j
+    body_close = matching[j]
+
+    # クラスの直下のトークンだけをたどり, 入れ子のブロックは読み飛ばす.
+    # アクセス指定子ごとに, 直下の ";" と関数の本体の "}" でメンバの宣言を区切る
+    labels = []
+    constructors = []
+    members = None
+    member_start = 0
+    j = body_open + 1
+    while j < body_close:
+        text = texts[j]
+        if text in ACCESS_SPECIFIERS and texts[j + 1] == ":":
+            members = []
+            member_start = ends[j + 1]
+            labels.append((text, starts[j], member_start, members))
+            j += 2
+            continue
+        if text == name and texts[j + 1] == "(" and matching[j + 1] != -1:
+            constructor, j = _read_constructor(texts, starts, matching, j + 1, body_close)
+            constructors.append(constructor)
+            member_end = j - 1
+        elif text in OPEN_BRACKETS and matching[j] != -1:
+            j = matching[j] + 1
+            # 直後に ";" が続かない {} は関数の本体なので, そこで宣言を区切る
+            member_end = j - 1 if text == "{" and texts[j] != ";" else None
+        else:
+            member_end = j if text == ";" else None
+            j += 1
+        if members is not None and member_end is not None and member_end < body_close:
+            members.append((member_start, ends[member_end]))
+            member_start = ends[member_end]
+
+    access_sections = tuple(
+        AccessSection(
+            access,
+            label_start,
+            start,
+            labels[k + 1][1] if k + 1 < len(labels) else starts[body_close],
+            tuple(section_members),
+        )
+        for k, (access, label_start, start, section_members) in enumerate(labels)
+    )
+    return ClassRegion(
+        name=name,
+        start=starts[i],
+        body=Block(starts[body_open], starts[body_close]),
+        access_sections=access_sections,
+        constructors=tuple(constructors),
+    )
+
+
+def _read_constructor(
+    texts: list[str], starts: list[int], matching: list[int], parameters_open: int, limit: int
+) -> tuple[Constructor, int]:
+    # コンストラクタの引数リストの "(" から, 初期化リストと本体を読む. 読み終えたトークンの次の番号も返す
+    parameters_close = matching[parameters_open]
+    parameters = Block(starts[parameters_open], starts[parameters_close])
+    j = parameters_close + 1
+    initializer_list = None
+    if j < limit and texts[j] == ":":
+        j += 1
+        initializer_start = starts[j]
+        # 初期化子の () と, 識別子の直後の {} (波括弧による初期化) は読み飛ばす
+        while j < limit:
+            text = texts[j]
+            if text == "(" or (text == "{" and texts[j - 1] not in PUNCTUATIONS):
+                j = matching[j] + 1 if matching[j] != -1 else j + 1
+                continue
+            if text in ("{", ";"):
+                break
+            j += 1
+        initializer_list = (initializer_start, starts[j])
+    else:
+        # noexcept, override などの指定子を読み飛ばす
+        while j < limit and texts[j] not in ("{", ";"):
+            j += 1
+
+    body = None
+    if j < limit and texts[j] == "{" and matching[j] != -1:
+        body = Block(starts[j], starts[matching[j]])
+        j = matching[j]
+    return Constructor(parameters, initializer_list, body), j + 1
@@ -0,0 +1,107 @@
+import re
+from dataclasses import dataclass
+
+# テンプレート中のリージョンの位置を示す目印. C++ のコードには現れない NUL 文字で名前を囲む
+REGION_MARKER = "\x00"
+
+
+def region_marker(name: str) -> str:
+    """テンプレート中のリージョンの位置に埋め込む目印を取得する
+
+    Args:
+        name (str): リージョン名
+
+    Returns:
+        str: 目印の文字列
+    """
+    return f"{REGION_MARKER}{name}{REGION_MARKER}"
+
+
+def compile_placeholder_pattern(placeholders: tuple[str, ...]) -> re.Pattern:
+    """プレースホルダーを1回の走査で見つける正規表現を作成する
+
+    長いものから順に試すため, 他のプレースホルダーを含むプレースホルダーも正しく置換される.
+    前後が英数字の場合は識別子の一部とみなしてマッチしない. "_" は区切りとして扱う.
+
+    Args:
+        placeholders (tuple[str, ...]): プレースホルダー
+
+    Returns:
+        re.Pattern: プレースホルダーの正規表現
+    """
+    alternation = "|".join(
+        re.escape(placeholder)
+        for placeholder in sorted(placeholders, key=len, reverse=True)
+    )
+    return re.compile(rf"(?<![A-Za-z0-9])(?:{alternation})(?![A-Za-z0-9])")
+
+
+def substitute_placeholders(text: str, pattern: re.Pattern, values: dict[str, str]) -> str:
+    """プレースホルダーを1回の走査で置換する
+
+    置換後の文字列は再び走査しないため, 値にプレースホルダーが含まれていても置換されない.
+
+    Args:
+        text (str): 置換する文字列
+        pattern (re.Pattern): compile_placeholder_pattern で作成した正規表現
+        values (dict[str, str]): {プレースホルダー: 値}
+
+    Returns:
+        str: 置換後の文字列
+    """
+    return pattern.sub(lambda match: values[match.group(0)], text)
+
+
+@dataclass(frozen=True, slots=True)
+class CompiledTemplate:
+    """固定の文字列とスロット (プレースホルダーとリージョン) に分割したテンプレート
+
+    segments はスロットの前後の固定の文字列で, 常に len(slots) + 1 個ある.
+    """
+
+    segments: tuple[str, ...]
+    slots: tuple[str, ...]
+
+    def render(self, values: dict[str, str]) -> str:
+        """スロットに値を埋め込んだ文字列を作成する
+
+        Args:
+            values (dict[str, str]): {プレースホルダーまたはリージョン名: 値}
+
+        Returns:
+            str: 作成した文字列
+        """
+        parts = [self.segments[0]]
+        for slot, segment in zip(self.slots, self.segments[1:]):
+            parts.append(values[slot])
+            parts.append(segment)
+        return "".join(parts)
+
+
+def compile_template(text: str, placeholders: tuple[str, ...]) -> CompiledTemplate:
+    """テンプレートを固定の文字列とスロットに分割する
+
+    プレースホルダーは compile_placeholder_pattern と同じ規則で, リージョンは region_marker の目印で探す.
+
+    Args:
+        text (str): region_marker の目印を埋め込んだテンプレート
+        placeholders (tuple[str, ...]): プレースホルダー
+
+    Returns:
+        CompiledTemplate: 分割したテンプレート
+    """
+    placeholder_pattern = compile_placeholder_pattern(placeholders)
+    slot_pattern = re.compile(
+        rf"{REGION_MARKER}(\w+){REGION_MARKER}|{placeholder_pattern.pattern}"
+    )
+
+    segments = []
+    slots = []
+    position = 0
+    for match in slot_pattern.finditer(text):
+        segments.append(text[position : match.start()])
+        slots.append(match.group(1) or match.group(0))
+        position = match.end()
+    segments.append(text[position:])
+
+    return CompiledTemplate(segments=tuple(segments), slots=tuple(slots))
@@ -0,0 +1,205 @@
+import os, select, struct, time
+import ctypes, ctypes.util
+
+# inotify のイベントマスク (linux/inotify.h)
+IN_MODIFY = 0x00000002
+IN_CLOSE_WRITE = 0x00000008
+IN_MOVED_FROM = 0x00000040
+IN_MOVED_TO = 0x00000080
+IN_CREATE = 0x00000100
+IN_DELETE = 0x00000200
+IN_Q_OVERFLOW = 0x00004000
+IN_IGNORED = 0x00008000
+IN_ISDIR = 0x40000000
+IN_NONBLOCK = os.O_NONBLOCK
+IN_CLOEXEC = os.O_CLOEXEC
+
+WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+_EVENT_HEADER = struct.Struct("iIII")
+
+
+def create_watcher(poll_interval: float = 1.0):
+    """利用可能な監視方法でファイル監視を作成する
+
+    Linux では inotify を使い, 利用できない場合は mtime のポーリングを使う
+
+    Args:
+        poll_interval (float, optional): ポーリングの間隔 [s]. デフォルト値は1.0.
+
+    Returns:
+        InotifyWatcher | PollingWatcher: ファイル監視
+    """
+    try:
+        return InotifyWatcher()
+    except OSError:
+        return PollingWatcher(poll_interval)
+
+
+def iter_watch_dirs(root: str, recursive: bool, ignore_dir_names: frozenset[str] = frozenset()):
+    """監視するディレクトリを列挙する. 隠しディレクトリと ignore_dir_names のディレクトリは除外する
+
+    Args:
+        root (str): 監視するディレクトリ
+        recursive (bool): サブディレクトリも監視するかどうか
+        ignore_dir_names (frozenset[str], optional): 除外するディレクトリ名. デフォルト値はfrozenset().
+
+    Yields:
+        str: 監視するディレクトリ
+    """
+    yield root
+    if not recursive:
+        return
+    for current_dir, dir_names, _ in os.walk(root):
+        dir_names[:] = [
+            d for d in dir_names if not d.startswith(".") and d not in ignore_dir_names
+        ]
+        for dir_name in dir_names:
+            yield os.path.join(current_dir, dir_name)
+
+
+class InotifyWatcher:
+    """inotify によるディレクトリの監視"""
+
+    def __init__(self):
+        libc_name = ctypes.util.find_library("c") or "libc.so.6"
+        self._libc = ctypes.CDLL(libc_name, use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+        self._fd = self._libc.inotify_init1(IN_NONBLOCK | IN_CLOEXEC)
+        if self._fd < 0:
+            raise OSError(ctypes.get_errno(), "inotify_init1 failed")
+        self._dirs = {}
+        self._recursive_dirs = {}
+        # イベントキューが溢れた場合 True. 変更を取りこぼしているため全体の再走査が必要
+        self.overflowed = False
+
+    def add_dir(
+        self, path: str, recursive: bool = False, ignore_dir_names: frozenset[str] = frozenset()
+    ):
+        """ディレクトリを監視対象に追加する
+
+        Args:
+            path (str): 監視するディレクトリ
+            recursive (bool, optional): サブディレクトリも監視するかどうか. デフォルト値はFalse.
+            ignore_dir_names (frozenset[str], optional): 監視しないサブディレクトリ名. デフォルト値はfrozenset().
+        """
+        for watch_dir in iter_watch_dirs(path, recursive, ignore_dir_names):
+            wd = self._libc.inotify_add_watch(self._fd, os.fsencode(watch_dir), WATCH_MASK)
+            if wd < 0:
+                continue
+            self._dirs[wd] = watch_dir
+            if recursive:
+                self._recursive_dirs[watch_dir] = ignore_dir_names
+
+    def read_changes(self, timeout: float) -> set[str]:
+        """変更されたファイルのパスを取得する
+
+        Args:
+            timeout (float): 最初のイベントを待つ時間 [s]
+
+        Returns:
+            set[str]: 変更, 作成, 削除されたファイルのパス
+        """
+        changed_paths = set()
+        ready, _, _ = select.select([self._fd], [], [], timeout)
+        if not ready:
+            return changed_paths
+
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return changed_paths
+
+        offset = 0
+        while offset < len(buffer):
+            wd, mask, _, name_length = _EVENT_HEADER.unpack_from(buffer, offset)
+            offset += _EVENT_HEADER.size
+            name = os.fsdecode(buffer[offset : offset + name_length].rstrip(b"\0"))
+            offset += name_length
+
+            if mask & IN_Q_OVERFLOW:
+                self.overflowed = True
+                continue
+            if mask & IN_IGNORED:
+                self._dirs.pop(wd, None)
+                continue
+            if wd not in self._dirs or not name:
+                continue
+
+            path = os.path.join(self._dirs[wd], name)
+            if mask & IN_ISDIR:
+                # 再帰的に監視しているディレクトリに作成されたディレクトリも監視する
+                if mask & (IN_CREATE | IN_MOVED_TO) and self._dirs[wd] in self._recursive_dirs:
+                    ignore_dir_names = self._recursive_dirs[self._dirs[wd]]
+                    if not name.startswith(".") and name not in ignore_dir_names:
+                        self.add_dir(path, recursive=True, ignore_dir_names=ignore_dir_names)
+                continue
+            changed_paths.add(path)
+        return changed_paths
+
+    def close(self):
+        os.close(self._fd)
+
+
+class PollingWatcher:
+    """mtime のポーリングによるディレクトリの監視"""
+
+    def __init__(self, poll_interval: float = 1.0):
+        self._poll_interval = poll_interval
+        self._roots = []
+        self._snapshot = {}
+        self.overflowed = False
+
+    def add_dir(
+        self, path: str, recursive: bool = False, ignore_dir_names: frozenset[str] = frozenset()
+    ):
+        """ディレクトリを監視対象に追加する
+
+        Args:
+            path (str): 監視するディレクトリ
+            recursive (bool, optional): サブディレクトリも監視するかどうか. デフォルト値はFalse.
+            ignore_dir_names (frozenset[str], optional): 監視しないサブディレクトリ名. デフォルト値はfrozenset().
+        """
+        self._roots.append((path, recursive, ignore_dir_names))
+        self._snapshot.update(self._scan_root(path, recursive, ignore_dir_names))
+
+    def read_changes(self, timeout: float) -> set[str]:
+        """変更されたファイルのパスを取得する
+
+        Args:
+            timeout (float): 次のポーリングまで待つ時間の上限 [s]
+
+        Returns:
+            set[str]: 変更, 作成, 削除されたファイルのパス
+        """
+        time.sleep(min(timeout, self._poll_interval))
+        snapshot = {}
+        for path, recursive, ignore_dir_names in self._roots:
+            snapshot.update(self._scan_root(path, recursive, ignore_dir_names))
+
+        changed_paths = {
+            path
+            for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        }
+        self._snapshot = snapshot
+        return changed_paths
+
+    def close(self):
+        pass
+
+    def _scan_root(
+        self, root: str, recursive: bool, ignore_dir_names: frozenset[str]
+    ) -> dict[str, tuple[int, int]]:
+        snapshot = {}
+        for watch_dir in iter_watch_dirs(root, recursive, ignore_dir_names):
+            try:
+                entries = list(os.scandir(watch_dir))
+            except OSError:
+                continue
+            for entry in entries:
+                if entry.is_file():
+                    stat = entry.stat()
+                    snapshot[entry.path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
@@ -0,0 +1,357 @@
+import os, difflib, threading
+from typing import Callable
+from modules import profiler
+
+# 生成物の読み書きはすべてこのモジュールを経由する.
+# begin_staging を呼ぶと書き込みはメモリ上に保持され, commit_staged でまとめてファイルに反映される.
+# 保持中は読み込んだファイルの内容もキャッシュするため, 同じファイルを何度読んでもディスクは1回しか読まない.
+
+# 書き込みの集計. changed: 内容が変わり書き込んだ数, unchanged: 内容が同じで書き込みを省略した数
+write_counts = {"changed": 0, "unchanged": 0}
+_write_counts_lock = threading.Lock()
+
+# 同時に開くファイル数の上限. 複数のスレッドで生成しても記述子を使い切らないようにする
+DEFAULT_MAX_OPEN_FILES = 64
+_open_files = threading.BoundedSemaphore(DEFAULT_MAX_OPEN_FILES)
+
+# 保持中の書き込み. files: {path: 内容 (削除の場合は None)}, cache: {path: ディスクの内容 (存在しない場合は None)},
+# after_commit: 反映後に呼ぶ関数
+_staging = {"active": False, "files": {}, "cache": {}, "after_commit": []}
+_staging_lock = threading.Lock()
+
+
+def set_max_open_files(max_open_files: int):
+    """同時に開くファイル数の上限を設定する. ファイルを開いているスレッドがない時に呼ぶ
+
+    Args:
+        max_open_files (int): 同時に開くファイル数の上限
+    """
+    global _open_files
+    _open_files = threading.BoundedSemaphore(max(1, max_open_files))
+
+
+def begin_staging():
+    """書き込みをメモリ上に保持し始める"""
+    with _staging_lock:
+        _staging["active"] = True
+        _staging["files"] = {}
+        _staging["cache"] = {}
+        _staging["after_commit"] = []
+
+
+def is_staging() -> bool:
+    """書き込みをメモリ上に保持しているかどうか
+
+    Returns:
+        bool: 保持している場合 True
+    """
+    return _staging["active"]
+
+
+def is_staged(path: str) -> bool:
+    """ファイルへの書き込みまたは削除を保持しているかどうか
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        bool: 保持している場合 True. ディスクの内容や stat は保持している内容と異なる
+    """
+    if not _staging["active"]:
+        return False
+    with _staging_lock:
+        return os.path.abspath(path) in _staging["files"]
+
+
+def read_file(path: str) -> str:
+    """同時に開くファイル数の上限の範囲でファイルを読み込む
+
+    書き込みを保持している場合は保持している内容を返す.
+
+    Args:
+        path (str): 読み込むファイルのパス
+
+    Returns:
+        str: ファイルの内容
+
+    Raises:
+        FileNotFoundError: ファイルが存在しない, または削除を保持している場合
+    """
+    if not _staging["active"]:
+        return _read_disk(path)
+
+    path = os.path.abspath(path)
+    with _staging_lock:
+        if path in _staging["files"]:
+            content = _staging["files"][path]
+        else:
+            content = _staging["cache"].get(path, False)
+    if content is False:
+        try:
+            content = _read_disk(path)
+        except FileNotFoundError:
+            content = None
+        with _staging_lock:
+            _staging["cache"][path] = content
+    if content is None:
+        raise FileNotFoundError(f"No such file: '{path}'")
+    return content
+
+
+def exists(path: str) -> bool:
+    """ファイルが存在するかどうか. 書き込みを保持している場合は保持している内容も反映する
+
+    Args:
+        path (str): ファイルのパス
+
+    Returns:
+        bool: 存在する場合 True
+    """
+    if _staging["active"]:
+        with _staging_lock:
+            staged = _staging["files"].get(os.path.abspath(path), False)
+        if staged is not False:
+            return staged is not None
+    return os.path.exists(path)
+
+
+def list_dir(directory: str) -> list[str]:
+    """ディレクトリのファイル名の一覧を取得する. 書き込みを保持している場合は保持している内容も反映する
+
+    Args:
+        directory (str): ディレクトリのパス
+
+    Returns:
+        list[str]: ファイル名の一覧
+    """
+    names = set(os.listdir(directory)) if os.path.isdir(directory) else set()
+    if _staging["active"]:
+        directory = os.path.abspath(directory)
+        with _staging_lock:
+            for path, content in _staging["files"].items():
+                if os.path.dirname(path) != directory:
+                    continue
+                if content is None:
+                    names.discard(os.path.basename(path))
+                else:
+                    names.add(os.path.basename(path))
+    return sorted(names)
+
+
+@profiler.timed("write")
+def write_if_changed(path: str, content: str, original: str | None = None) -> bool:
+    """内容が変わった場合のみファイルに書き込む
+
+    内容が同じ場合は書き込まないため mtime が更新されず,
+    生成したヘッダーを include している C++ の再コンパイルを避けられる.
+    同じディレクトリの一時ファイルに書き込んでから置き換えるため, 中断しても書きかけのファイルは残らない.
+    書き込みを保持している場合はメモリ上に保持し, commit_staged で書き込む.
+
+    Args:
+        path (str): 書き込み先のファイルのパス
+        content (str): 書き込む内容
+        original (str | None, optional): 読み込み済みの既存の内容. None の場合はファイルから読み込む. デフォルト値はNone.
+
+    Returns:
+        bool: 書き込んだ (保持した) 場合 True
+    """
+    if original is None:
+        try:
+            original = read_file(path)
+        except FileNotFoundError:
+            original = None
+
+    if original == content:
+        with _write_counts_lock:
+            write_counts["unchanged"] += 1
+        profiler.count("files_unchanged")
+        return False
+
+    if _staging["active"]:
+        with _staging_lock:
+            _staging["files"][os.path.abspath(path)] = content
+    else:
+        os.replace(_write_temp(path, content), path)
+    with _write_counts_lock:
+        write_counts["changed"] += 1
+    return True
+
+
+def remove_file(path: str):
+    """ファイルを削除する. 書き込みを保持している場合は削除を保持する
+
+    Args:
+        path (str): 削除するファイルのパス
+    """
+    if _staging["active"]:
+        with _staging_lock:
+            _staging["files"][os.path.abspath(path)] = None
+    else:
+        os.remove(path)
+
+
+def after_commit(callback: Callable[[], None]):
+    """書き込みを反映した後に呼ぶ関数を登録する. 保持していない場合はすぐに呼ぶ
+
+    生成したファイルの stat を記録する manifest の保存などに使う.
+
+    Args:
+        callback (Callable[[], None]): 呼ぶ関数
+    """
+    if _staging["active"]:
+        with _staging_lock:
+            _staging["after_commit"].append(callback)
+    else:
+        callback()
+
+
+def take_staged() -> dict[str, str | None]:
+    """保持している書き込みを取り出す. 別プロセスで保持した書き込みを親プロセスに渡すために使う
+
+    Returns:
+        dict[str, str | None]: {path: 内容 (削除の場合は None)}. 保持していない場合は空
+    """
+    with _staging_lock:
+        files = _staging["files"]
+        _staging["files"] = {}
+    return files
+
+
+def merge_staged(files: dict[str, str | None]):
+    """take_staged で取り出した書き込みを保持する
+
+    Args:
+        files (dict[str, str | None]): {path: 内容 (削除の場合は None)}
+    """
+    with _staging_lock:
+        _staging["files"].update(files)
+
+
+def staged_diff() -> str:
+    """保持している書き込みとディスクの内容の unified diff を取得する
+
+    Returns:
+        str: unified diff
+    """
+    with _staging_lock:
+        files = dict(_staging["files"])
+    diff_lines = []
+    for path in sorted(files):
+        try:
+            original = _read_disk(path)
+        except FileNotFoundError:
+            original = None
+        content = files[path]
+        for line in difflib.unified_diff(
+            [] if original is None else original.splitlines(keepends=True),
+            [] if content is None else content.splitlines(keepends=True),
+            "/dev/null" if original is None else path,
+            "/dev/null" if content is None else path,
+        ):
+            if not line.endswith("\n"):
+                line += "\n\\ No newline at end of file\n"
+            diff_lines.append(line)
+    return "".join(diff_lines)
+
+
+@profiler.timed("write")
+def commit_staged():
+    """保持している書き込みをまとめてファイルに反映し, 保持をやめる
+
+    すべての一時ファイルを書き終えてから置き換えるため, 一時ファイルの書き込みに失敗した場合は
+    どのファイルも変更しない.
+    """
+    with _staging_lock:
+        files = _staging["files"]
+        callbacks = _staging["after_commit"]
+        _staging["active"] = False
+        _staging["files"] = {}
+        _staging["cache"] = {}
+        _staging["after_commit"] = []
+
+    tmp_paths = {}
+    try:
+        for path, content in files.items():
+            if content is not None:
+                tmp_paths[path] = _write_temp(path, content)
+    except BaseException:
+        for tmp_path in tmp_paths.values():
+            os.remove(tmp_path)
+        raise
+
+    try:
+        for path, content in files.items():
+            if content is None:
+                if os.path.exists(path):
+                    os.remove(path)
+            else:
+                os.replace(tmp_paths.pop(path), path)
+    finally:
+        for tmp_path in tmp_paths.values():
+            os.remove(tmp_path)
+
+    for callback in callbacks:
+        callback()
+
+
+def discard_staged():
+    """保持している書き込みを破棄し, 保持をやめる"""
+    with _staging_lock:
+        _staging["active"] = False
+        _staging["files"] = {}
+        _staging["cache"] = {}
+        _staging["after_commit"] = []
+
+
+def _read_disk(path: str) -> str:
+    with _open_files:
+        with open(path, "r") as f:
+            content = f.read()
+    profiler.count_read(content)
+    return content
+
+
+def _write_temp(path: str, content: str) -> str:
+    # 同じディレクトリの一時ファイルに書き込む. 既存のファイルの権限を引き継ぐ
+    tmp_path = f"{path}.{os.getpid()}.{threading.get_ident()}.tmp"
+    try:
+        with _open_files:
+            with open(tmp_path, "w") as f:
+                f.write(content)
+        if os.path.exists(path):
+            os.chmod(tmp_path, os.stat(path).st_mode)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    profiler.count("files_written")
+    profiler.count("bytes_written", len(content.encode()))
+    return tmp_path
+
+
+def get_write_counts() -> dict[str, int]:
+    """書き込みの集計を取得する
+
+    Returns:
+        dict[str, int]: {"changed": int, "unchanged": int}
+    """
+    with _write_counts_lock:
+        return dict(write_counts)
+
+
+def reset_write_counts():
+    """書き込みの集計をリセットする"""
+    with _write_counts_lock:
+        write_counts["changed"] = 0
+        write_counts["unchanged"] = 0
+
+
+def merge_write_counts(counts: dict[str, int]):
+    """別プロセスで集計した書き込みの集計を加算する
+
+    Args:
+        counts (dict[str, int]): {"changed": int, "unchanged": int}
+    """
+    with _write_counts_lock:
+        write_counts["changed"] += counts["changed"]
+        write_counts["unchanged"] += counts["unchanged"]
@@ -1,10 +1,14 @@
+import re, functools
 from modules import case_formatter
+from modules import profiler
 
 
+@profiler.timed("name_generation")
 def generate_bt_plugin_file_name(
     ros2_pkg_name: str,
     ros2_action_name: str,
     bt_plugin_file_name_exclude_words: list[str] = [],
+    word_boundary: bool = False,
 ) -> str:
     """bt plugin のファイル名を生成する
 
@@ -12,13 +16,14 @@ def generate_bt_plugin_file_name(
         ros2_pkg_name (str): ros2 pkg 名
         ros2_action_name (str): ros2 action 名
         bt_plugin_file_name_exclude_words (list[str], optional): bt pluginのファイル名で除外する単語. デフォルト値は[].
+        word_boundary (bool, optional): 英数字以外で区切られた単語としてのみ除外する. デフォルト値はFalse.
 
     Returns:
         str: bt plugin のファイル名
     """
-    plugin_file_name = ros2_pkg_name + "_" + ros2_action_name
-    for exclude_word in bt_plugin_file_name_exclude_words:
-        plugin_file_name = plugin_file_name.replace(exclude_word, "")
+    plugin_file_name = remove_words(
+        ros2_pkg_name + "_" + ros2_action_name, bt_plugin_file_name_exclude_words, word_boundary
+    )
     plugin_file_name = case_formatter.case_formatter(
         plugin_file_name, "lower_snake_case"
     )
@@ -26,8 +31,12 @@ def generate_bt_plugin_file_name(
     return plugin_file_name
 
 
+@profiler.timed("name_generation")
 def generate_bt_action_name(
-    ros2_pkg_name: str, ros2_action_name: str, bt_action_name_exclude_words: list[str] = []
+    ros2_pkg_name: str,
+    ros2_action_name: str,
+    bt_action_name_exclude_words: list[str] = [],
+    word_boundary: bool = False,
 ) -> str:
     """bt action の名前を生成する
 
@@ -35,12 +44,159 @@ def generate_bt_action_name(
         ros2_pkg_name (str): ros2 pkg 名
         action_name (str): ros2 action 名
         bt_action_name_exclude_words (list[str], optional): bt actionの名前で除外する単語. デフォルト値は[].
+        word_boundary (bool, optional): 英数字以外で区切られた単語としてのみ除外する. デフォルト値はFalse.
 
     Returns:
         str: bt action の名前
     """
-    bt_action_name = ros2_pkg_name + "_" + ros2_action_name
-    for exclude_word in bt_action_name_exclude_words:
-        bt_action_name = bt_action_name.replace(exclude_word, "")
+    bt_action_name = remove_words(
+        ros2_pkg_name + "_" + ros2_action_name, bt_action_name_exclude_words, word_boundary
+    )
     bt_action_name = case_formatter.case_formatter(bt_action_name, "UpperCamelCase")
     return bt_action_name
+
+
+def generate_ros2_action_name(
+    ros2_pkg_name: str,
+    ros2_action_file_name: str,
+    ros2_node_name_suffix: str,
+    ros2_node_name_exclude_words: list[str] = [],
+    word_boundary: bool = False,
+) -> str:
+    """bt action の action_name ポートに設定する ros2 action 名を生成する
+
+    Args:
+        ros2_pkg_name (str): ros2 pkg 名
+        ros2_action_file_name (str): ros2 action のヘッダーのファイル名 (拡張子なしの lower_snake_case)
+        ros2_node_name_suffix (str): ros2 node 名の接尾辞
+        ros2_node_name_exclude_words (list[str], optional): ros2 node 名で除外する単語. デフォルト値は[].
+        word_boundary (bool, optional): 英数字以外で区切られた単語としてのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        str: ros2 action 名 (/node_name/action_name)
+    """
+    ros2_node_name = remove_words(ros2_pkg_name, ros2_node_name_exclude_words, word_boundary)
+    ros2_node_name = ros2_node_name + "_" + ros2_node_name_suffix
+    ros2_node_name = case_formatter.case_formatter(ros2_node_name, "lower_snake_case")
+    return "/" + ros2_node_name + "/" + ros2_action_file_name
+
+
+@profiler.timed("name_generation")
+def generate_bt_plugin_file_names(
+    ros2_action_names: list[tuple[str, str]],
+    bt_plugin_file_name_exclude_words: list[str] = [],
+    word_boundary: bool = False,
+) -> tuple[list[str], dict[str, list[int]]]:
+    """複数の bt plugin のファイル名をまとめて生成し, 重複を検出する
+
+    Args:
+        ros2_action_names (list[tuple[str, str]]): (ros2 pkg 名, ros2 action 名) のリスト
+        bt_plugin_file_name_exclude_words (list[str], optional): bt pluginのファイル名で除外する単語. デフォルト値は[].
+        word_boundary (bool, optional): 英数字以外で区切られた単語としてのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        tuple[list[str], dict[str, list[int]]]: ros2_action_names と同じ順の bt plugin のファイル名と,
+            重複したファイル名ごとの ros2_action_names のインデックスのリスト
+    """
+    plugin_file_names = [
+        plugin_file_name + ".h"
+        for plugin_file_name in case_formatter.case_formatter_batch(
+            [
+                remove_words(
+                    ros2_pkg_name + "_" + ros2_action_name,
+                    bt_plugin_file_name_exclude_words,
+                    word_boundary,
+                )
+                for ros2_pkg_name, ros2_action_name in ros2_action_names
+            ],
+            "lower_snake_case",
+        )
+    ]
+    return plugin_file_names, find_collisions(plugin_file_names)
+
+
+@profiler.timed("name_generation")
+def generate_bt_action_names(
+    ros2_action_names: list[tuple[str, str]],
+    bt_action_name_exclude_words: list[str] = [],
+    word_boundary: bool = False,
+) -> tuple[list[str], dict[str, list[int]]]:
+    """複数の bt action の名前をまとめて生成し, 重複を検出する
+
+    Args:
+        ros2_action_names (list[tuple[str, str]]): (ros2 pkg 名, ros2 action 名) のリスト
+        bt_action_name_exclude_words (list[str], optional): bt actionの名前で除外する単語. デフォルト値は[].
+        word_boundary (bool, optional): 英数字以外で区切られた単語としてのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        tuple[list[str], dict[str, list[int]]]: ros2_action_names と同じ順の bt action の名前と,
+            重複した名前ごとの ros2_action_names のインデックスのリスト
+    """
+    bt_action_names = case_formatter.case_formatter_batch(
+        [
+            remove_words(
+                ros2_pkg_name + "_" + ros2_action_name, bt_action_name_exclude_words, word_boundary
+            )
+            for ros2_pkg_name, ros2_action_name in ros2_action_names
+        ],
+        "UpperCamelCase",
+    )
+    return bt_action_names, find_collisions(bt_action_names)
+
+
+def find_collisions(names: list[str]) -> dict[str, list[int]]:
+    """重複している名前を検出する
+
+    Args:
+        names (list[str]): 名前のリスト
+
+    Returns:
+        dict[str, list[int]]: 2回以上現れる名前ごとの names のインデックスのリスト
+    """
+    indices = {}
+    for i, name in enumerate(names):
+        indices.setdefault(name, []).append(i)
+    return {name: name_indices for name, name_indices in indices.items() if len(name_indices) > 1}
+
+
+def remove_words(name: str, exclude_words: list[str], word_boundary: bool = False) -> str:
+    """名前から除外する単語を1回の走査で取り除く
+
+    Args:
+        name (str): 名前
+        exclude_words (list[str]): 除外する単語
+        word_boundary (bool, optional): 英数字以外で区切られた単語としてのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        str: 単語を取り除いた名前
+    """
+    exclude_pattern = compile_exclude_words(tuple(exclude_words), word_boundary)
+    if exclude_pattern is None:
+        return name
+    return exclude_pattern.sub("", name)
+
+
+@functools.lru_cache(maxsize=None)
+def compile_exclude_words(exclude_words: tuple[str, ...], word_boundary: bool = False) -> re.Pattern | None:
+    """除外する単語の一覧から, すべての単語に一致する1つの正規表現を作成する. 単語の一覧ごとに1回だけ作成する
+
+    名前を先頭から走査し, 各位置で一致する単語のうち最も長いものを取り除く.
+    取り除いた後に新しくできた文字列は再度取り除かないため, 結果は単語の順序によらない.
+    例: ["inter", "interfaces"] で "nav_interfaces" は "nav_" になる
+
+    Args:
+        exclude_words (tuple[str, ...]): 除外する単語
+        word_boundary (bool, optional): 前後が英数字でない場合のみ一致させる. デフォルト値はFalse.
+            例: True の場合, "interfaces" は "nav_interfaces" に一致し "myinterfaces" には一致しない
+
+    Returns:
+        re.Pattern | None: 正規表現. 除外する単語がない場合は None
+    """
+    words = sorted({word for word in exclude_words if word}, key=lambda word: (-len(word), word))
+    if not words:
+        return None
+    alternation = "|".join(re.escape(word) for word in words)
+    if word_boundary:
+        return re.compile(f"(?<![A-Za-z0-9])(?:{alternation})(?![A-Za-z0-9])")
+    return re.compile(alternation)
+
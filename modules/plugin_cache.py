@@ -0,0 +1,183 @@
+import os, json, hashlib
+from typing import Any
+
+from modules.specs import PluginSpec, PortSpec
+
+# -b で C++ ヘッダーから取得した bt plugin 情報のキャッシュ.
+# ヘッダーのパスごとに mtime, サイズ, 内容の sha256 と bt plugin 情報を保存し,
+# 変更されていないヘッダーはファイルを開かずにキャッシュの bt plugin 情報を使う.
+
+CACHE_VERSION = 1
+CACHE_FILE_NAME = ".bt_plugin_info_cache.json"
+
+
+def get_cache_path(bt_plugin_save_path: str) -> str:
+    """キャッシュファイルのパスを取得する
+
+    Args:
+        bt_plugin_save_path (str): bt plugin の保存先のディレクトリ
+
+    Returns:
+        str: キャッシュファイルのパス
+    """
+    return os.path.join(os.path.expanduser(bt_plugin_save_path), CACHE_FILE_NAME)
+
+
+def settings_digest(
+    ros2_node_name_suffix: str,
+    ros2_node_name_exclude_words: list[str],
+    name_exclude_word_boundary: bool = False,
+) -> str:
+    """bt plugin 情報に影響する設定の sha256 を取得する
+
+    Args:
+        ros2_node_name_suffix (str): ros2 node 名の接尾辞
+        ros2_node_name_exclude_words (list[str]): ros2 node 名で除外する単語
+        name_exclude_word_boundary (bool, optional): ros2 node 名の除外する単語を単語境界でのみ除外する. デフォルト値はFalse.
+
+    Returns:
+        str: sha256 の16進数表記
+    """
+    settings = [ros2_node_name_suffix, list(ros2_node_name_exclude_words), name_exclude_word_boundary]
+    return hashlib.sha256(json.dumps(settings).encode()).hexdigest()
+
+
+def load_cache(cache_path: str, settings_digest: str) -> dict[str, Any]:
+    """キャッシュを1回で読み込む. 存在しない, 形式や設定が異なる場合は空のキャッシュを返す
+
+    Args:
+        cache_path (str): キャッシュファイルのパス
+        settings_digest (str): settings_digest で取得した今回の設定の sha256
+
+    Returns:
+        dict[str, Any]: キャッシュ
+            {"version": int,
+             "settings_digest": str,
+             "entries": {plugin_path: {"mtime_ns": int,
+                                       "size": int,
+                                       "digest": str,
+                                       "plugin": dict | None}}}
+    """
+    empty = {"version": CACHE_VERSION, "settings_digest": settings_digest, "entries": {}}
+    try:
+        with open(cache_path, "r") as f:
+            cache = json.load(f)
+    except (OSError, ValueError):
+        return empty
+
+    if cache.get("version") != CACHE_VERSION or cache.get("settings_digest") != settings_digest:
+        return empty
+    return cache
+
+
+def save_cache(cache_path: str, cache: dict[str, Any]):
+    """キャッシュを保存する. 書き込み途中で中断しても壊れないよう一時ファイルを経由する
+
+    Args:
+        cache_path (str): キャッシュファイルのパス
+        cache (dict[str, Any]): キャッシュ
+    """
+    tmp_path = cache_path + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(cache, f, separators=(",", ":"), sort_keys=True)
+    os.replace(tmp_path, cache_path)
+
+
+def content_digest(content: str) -> str:
+    """ヘッダーの内容の sha256 を取得する
+
+    Args:
+        content (str): ヘッダーの内容
+
+    Returns:
+        str: sha256 の16進数表記
+    """
+    return hashlib.sha256(content.encode()).hexdigest()
+
+
+def is_stat_unchanged(entry: dict[str, Any] | None, stat: os.stat_result) -> bool:
+    """ヘッダーの mtime とサイズがキャッシュと一致するかどうか
+
+    Args:
+        entry (dict[str, Any] | None): キャッシュのエントリ
+        stat (os.stat_result): ヘッダーの stat
+
+    Returns:
+        bool: 一致する場合 True
+    """
+    return (
+        entry is not None
+        and entry["mtime_ns"] == stat.st_mtime_ns
+        and entry["size"] == stat.st_size
+    )
+
+
+def make_entry(
+    stat: os.stat_result, digest: str, plugin_info: PluginSpec | None
+) -> dict[str, Any]:
+    """キャッシュのエントリを作成する
+
+    Args:
+        stat (os.stat_result): ヘッダーの stat
+        digest (str): ヘッダーの内容の sha256
+        plugin_info (PluginSpec | None): bt plugin 情報
+
+    Returns:
+        dict[str, Any]: キャッシュのエントリ
+    """
+    return {
+        "mtime_ns": stat.st_mtime_ns,
+        "size": stat.st_size,
+        "digest": digest,
+        "plugin": plugin_to_dict(plugin_info),
+    }
+
+
+def plugin_to_dict(plugin_info: PluginSpec | None) -> dict[str, Any] | None:
+    """bt plugin 情報を JSON に保存できる形式にする
+
+    Args:
+        plugin_info (PluginSpec | None): bt plugin 情報
+
+    Returns:
+        dict[str, Any] | None: {"action_class_name": str, "ros2_action_name": str,
+            "non_default_input_ports": [[name, type, c_name], ...], "default_input_ports": [...],
+            "output_ports": [...]}
+    """
+    if plugin_info is None:
+        return None
+    return {
+        "action_class_name": plugin_info.action_class_name,
+        "ros2_action_name": plugin_info.ros2_action_name,
+        "non_default_input_ports": _ports_to_list(plugin_info.non_default_input_ports),
+        "default_input_ports": _ports_to_list(plugin_info.default_input_ports),
+        "output_ports": _ports_to_list(plugin_info.output_ports),
+    }
+
+
+def plugin_from_dict(plugin: dict[str, Any] | None) -> PluginSpec | None:
+    """plugin_to_dict の形式から bt plugin 情報を作成する
+
+    Args:
+        plugin (dict[str, Any] | None): plugin_to_dict の形式の bt plugin 情報
+
+    Returns:
+        PluginSpec | None: bt plugin 情報
+    """
+    if plugin is None:
+        return None
+    return PluginSpec(
+        action_class_name=plugin["action_class_name"],
+        ros2_action_name=plugin["ros2_action_name"],
+        non_default_input_ports=_ports_from_list(plugin["non_default_input_ports"]),
+        default_input_ports=_ports_from_list(plugin["default_input_ports"]),
+        output_ports=_ports_from_list(plugin["output_ports"]),
+    )
+
+
+def _ports_to_list(ports: tuple[PortSpec, ...]) -> list[list[str | None]]:
+    return [[port.name, port.type, port.c_name] for port in ports]
+
+
+def _ports_from_list(ports: list[list[str | None]]) -> tuple[PortSpec, ...]:
+    return tuple(PortSpec(name=name, type=type, c_name=c_name) for name, type, c_name in ports)
@@ -0,0 +1,220 @@
+import sys, json, time, threading, functools, tracemalloc, cProfile
+from contextlib import contextmanager
+from typing import Any
+
+try:
+    import resource
+except ImportError:  # Windows
+    resource = None
+
+# 段階ごとの計測結果. {"stages": {name: {"wall_s": float, "calls": int}}, "counters": {name: int}}
+# 各モジュールの処理の中で記録されるため, ライブラリとして呼び出した場合も同じ情報が得られる.
+# 段階: discovery, msg_index, parse, name_generation, render, write, plugin_scan, bt_source_edit, btproj_edit
+stats = {"stages": {}, "counters": {}}
+
+_lock = threading.Lock()
+_local = threading.local()
+_session = {"mode": None, "start": None, "cprofile": None}
+
+
+@contextmanager
+def stage(name: str):
+    """処理の段階の経過時間を計測する
+
+    同じ名前の段階は合算される. 入れ子にした場合, 内側の段階の時間は外側の段階に含めないため,
+    各段階の時間の合計は計測した処理全体の時間と一致する
+
+    Args:
+        name (str): 段階の名前
+    """
+    stack = getattr(_local, "stack", None)
+    if stack is None:
+        stack = _local.stack = []
+
+    now = time.perf_counter()
+    if stack:
+        # 外側の段階の計測を一時停止する
+        _add_stage(stack[-1][0], now - stack[-1][1], 0)
+    stack.append([name, now])
+    try:
+        yield
+    finally:
+        now = time.perf_counter()
+        stage_name, stage_start = stack.pop()
+        _add_stage(stage_name, now - stage_start, 1)
+        if stack:
+            stack[-1][1] = now
+
+
+def timed(name: str):
+    """関数全体を段階として計測するデコレータ
+
+    Args:
+        name (str): 段階の名前
+    """
+
+    def decorator(fn):
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            with stage(name):
+                return fn(*args, **kwargs)
+
+        return wrapper
+
+    return decorator
+
+
+def _add_stage(name: str, wall_s: float, calls: int):
+    with _lock:
+        stage_stats = stats["stages"].setdefault(name, {"wall_s": 0.0, "calls": 0})
+        stage_stats["wall_s"] += wall_s
+        stage_stats["calls"] += calls
+
+
+def count(name: str, value: int = 1):
+    """カウンタを加算する
+
+    Args:
+        name (str): カウンタの名前 (例: "files_read", "bytes_read")
+        value (int, optional): 加算する値. デフォルト値は1.
+    """
+    with _lock:
+        stats["counters"][name] = stats["counters"].get(name, 0) + value
+
+
+def count_read(content: str):
+    """ファイルの読み込みを記録する
+
+    Args:
+        content (str): 読み込んだ内容
+    """
+    count("files_read")
+    count("bytes_read", len(content.encode()))
+
+
+def snapshot() -> dict[str, Any]:
+    """現在の計測結果の複製を取得する
+
+    Returns:
+        dict[str, Any]: 計測結果
+    """
+    with _lock:
+        return {
+            "stages": {name: dict(value) for name, value in stats["stages"].items()},
+            "counters": dict(stats["counters"]),
+        }
+
+
+def diff(before: dict[str, Any], after: dict[str, Any]) -> dict[str, Any]:
+    """2つの計測結果の差分を取得する. 別プロセスでの計測結果を親プロセスに渡すために使う
+
+    Args:
+        before (dict[str, Any]): 処理前の計測結果
+        after (dict[str, Any]): 処理後の計測結果
+
+    Returns:
+        dict[str, Any]: 差分
+    """
+    stages = {}
+    for name, value in after["stages"].items():
+        base = before["stages"].get(name, {"wall_s": 0.0, "calls": 0})
+        if value != base:
+            stages[name] = {
+                "wall_s": value["wall_s"] - base["wall_s"],
+                "calls": value["calls"] - base["calls"],
+            }
+    counters = {
+        name: value - before["counters"].get(name, 0)
+        for name, value in after["counters"].items()
+        if value != before["counters"].get(name, 0)
+    }
+    return {"stages": stages, "counters": counters}
+
+
+def merge(delta: dict[str, Any]):
+    """別プロセスでの計測結果を加算する
+
+    Args:
+        delta (dict[str, Any]): diff で取得した差分
+    """
+    for name, value in delta["stages"].items():
+        _add_stage(name, value["wall_s"], value["calls"])
+    for name, value in delta["counters"].items():
+        count(name, value)
+
+
+def reset():
+    """計測結果をリセットする"""
+    stats["stages"] = {}
+    stats["counters"] = {}
+
+
+def start_session(mode: str = "timers"):
+    """実行全体の計測を開始する
+
+    Args:
+        mode (str, optional): 計測方法. デフォルト値は"timers".
+            - 'timers': 段階ごとの経過時間とカウンタのみ
+            - 'cprofile': cProfile で関数ごとのプロファイルも取得する
+            - 'tracemalloc': tracemalloc でメモリ確保のピークと内訳も取得する
+    """
+    if mode not in ["timers", "cprofile", "tracemalloc"]:
+        raise ValueError("[profiler] Invalid mode: " + mode)
+    reset()
+    _session["mode"] = mode
+    _session["start"] = time.perf_counter()
+    if mode == "tracemalloc":
+        tracemalloc.start()
+    elif mode == "cprofile":
+        _session["cprofile"] = cProfile.Profile()
+        _session["cprofile"].enable()
+
+
+def finish_session(report_path: str, extra: dict[str, Any] | None = None) -> dict[str, Any]:
+    """実行全体の計測を終了し, JSON のレポートを出力する
+
+    cprofile の場合は report_path に ".prof" を付けたパスに pstats 形式の結果も出力する.
+    並列実行時, cProfile と tracemalloc は親プロセスのみが対象になる.
+
+    Args:
+        report_path (str): レポートの出力先のパス
+        extra (dict[str, Any] | None, optional): レポートに追加する情報. デフォルト値はNone.
+
+    Returns:
+        dict[str, Any]: レポート
+    """
+    mode = _session["mode"]
+    report = {
+        "mode": mode,
+        "command": sys.argv,
+        "wall_s": time.perf_counter() - _session["start"],
+        "stages": {name: stats["stages"][name] for name in sorted(stats["stages"])},
+        "counters": dict(sorted(stats["counters"].items())),
+    }
+
+    if resource is not None:
+        # ru_maxrss は Linux では KiB 単位
+        report["peak_rss_kib"] = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        report["peak_rss_children_kib"] = resource.getrusage(resource.RUSAGE_CHILDREN).ru_maxrss
+
+    if mode == "tracemalloc":
+        tracemalloc_snapshot = tracemalloc.take_snapshot()
+        report["tracemalloc_peak_bytes"] = tracemalloc.get_traced_memory()[1]
+        report["tracemalloc_top"] = [
+            {"location": str(stat.traceback), "size_bytes": stat.size, "count": stat.count}
+            for stat in tracemalloc_snapshot.statistics("lineno")[:20]
+        ]
+        tracemalloc.stop()
+    elif mode == "cprofile":
+        _session["cprofile"].disable()
+        cprofile_path = report_path + ".prof"
+        _session["cprofile"].dump_stats(cprofile_path)
+        report["cprofile_stats"] = cprofile_path
+
+    if extra:
+        report.update(extra)
+
+    with open(report_path, "w") as f:
+        json.dump(report, f, indent=2)
+    _session["mode"] = None
+    return report
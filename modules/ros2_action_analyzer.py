@@ -1,15 +1,60 @@
-import os, re
+import os, re, fnmatch
 from typing import Any
-
-
-def ros2_action_analyzer(ros2_package_abs_path: str) -> list[Any]:
+from modules import profiler
+from modules.specs import ActionSpec, FieldSpec
+
+# .actionファイルの探索を省略するディレクトリ名. 隠しディレクトリも探索しない
+DEFAULT_IGNORE_DIR_NAMES = frozenset([
+    'build',
+    'install',
+    'log',
+    'node_modules',
+    '__pycache__',
+    'venv',
+])
+
+# このファイルがあるディレクトリ以下は探索しない
+IGNORE_MARKER_FILES = ('COLCON_IGNORE', 'AMENT_IGNORE')
+
+# ros_typeからc_typeへの変換表
+ROS_TYPE_TO_C_TYPE = {
+    'uint8': 'uint8_t',
+    'int8': 'int8_t',
+    'uint16': 'uint16_t',
+    'int16': 'int16_t',
+    'uint32': 'uint32_t',
+    'int32': 'int32_t',
+    'uint64': 'uint64_t',
+    'int64': 'int64_t',
+    'byte': 'uint8_t',
+    'char': 'char',
+    'wstring': 'std::u16string',
+    'float32': 'float',
+    'float64': 'double',
+    'string': 'std::string',
+    'bool': 'bool'
+}
+
+CONSTANT_NAME_PATTERN = re.compile(r'[A-Z0-9_]+')
+UNIT_PATTERN = re.compile(r'\[([^\]]*)\]')
+# 型名. 例: float64, string<=32, geometry_msgs/Pose, float64[], int32[<=5], uint8[16]
+ROS_TYPE_PATTERN = re.compile(r'([\w/]+)(?:<=\d+)?(?:\[(<=)?(\d*)\])?')
+
+# resolve_c_type の結果のキャッシュ. msg の索引を使わない場合に使う
+_resolved_c_types = {}
+
+# install 空間で pkg ごとのインターフェースの一覧が置かれるディレクトリ
+AMENT_INDEX_INTERFACES_DIR = os.path.join('share', 'ament_index', 'resource_index', 'rosidl_interfaces')
+
+
+def ros2_action_analyzer(ros2_package_abs_path: str) -> list[ActionSpec]:
     """ ros2 action の内容を解析する
 
     Args:
         ros2_package_abs_path (str): 解析対象のros2 pkgの絶対パス
 
     Returns:
-        list[Any]: 解析結果
+        list[ActionSpec]: 解析結果
     """
     pkg_directory = os.path.expanduser(ros2_package_abs_path)
     action_files = pick_action_rel_path(pkg_directory)
@@ -21,178 +66,504 @@ def ros2_action_analyzer(ros2_package_abs_path: str) -> list[Any]:
     return result
 
 
-def pick_action_rel_path(pkg_directory: str) -> list[str]:
+@profiler.timed("discovery")
+def pick_action_rel_path(
+    pkg_directory: str,
+    ignore_dir_names: list[str] = [],
+    action_dir_only: bool = False,
+) -> list[str]:
     """ ros2 pkgのディレクトリから.actionファイルのpkgのディレクトリからの相対パスを取得する
 
+    build/, install/, log/ や隠しディレクトリなどの探索は省略し,
+    COLCON_IGNORE または AMENT_IGNORE があるディレクトリ以下も探索しない.
+
     Args:
         pkg_directory (str): 探索対象のros2 pkgのディレクトリ
+        ignore_dir_names (list[str], optional): 追加で探索を省略するディレクトリ名. デフォルト値は[].
+        action_dir_only (bool, optional): pkg直下のaction/のみを探索する. デフォルト値はFalse.
 
     Returns:
         List[str]: .actionファイルのpkgのディレクトリからの相対パス
     """
+    ignore_dir_names = DEFAULT_IGNORE_DIR_NAMES.union(ignore_dir_names)
+
+    if action_dir_only:
+        if has_ignore_marker(pkg_directory):
+            return []
+        stack = [(os.path.join(pkg_directory, 'action'), 'action')]
+    else:
+        stack = [(pkg_directory, '')]
+
     action_files = []
-    for root, _, files in os.walk(pkg_directory):
-        for file in files:
-            if file.endswith('.action'):
-                path = os.path.join(root, file)
+    while stack:
+        directory, rel_directory = stack.pop()
+        try:
+            entries = list(os.scandir(directory))
+        except OSError:
+            continue
+
+        sub_directories = []
+        files = []
+        ignored = False
+        for entry in entries:
+            name = entry.name
+            if name in IGNORE_MARKER_FILES:
+                ignored = True
+                break
+            if name.endswith('.action'):
+                if entry.is_file():
+                    files.append(os.path.join(rel_directory, name))
+            elif not action_dir_only and entry.is_dir(follow_symlinks=False):
+                if not name.startswith('.') and name not in ignore_dir_names:
+                    sub_directories.append((entry.path, os.path.join(rel_directory, name)))
+        if ignored:
+            continue
+
+        action_files += files
+        stack += sub_directories
+
+    action_files.sort()
+    profiler.count("action_files_found", len(action_files))
+    return action_files
+
+
+def get_ament_prefix_paths(ament_prefix_path: list[str] = []) -> list[str]:
+    """ament の install 空間のプレフィックスの一覧を取得する
+
+    Args:
+        ament_prefix_path (list[str], optional): プレフィックスの一覧. 空の場合は環境変数 AMENT_PREFIX_PATH を使う. デフォルト値は[].
+
+    Returns:
+        list[str]: プレフィックスの一覧. 先頭ほど優先される (overlay が先)
+    """
+    if not ament_prefix_path:
+        ament_prefix_path = os.environ.get('AMENT_PREFIX_PATH', '').split(os.pathsep)
+    return [os.path.expanduser(path) for path in ament_prefix_path if path]
+
+
+def find_ament_index_pkg_paths(
+    ament_prefix_paths: list[str], pkg_name_patterns: list[str] = ['*']
+) -> list[str]:
+    """ament index から .actionファイルを持つ ros2 pkg の share ディレクトリを列挙する
+
+    ソースツリーを探索せずに, install 空間の rosidl_interfaces の一覧だけを読む.
+    同じ pkg が複数のプレフィックスにある場合は先のプレフィックスのものを使う.
+
+    Args:
+        ament_prefix_paths (list[str]): install 空間のプレフィックスの一覧
+        pkg_name_patterns (list[str], optional): 対象とする pkg 名の glob パターン. デフォルト値は['*'].
+
+    Returns:
+        list[str]: ros2 pkg の share ディレクトリ (<prefix>/share/<pkg>) のリスト
+    """
+    pkg_paths = []
+    found_pkg_names = set()
+    for prefix in ament_prefix_paths:
+        index_directory = os.path.join(prefix, AMENT_INDEX_INTERFACES_DIR)
+        try:
+            pkg_names = sorted(os.listdir(index_directory))
+        except OSError:
+            continue
+        for pkg_name in pkg_names:
+            if pkg_name in found_pkg_names:
+                continue
+            if not any(fnmatch.fnmatchcase(pkg_name, pattern) for pattern in pkg_name_patterns):
+                continue
+            found_pkg_names.add(pkg_name)
+            pkg_path = os.path.join(prefix, 'share', pkg_name)
+            if pick_action_rel_path_from_ament_index(pkg_path):
+                pkg_paths.append(pkg_path)
+    return pkg_paths
+
+
+@profiler.timed("discovery")
+def pick_action_rel_path_from_ament_index(pkg_share_directory: str) -> list[str]:
+    """ament index から ros2 pkg の .actionファイルの share ディレクトリからの相対パスを取得する
+
+    Args:
+        pkg_share_directory (str): ros2 pkg の share ディレクトリ (<prefix>/share/<pkg>)
 
-                action_files.append(os.path.relpath(path, pkg_directory))
+    Returns:
+        list[str]: .actionファイルの share ディレクトリからの相対パス
+    """
+    pkg_share_directory = os.path.normpath(pkg_share_directory)
+    pkg_name = os.path.basename(pkg_share_directory)
+    prefix = os.path.dirname(os.path.dirname(pkg_share_directory))
+    index_file_path = os.path.join(prefix, AMENT_INDEX_INTERFACES_DIR, pkg_name)
+    try:
+        with open(index_file_path, 'r') as f:
+            content = f.read()
+    except OSError:
+        return []
+    profiler.count_read(content)
+
+    # 各行は share ディレクトリからの相対パス (例: action/Fibonacci.action)
+    action_files = sorted(
+        line.strip() for line in content.splitlines() if line.strip().endswith('.action')
+    )
+    profiler.count("action_files_found", len(action_files))
     return action_files
 
 
-def analize_action(pkg_directory: str, action_rel_path: str) -> dict[str, Any]:
+@profiler.timed("msg_index")
+def build_msg_type_index(
+    pkg_directories: list[str], ament_prefix_paths: list[str] = []
+) -> dict[str, Any]:
+    """ワークスペースから参照できる .msg ファイルの索引を作成する
+
+    ソースの ros2 pkg は msg/ ディレクトリの一覧を, install 空間は ament index の
+    rosidl_interfaces の一覧を読むだけで, .msg ファイル自体は読まない.
+    同じ pkg がソースと install 空間の両方にある場合はソースのものを使う.
+
+    Args:
+        pkg_directories (list[str]): ソースの ros2 pkg のディレクトリのリスト
+        ament_prefix_paths (list[str], optional): install 空間のプレフィックスの一覧. デフォルト値は[].
+
+    Returns:
+        dict[str, Any]: 索引
+            {"packages": {pkg_name: {msg_name: .msgファイルのパス}},
+             "resolved": {(ros_type, pkg_name): c_type}: resolve_c_type の結果のキャッシュ}
+    """
+    packages = {}
+    for pkg_directory in pkg_directories:
+        pkg_directory = os.path.normpath(os.path.expanduser(pkg_directory))
+        pkg_name = os.path.basename(pkg_directory)
+        msg_directory = os.path.join(pkg_directory, 'msg')
+        try:
+            names = sorted(os.listdir(msg_directory))
+        except OSError:
+            continue
+        msg_types = {
+            name[:-len('.msg')]: os.path.join(msg_directory, name)
+            for name in names if name.endswith('.msg')
+        }
+        if msg_types and pkg_name not in packages:
+            packages[pkg_name] = msg_types
+
+    for prefix in ament_prefix_paths:
+        index_directory = os.path.join(prefix, AMENT_INDEX_INTERFACES_DIR)
+        try:
+            pkg_names = sorted(os.listdir(index_directory))
+        except OSError:
+            continue
+        for pkg_name in pkg_names:
+            if pkg_name in packages:
+                continue
+            try:
+                with open(os.path.join(index_directory, pkg_name), 'r') as f:
+                    content = f.read()
+            except OSError:
+                continue
+            profiler.count_read(content)
+            # 各行は share ディレクトリからの相対パス (例: msg/Pose.msg)
+            msg_types = {}
+            for line in content.splitlines():
+                line = line.strip()
+                if line.startswith('msg/') and line.endswith('.msg'):
+                    msg_types[line[len('msg/'):-len('.msg')]] = os.path.join(
+                        prefix, 'share', pkg_name, line)
+            if msg_types:
+                packages[pkg_name] = msg_types
+
+    profiler.count("msg_types_indexed", sum(len(types) for types in packages.values()))
+    return {'packages': packages, 'resolved': {}}
+
+
+def resolve_c_type(
+    ros_type: str, ros2_pkg_name: str = '', msg_type_index: dict[str, Any] | None = None
+) -> str | None:
+    """ros の型名を C++ の型名に変換する. 結果は型名と pkg 名ごとにキャッシュする
+
+    - 基本型: float64 -> double, string<=32 -> std::string
+    - msg 型: geometry_msgs/Pose, geometry_msgs/msg/Pose -> geometry_msgs::msg::Pose
+    - pkg 名のない msg 型: 索引にある同じ pkg の msg のみ変換する
+    - 配列: T[], T[<=N] -> std::vector<T>, T[N] -> std::array<T, N>
+
+    Args:
+        ros_type (str): .actionファイルの型名
+        ros2_pkg_name (str, optional): .actionファイルのあるros2 pkg名. デフォルト値は''.
+        msg_type_index (dict[str, Any] | None, optional): build_msg_type_index の索引.
+            None の場合は pkg 名のある msg 型をそのまま変換する. デフォルト値はNone.
+
+    Raises:
+        ValueError: 索引にある pkg に存在しない msg 型の場合
+
+    Returns:
+        str | None: C++ の型名. 変換できない場合は None
+    """
+    cache = _resolved_c_types if msg_type_index is None else msg_type_index['resolved']
+    key = (ros_type, ros2_pkg_name)
+    if key in cache:
+        return cache[key]
+
+    c_type = None
+    type_match = ROS_TYPE_PATTERN.fullmatch(ros_type)
+    if type_match is not None:
+        base_type, bounded, array_size = type_match.groups()
+        c_type = resolve_base_c_type(base_type, ros2_pkg_name, msg_type_index)
+        if c_type is not None and '[' in ros_type:
+            if bounded or not array_size:
+                c_type = f'std::vector<{c_type}>'
+            else:
+                c_type = f'std::array<{c_type}, {array_size}>'
+
+    cache[key] = c_type
+    return c_type
+
+
+def resolve_base_c_type(
+    base_type: str, ros2_pkg_name: str, msg_type_index: dict[str, Any] | None
+) -> str | None:
+    """配列と上限を除いた ros の型名を C++ の型名に変換する
+
+    Args:
+        base_type (str): 配列と上限を除いた型名
+        ros2_pkg_name (str): .actionファイルのあるros2 pkg名
+        msg_type_index (dict[str, Any] | None): build_msg_type_index の索引
+
+    Raises:
+        ValueError: 索引にある pkg に存在しない msg 型の場合
+
+    Returns:
+        str | None: C++ の型名. 変換できない場合は None
+    """
+    c_type = ROS_TYPE_TO_C_TYPE.get(base_type)
+    if c_type is not None:
+        return c_type
+
+    parts = base_type.split('/')
+    if len(parts) == 1:
+        pkg_name, msg_name = ros2_pkg_name, parts[0]
+        if msg_type_index is None or msg_name not in msg_type_index['packages'].get(pkg_name, {}):
+            return None
+    elif len(parts) == 2 or (len(parts) == 3 and parts[1] == 'msg'):
+        pkg_name, msg_name = parts[0], parts[-1]
+        if msg_type_index is not None:
+            msg_types = msg_type_index['packages'].get(pkg_name)
+            if msg_types is not None and msg_name not in msg_types:
+                raise ValueError(
+                    '[ros2_action_analyzer] Unknown message type: ' + base_type)
+    else:
+        return None
+    return f'{pkg_name}::msg::{msg_name}'
+
+
+def has_ignore_marker(directory: str) -> bool:
+    """ディレクトリに COLCON_IGNORE または AMENT_IGNORE があるかどうかを判定する
+
+    Args:
+        directory (str): 判定するディレクトリ
+
+    Returns:
+        bool: 探索を省略するマーカーがある場合 True
+    """
+    return any(
+        os.path.exists(os.path.join(directory, marker)) for marker in IGNORE_MARKER_FILES
+    )
+
+
+def is_action_rel_path_included(
+    pkg_directory: str,
+    action_rel_path: str,
+    ignore_dir_names: list[str] = [],
+    action_dir_only: bool = False,
+) -> bool:
+    """.actionファイルが pick_action_rel_path の探索対象に含まれるかどうかを判定する
+
+    Args:
+        pkg_directory (str): ros2 pkgのディレクトリ
+        action_rel_path (str): .actionファイルのpkgのディレクトリからの相対パス
+        ignore_dir_names (list[str], optional): 追加で探索を省略するディレクトリ名. デフォルト値は[].
+        action_dir_only (bool, optional): pkg直下のaction/のみを探索する. デフォルト値はFalse.
+
+    Returns:
+        bool: 探索対象に含まれる場合 True
+    """
+    rel_directory = os.path.dirname(action_rel_path)
+    rel_directories = rel_directory.split(os.sep) if rel_directory else []
+    if action_dir_only and rel_directories != ['action']:
+        return False
+
+    ignore_dir_names = DEFAULT_IGNORE_DIR_NAMES.union(ignore_dir_names)
+    directory = pkg_directory
+    if has_ignore_marker(directory):
+        return False
+    for name in rel_directories:
+        if name.startswith('.') or name in ignore_dir_names:
+            return False
+        directory = os.path.join(directory, name)
+        if has_ignore_marker(directory):
+            return False
+    return True
+
+
+@profiler.timed("parse")
+def analize_action(
+    pkg_directory: str, action_rel_path: str, msg_type_index: dict[str, Any] | None = None
+) -> ActionSpec:
     """ .actionファイルの内容を解析する
 
+    ファイルを1回だけ読み, 各行を1回の走査で goal, result, feedback に振り分けて解析する
+
     Args:
         pkg_directory (str): .actionファイルのあるros2 pkgのディレクトリ
         action_rel_path (str): .actionファイルのpkgのディレクトリからの相対パス
+        msg_type_index (dict[str, Any] | None, optional): msg 型の解決に使う build_msg_type_index の索引. デフォルト値はNone.
 
     Returns:
-        dict[str, Any]: 解析結果
-            {"ros2_action_name": str}: アクション名
-            {"goal": [{"var_name": str, "var_c_type": str, "unit": str}]}: goalのメンバ変数
-            {"result": [{"var_name": str, "var_c_type": str, "unit": str}]}: resultのメンバ変数
-            {"feedback": [{"var_name": str, "var_c_type": str, "unit": str}]}: feedbackのメンバ変数
+        ActionSpec: 解析結果. bt plugin の名前は空のまま
     """
 
-    # actionファイルの各行の内容を取得
+    # actionファイルの内容を取得
     action_file_path = os.path.join(pkg_directory, action_rel_path)
     with open(action_file_path, 'r') as f:
-        lines = f.readlines()
-
-    # 各行の先頭のスペースをと行末の改行を削除
-    lines = [line.strip() for line in lines]
+        content = f.read()
+    profiler.count_read(content)
 
-    # 各行の先頭が#で始まる行を削除
-    lines = [line for line in lines if not line.startswith('#')]
+    # goal, result, feedbackのメンバ変数を解析
+    sections = [[], [], []]
+    ros2_pkg_name = os.path.basename(os.path.normpath(pkg_directory))
+    for section_index, member in iter_action_members(
+        content, action_file_path, ros2_pkg_name, msg_type_index
+    ):
+        sections[section_index].append(member)
+
+    return ActionSpec(
+        ros2_action_name=os.path.splitext(os.path.basename(action_rel_path))[0],
+        goal=tuple(sections[0]),
+        result=tuple(sections[1]),
+        feedback=tuple(sections[2]),
+        action_path=action_file_path,
+        ros2_pkg_name=ros2_pkg_name,
+    )
+
+
+def iter_action_members(
+    content: str,
+    action_file_path: str = '',
+    ros2_pkg_name: str = '',
+    msg_type_index: dict[str, Any] | None = None,
+):
+    """.actionファイルの内容を1行ずつ走査し, メンバ変数を順に返す
 
-    # 空行を削除
-    lines = [line for line in lines if line]
+    Args:
+        content (str): .actionファイルの内容
+        action_file_path (str, optional): エラーメッセージに使う.actionファイルのパス. デフォルト値は''.
+        ros2_pkg_name (str, optional): .actionファイルのあるros2 pkg名. デフォルト値は''.
+        msg_type_index (dict[str, Any] | None, optional): build_msg_type_index の索引. デフォルト値はNone.
 
-    # 要素'---'でリストを分割
-    splited_lines = split_list(lines, '---')
+    Raises:
+        ValueError
 
-    if len(splited_lines) != 3:
+    Yields:
+        tuple[int, FieldSpec]: セクションの番号 (0: goal, 1: result, 2: feedback) とメンバ変数
+    """
+    section_index = 0
+    for line in content.splitlines():
+        line = line.strip()
+
+        # 空行とコメント行を無視
+        if not line or line[0] == '#':
+            continue
+
+        # '---' でセクションを区切る
+        if line == '---':
+            section_index += 1
+            if section_index > 2:
+                raise ValueError(
+                    '[ros2_action_analyzer] Invalid .action file format: ' +
+                    action_file_path)
+            continue
+
+        member = analize_action_member(line, ros2_pkg_name, msg_type_index)
+        if member is not None:
+            yield section_index, member
+
+    if section_index != 2:
         raise ValueError(
             '[ros2_action_analyzer] Invalid .action file format: ' +
             action_file_path)
 
-    # action nameを抽出
-    result = {'ros2_action_name': os.path.splitext(os.path.basename(action_rel_path))[0]}
-
-    # goal, result, feedbackのメンバ変数を解析
-    keys = ['goal', 'result', 'feedback']
-    for i in range(3):
-        result[keys[i]] = []
-        for j in range(len(splited_lines[i])):
-            result[keys[i]].append(analize_action_member(splited_lines[i][j]))
-        result[keys[i]] = [item for item in result[keys[i]] if item]
-    return result
-
 
-def analize_action_member(action_member_line: str) -> dict[str, str]:
+def analize_action_member(
+    action_member_line: str,
+    ros2_pkg_name: str = '',
+    msg_type_index: dict[str, Any] | None = None,
+) -> FieldSpec | None:
     """actionのメンバ変数を解析する
 
     Args:
         action_member_line (str): .actionファイルのメンバ変数の行
+        ros2_pkg_name (str, optional): .actionファイルのあるros2 pkg名. デフォルト値は''.
+        msg_type_index (dict[str, Any] | None, optional): build_msg_type_index の索引. デフォルト値はNone.
 
     Returns:
-        dict[str, str]: 解析結果
-            {"var_name": str} : メンバ変数名
-            {"var_c_type": str} : メンバ変数のC言語の型
-            {"unit": str} : メンバ変数の単位
-        None : 解析失敗時
+        FieldSpec | None: 解析結果. 定数の行, または型が不明な場合は None
     """
-    
-    # ros_typeをc_typeに変換
-    ros_type_to_c_type = {
-        'uint8': 'uint8_t',
-        'int8': 'int8_t',
-        'uint16': 'uint16_t',
-        'int16': 'int16_t',
-        'uint32': 'uint32_t',
-        'int32': 'int32_t',
-        'uint64': 'uint64_t',
-        'int64': 'int64_t',
-        'byte': 'uint8_t',
-        'char': 'char',
-        'wstring': 'std::u16string',
-        'float32': 'float',
-        'float64': 'double',
-        'string': 'std::string',
-        'bool': 'bool'
-    }
-    
-    if re.fullmatch(r'[A-Z0-9_]+', action_member_line.strip().split(' ')[1]):
-        # 定数の行は無視
-        return None
-    elif not action_member_line.strip().split(' ')[0] in ros_type_to_c_type.keys():
-        # ros_typeが不明な場合は無視
-        return None
 
-    # 面部変数の行を最初の#で分割
-    splited_line = action_member_line.split('#', 1)
-    if len(splited_line) != 1 and len(splited_line) != 2:
-        raise ValueError(
-            '[ros2_action_analyzer] Invalid .action file format: ' +
-            action_member_line)
+    # 変数定義部分とコメントを分割
+    declaration, comment = split_comment(action_member_line)
 
-    # 変数定義部分をtypeとnameに分割
-    vars_str = splited_line[0].split(' ')
-    vars_str = [var_str for var_str in vars_str if var_str]
-    if len(vars_str) != 2:
+    # 変数定義部分を type, name, default値 に分割. default値は生成に使わないため読み捨てる
+    vars_str = declaration.split(None, 2)
+    if len(vars_str) < 2:
         raise ValueError(
             '[ros2_action_analyzer] Invalid .action declare format: ' +
             action_member_line)
-    [ros_type, var_name] = vars_str
+    ros_type, var_name = vars_str[0], vars_str[1]
+
+    if '=' in var_name or (len(vars_str) == 3 and vars_str[2][0] == '='):
+        # 定数の行は無視
+        return None
+    elif CONSTANT_NAME_PATTERN.fullmatch(var_name):
+        # 大文字の名前は定数とみなして無視
+        return None
 
-    c_type = ros_type_to_c_type[ros_type]
+    c_type = resolve_c_type(ros_type, ros2_pkg_name, msg_type_index)
+    if c_type is None:
+        # ros_typeが不明な場合は無視
+        return None
 
     # コメントから単位を抽出
     unit = None
-    if len(splited_line) == 2:
-        if splited_line[1].count('[') > 1 or splited_line[1].count(']') > 1:
-            raise ValueError(
-                '[ros2_action_analyzer] Invalid .action comment format: ' +
-                splited_line[1])
-        unit_origin = re.findall(r'\[([^\]]*)\]', splited_line[1])
-        if len(unit_origin) > 1:
+    if comment is not None:
+        if comment.count('[') > 1 or comment.count(']') > 1:
             raise ValueError(
                 '[ros2_action_analyzer] Invalid .action comment format: ' +
-                splited_line[1])
-        elif len(unit_origin) == 1:
-            unit_origin = unit_origin[0].strip()
-            # スペースを '_' に変換
-            unit_origin = unit_origin.replace(' ', '_')
-            # スラッシュを '_per_' に変換
-            unit_origin = unit_origin.replace('/', '_per_')
-            unit = unit_origin
-    return {'var_name': var_name, 'var_c_type': c_type, 'unit': unit}
+                comment)
+        unit_match = UNIT_PATTERN.search(comment)
+        if unit_match is not None:
+            unit_origin = unit_match.group(1).strip()
+            # スペースを '_' に変換, スラッシュを '_per_' に変換
+            unit = unit_origin.replace(' ', '_').replace('/', '_per_')
+    return FieldSpec(var_name, c_type, unit)
 
 
-def split_list(input_list: list[Any], delimiter: Any) -> list[list[Any]]:
-    """リストを特定の要素で分割する
+def split_comment(line: str) -> tuple[str, str | None]:
+    """行を変数定義部分とコメントに分割する. 文字列のデフォルト値の中の # はコメントとみなさない
 
     Args:
-        input_list (list[Any]): 分割対象のリスト
-        delimiter (Any): 分割する要素
+        line (str): .actionファイルの行
 
     Returns:
-        list[list[Any]]: 分割結果
+        tuple[str, str | None]: 変数定義部分と, '#' より後のコメント. コメントがない場合は None
     """
-    result = []
-    current_chunk = []
-
-    for item in input_list:
-        if item == delimiter:
-            result.append(current_chunk)
-            current_chunk = []
-        else:
-            current_chunk.append(item)
-
-    result.append(current_chunk)
-
-    return result
+    if '#' not in line:
+        return line, None
+    if '"' not in line and "'" not in line:
+        declaration, _, comment = line.partition('#')
+        return declaration, comment
+
+    quote = None
+    for i, char in enumerate(line):
+        if quote is not None:
+            if char == quote and line[i - 1] != '\\':
+                quote = None
+        elif char == '"' or char == "'":
+            quote = char
+        elif char == '#':
+            return line[:i], line[i + 1:]
+    return line, None
 
 
 if __name__ == '__main__':
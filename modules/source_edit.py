@@ -0,0 +1,112 @@
+from dataclasses import dataclass, field
+
+# 元の文字列に対する置換の範囲を集め, 最後に1回だけ新しい文字列を作成する.
+# 置換の位置はすべて元の文字列の位置で指定するため, 前の置換で後の位置がずれることはない.
+# 置換のたびに文字列全体を作り直したり, str.replace で同じ文字列の別の箇所まで置換したりしない.
+
+
+class EditConflictError(ValueError):
+    """置換の範囲が重なっている"""
+
+
+@dataclass(frozen=True, slots=True)
+class Edit:
+    """元の文字列の [start, end) を text に置換する. start == end の場合は挿入"""
+
+    start: int
+    end: int
+    text: str
+
+
+@dataclass(slots=True)
+class EditBatch:
+    """1つの文字列に対する置換の集まり"""
+
+    source: str
+    edits: list[Edit] = field(default_factory=list)
+
+    def replace(self, start: int, end: int, text: str):
+        """元の文字列の [start, end) を text に置換する
+
+        Args:
+            start (int): 置換の開始位置
+            end (int): 置換の終了位置
+            text (str): 置換後の文字列
+
+        Raises:
+            ValueError: 範囲が元の文字列の外にある場合
+        """
+        if not 0 <= start <= end <= len(self.source):
+            raise ValueError(f"Invalid edit range [{start}, {end}) for {len(self.source)} characters")
+        self.edits.append(Edit(start, end, text))
+
+    def insert(self, position: int, text: str):
+        """元の文字列の position に text を挿入する
+
+        Args:
+            position (int): 挿入する位置
+            text (str): 挿入する文字列
+        """
+        self.replace(position, position, text)
+
+    def add(self, edit: Edit | None):
+        """作成済みの置換を追加する. None の場合は何もしない
+
+        Args:
+            edit (Edit | None): 置換
+        """
+        if edit is not None:
+            self.replace(edit.start, edit.end, edit.text)
+
+    def extend(self, edits: list[Edit | None]):
+        """作成済みの置換をまとめて追加する. None は無視する
+
+        Args:
+            edits (list[Edit | None]): 置換
+        """
+        for edit in edits:
+            self.add(edit)
+
+    def apply(self) -> str:
+        """すべての置換を適用した文字列を作成する
+
+        同じ位置への挿入は追加した順に並べる.
+
+        Returns:
+            str: 置換後の文字列
+
+        Raises:
+            EditConflictError: 置換の範囲が重なっている場合
+        """
+        # sorted は安定なので, 同じ位置への挿入は追加した順のまま並ぶ
+        edits = sorted(self.edits, key=lambda edit: (edit.start, edit.end))
+        pieces = []
+        position = 0
+        for edit in edits:
+            if edit.start < position:
+                raise EditConflictError(
+                    f"Edit [{edit.start}, {edit.end}) overlaps the previous edit ending at {position}"
+                )
+            pieces.append(self.source[position : edit.start])
+            pieces.append(edit.text)
+            position = edit.end
+        pieces.append(self.source[position:])
+        return "".join(pieces)
+
+
+def apply_edits(source: str, edits: list[Edit | None]) -> str:
+    """置換をまとめて適用する
+
+    Args:
+        source (str): 元の文字列
+        edits (list[Edit | None]): 置換. None は無視する
+
+    Returns:
+        str: 置換後の文字列
+
+    Raises:
+        EditConflictError: 置換の範囲が重なっている場合
+    """
+    batch = EditBatch(source)
+    batch.extend(edits)
+    return batch.apply()
@@ -0,0 +1,71 @@
+from dataclasses import dataclass, field
+
+# 解析結果と bt plugin 情報の型. すべて不変で, __slots__ により1件あたりのメモリを抑える.
+# 解析から生成, bt ソースと btproj の編集まで同じオブジェクトを受け渡し, プロセスプールにもそのまま渡せる.
+
+
+@dataclass(frozen=True, slots=True)
+class FieldSpec:
+    """action の goal, result, feedback のメンバ変数"""
+
+    var_name: str
+    var_c_type: str
+    unit: str | None = None
+    # bt のポート名. 単位がある場合は "<var_name>__<unit>"
+    bt_arg_name: str = field(init=False, compare=False)
+
+    def __post_init__(self):
+        bt_arg_name = self.var_name
+        if self.unit is not None:
+            bt_arg_name += f"__{self.unit}"
+        object.__setattr__(self, "bt_arg_name", bt_arg_name)
+
+
+@dataclass(frozen=True, slots=True)
+class ActionSpec:
+    """.action ファイルの解析結果と生成する bt plugin の名前"""
+
+    ros2_action_name: str
+    goal: tuple[FieldSpec, ...]
+    result: tuple[FieldSpec, ...]
+    feedback: tuple[FieldSpec, ...]
+    # .action ファイルのパス
+    action_path: str = ""
+    ros2_pkg_name: str = ""
+    bt_plugin_file_name: str = ""
+    bt_action_name: str = ""
+
+
+@dataclass(frozen=True, slots=True)
+class PortSpec:
+    """bt のポート. c_name は default 引数をとる入力ポートのコンストラクタの引数名"""
+
+    name: str | None
+    type: str | None = None
+    c_name: str | None = None
+
+
+@dataclass(frozen=True, slots=True)
+class PluginSpec:
+    """bt ソースと btproj の編集に使う bt plugin の情報"""
+
+    action_class_name: str
+    ros2_action_name: str
+    non_default_input_ports: tuple[PortSpec, ...] = ()
+    default_input_ports: tuple[PortSpec, ...] = ()
+    output_ports: tuple[PortSpec, ...] = ()
+
+
+@dataclass(frozen=True, slots=True)
+class NamedAction:
+    """bt ソースの named action list の1行を1つの action class に適用したもの"""
+
+    class_name: str
+    instance_name: str
+    # コンストラクタに渡す default 引数. ((引数名, 値), ...)
+    args: tuple[tuple[str, str], ...] = ()
+    # bt に登録する class 名. "<instance_name><class_name>"
+    action_name: str = field(init=False, compare=False)
+
+    def __post_init__(self):
+        object.__setattr__(self, "action_name", self.instance_name + self.class_name)
@@ -1,8 +1,28 @@
-from modules import ros2_action_analyzer
-from modules import bt_action_cpp_generator
-from modules import name_generator
+import sys
+
+# modules は dataclass の slots=True と "X | None" の型注釈を使うため, import する前に確認する
+if sys.version_info < (3, 10):
+    sys.exit("ros2-bt-action-generator requires Python 3.10 or later.")
+
+from modules import bt_plugin_pipeline
 from modules import bt_node_generator
-import os, argparse, json, glob
+from modules import file_writer
+from modules import bt_watch
+from modules import profiler
+import os, argparse, json
+
+
+def flush_staged_files(dry_run: bool):
+    """保持している書き込みを反映する. dry_run の場合は反映せずに unified diff を出力する
+
+    Args:
+        dry_run (bool): 反映せずに unified diff を出力する
+    """
+    if dry_run:
+        sys.stdout.write(file_writer.staged_diff())
+        file_writer.discard_staged()
+    else:
+        file_writer.commit_staged()
 
 if __name__ == "__main__":
     script_dir = os.path.dirname(os.path.abspath(__file__))
@@ -13,7 +33,6 @@ if __name__ == "__main__":
 
     # ArgumentParserを作成
     parser = argparse.ArgumentParser(description="Process some configurations.")
-    parser = argparse.ArgumentParser(description="Process some configurations.")
     parser.add_argument(
         "-c",
         "--config",
@@ -36,9 +55,81 @@ if __name__ == "__main__":
         help="generate bt source file and node tree models",
     )
 
+    parser.add_argument(
+        "-j",
+        "--jobs",
+        type=int,
+        default=1,
+        help="number of parallel jobs for --plugin (0: number of CPUs, default: 1)",
+    )
+
+    parser.add_argument(
+        "--force",
+        action="store_true",
+        help="ignore the build manifest and regenerate every bt plugin file",
+    )
+
+    parser.add_argument(
+        "--prune",
+        action="store_true",
+        help="remove bt plugin files whose .action file was removed",
+    )
+
+    parser.add_argument(
+        "--dry-run",
+        action="store_true",
+        help="print a unified diff of the files that would be written instead of writing them",
+    )
+
+    parser.add_argument(
+        "--explain-policy",
+        action="store_true",
+        help="print how every goal/result field is treated (ignored, default argument, required) and which rule decided it, then exit",
+    )
+
+    parser.add_argument(
+        "-w",
+        "--watch",
+        action="store_true",
+        help="generate everything, then watch the inputs and regenerate only affected outputs",
+    )
+
+    parser.add_argument(
+        "--profile",
+        type=str,
+        default=None,
+        metavar="REPORT_JSON",
+        help="write a JSON report with per-stage wall time, file counts, bytes read/written and peak memory",
+    )
+
+    parser.add_argument(
+        "--profile-mode",
+        type=str,
+        default="timers",
+        choices=["timers", "cprofile", "tracemalloc"],
+        help="additionally run under cProfile (REPORT_JSON.prof) or tracemalloc (default: timers)",
+    )
+
     # 引数を解析
     args = parser.parse_args()
 
+    # --watch は -p と -b の処理をすべて実行し, 変更のたびに書き込むため, これらの引数とは組み合わせない
+    if args.watch:
+        watch_conflicts = [
+            name
+            for name, specified in (
+                ("--plugin", args.plugin),
+                ("--bt", args.bt),
+                ("--jobs", args.jobs != 1),
+                ("--force", args.force),
+                ("--prune", args.prune),
+                ("--dry-run", args.dry_run),
+            )
+            if specified
+        ]
+        if watch_conflicts:
+            parser.error(f"--watch cannot be combined with {', '.join(watch_conflicts)}")
+
     # 設定ファイルのパスを取得
     config_file_path = args.config
 
@@ -47,54 +138,63 @@ if __name__ == "__main__":
         # JSONデータを読み込む
         config = json.load(file)
 
-    if args.plugin:
-
-        ros2_pkg_paths = []
-        for path in config["ros2_package_abs_path"]:
-            ros2_pkg_paths += [
-                d for d in glob.glob(os.path.expanduser(path)) if os.path.isdir(d)
-            ]
-
-        for ros2_pkg_path in ros2_pkg_paths:
-
-            # ros2 action の解析
-            actions = ros2_action_analyzer.ros2_action_analyzer(ros2_pkg_path)
-
-            # ros2 pkg name の取得
-            ros2_pkg_name = os.path.basename(ros2_pkg_path)
-            # パスの末尾がスラッシュで終わっている場合を考慮
-            if ros2_pkg_name == "":
-                ros2_pkg_name = os.path.basename(os.path.dirname(ros2_pkg_path))
-
-            for action in actions:
-                action["bt_plugin_file_name"] = (
-                    name_generator.generate_bt_plugin_file_name(
-                        ros2_pkg_name,
-                        action["ros2_action_name"],
-                        config["bt_plugin_file_name_exclude_words"],
-                    )
-                )
-                action["bt_action_name"] = name_generator.generate_bt_action_name(
-                    ros2_pkg_name,
-                    action["ros2_action_name"],
-                    config["bt_action_name_exclude_words"],
-                )
-
-            bt_action_cpp_generator.bt_action_cpp_generator(
+    if args.explain_policy:
+        policy_result = bt_plugin_pipeline.explain_argument_policy(config)
+        for line in policy_result["lines"]:
+            print(line)
+        for error in policy_result["errors"]:
+            print(error, file=sys.stderr)
+        sys.exit(1 if policy_result["errors"] else 0)
+
+    if args.profile:
+        profiler.start_session(args.profile_mode)
+
+    if args.watch:
+        bt_watch.bt_watch(config)
+
+    else:
+        # すべての書き込みをメモリ上に保持し, 最後にまとめて反映する
+        file_writer.begin_staging()
+        generated_plugins_info = None
+
+        if args.plugin:
+            pipeline_result = bt_plugin_pipeline.bt_plugin_pipeline(
+                config, args.jobs, args.force, args.prune
+            )
+            write_counts = file_writer.get_write_counts()
+            print(
+                f'bt plugin files: {write_counts["changed"]} changed, '
+                f'{write_counts["unchanged"]} unchanged'
+            )
+            for error in pipeline_result["errors"]:
+                print(error, file=sys.stderr)
+            if pipeline_result["errors"]:
+                # エラーのなかった pkg の bt plugin は反映する
+                flush_staged_files(args.dry_run)
+                if args.profile:
+                    profiler.finish_session(args.profile, {"errors": pipeline_result["errors"]})
+                sys.exit(1)
+            # -p と -b を同時に指定した場合は, 生成した bt plugin の情報をそのまま渡す
+            generated_plugins_info = pipeline_result["plugins_info"]
+
+        if args.bt:
+            file_writer.reset_write_counts()
+            bt_node_generator.bt_node_generator(
                 config["bt_plugin_save_path"],
-                config["bt_plugin_cpp_template"],
-                config["bt_plugin_cpp_include_guard_prefix"],
-                actions,
-                ros2_pkg_name,
-                config["bt_action_default_arguments"],
-                config["bt_action_ignore_arguments"],
+                config["ros2_bt_source_abs_path"],
+                config["btproj_abs_path"],
+                config["ros2_node_name_suffix"],
+                config["ros2_node_name_exclude_words"],
+                generated_plugins_info,
+                config.get("name_exclude_word_boundary", False),
             )
+            write_counts = file_writer.get_write_counts()
+            print(
+                f'bt source / btproj files: {write_counts["changed"]} changed, '
+                f'{write_counts["unchanged"]} unchanged'
+            )
+
+        flush_staged_files(args.dry_run)
 
-    elif args.bt:
-        bt_node_generator.bt_node_generator(
-            config["bt_plugin_save_path"],
-            config["ros2_bt_source_abs_path"],
-            config["btproj_abs_path"],
-            config["ros2_node_name_suffix"],
-            config["ros2_node_name_exclude_words"],
-        )
+    if args.profile:
+        profiler.finish_session(args.profile)
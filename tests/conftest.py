@@ -0,0 +1,4 @@
+import os, sys
+
+# リポジトリのルートの modules を import できるようにする
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
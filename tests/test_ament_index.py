@@ -0,0 +1,58 @@
+import os
+import pytest
+from modules import bt_plugin_pipeline
+from modules import ros2_action_analyzer
+
+# install 空間の fixture. demo_interfaces の action が demo_msgs の msg を参照する
+FIXTURE_PREFIX = os.path.join(os.path.dirname(os.path.abspath(__file__)), "fixtures", "ament_install")
+DEMO_INTERFACES_SHARE = os.path.join(FIXTURE_PREFIX, "share", "demo_interfaces")
+
+
+def test_discovers_only_packages_with_actions():
+    config = {"ros2_action_discovery": "ament_index", "ament_prefix_path": [FIXTURE_PREFIX]}
+    assert bt_plugin_pipeline.discover_ros2_pkg_paths(config) == [DEMO_INTERFACES_SHARE]
+
+
+def test_package_name_patterns_filter_packages():
+    assert ros2_action_analyzer.find_ament_index_pkg_paths([FIXTURE_PREFIX], ["other_*"]) == []
+
+
+def test_picks_action_files_from_index():
+    assert ros2_action_analyzer.pick_action_rel_path_from_ament_index(DEMO_INTERFACES_SHARE) == [
+        "action/Grasp.action"
+    ]
+
+
+def test_prefix_paths_fall_back_to_environment(monkeypatch):
+    monkeypatch.setenv("AMENT_PREFIX_PATH", FIXTURE_PREFIX + os.pathsep)
+    assert ros2_action_analyzer.get_ament_prefix_paths([]) == [FIXTURE_PREFIX]
+
+
+def test_indexes_msg_types_from_install_space():
+    msg_type_index = ros2_action_analyzer.build_msg_type_index([], [FIXTURE_PREFIX])
+    assert msg_type_index["packages"] == {
+        "demo_msgs": {"Target": os.path.join(FIXTURE_PREFIX, "share", "demo_msgs", "msg", "Target.msg")}
+    }
+
+
+def test_resolves_cross_package_type_through_index():
+    msg_type_index = ros2_action_analyzer.build_msg_type_index([], [FIXTURE_PREFIX])
+    action = ros2_action_analyzer.analize_action(
+        DEMO_INTERFACES_SHARE, "action/Grasp.action", msg_type_index
+    )
+
+    assert action.ros2_pkg_name == "demo_interfaces"
+    assert action.ros2_action_name == "Grasp"
+    assert [(field.var_name, field.var_c_type, field.unit) for field in action.goal] == [
+        ("target", "demo_msgs::msg::Target", None),
+        ("candidates", "std::vector<demo_msgs::msg::Target>", None),
+        ("force", "double", "N"),
+    ]
+    assert [field.var_c_type for field in action.result] == ["bool"]
+    assert [field.var_c_type for field in action.feedback] == ["float"]
+
+
+def test_unknown_msg_type_in_indexed_package_is_an_error():
+    msg_type_index = ros2_action_analyzer.build_msg_type_index([], [FIXTURE_PREFIX])
+    with pytest.raises(ValueError):
+        ros2_action_analyzer.resolve_c_type("demo_msgs/Missing", "demo_interfaces", msg_type_index)
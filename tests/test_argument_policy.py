@@ -0,0 +1,83 @@
+import pytest
+from modules import argument_policy
+from modules import bt_plugin_pipeline
+from modules.specs import ActionSpec
+
+MOVE_TO = ActionSpec(ros2_action_name="MoveTo", goal=(), result=(), feedback=(), ros2_pkg_name="nav_interfaces")
+GRIP = ActionSpec(ros2_action_name="Grip", goal=(), result=(), feedback=(), ros2_pkg_name="arm_interfaces")
+
+
+def test_rules_take_precedence_in_order():
+    policy = argument_policy.compile_argument_policy(
+        [".*_port"],
+        ["server_port"],
+        {
+            "nav_interfaces.server_.*": "ignore",
+            "nav_interfaces/MoveTo.server_port": "required",
+        },
+    )
+
+    # action の規則, pkg の規則, bt_action_ignore_arguments, bt_action_default_arguments の順
+    assert argument_policy.explain(policy, MOVE_TO, "server_port") == (
+        "required",
+        'bt_action_argument_rules "nav_interfaces/MoveTo.server_port"',
+    )
+    assert argument_policy.explain(policy, MOVE_TO, "server_address") == (
+        "ignore",
+        'bt_action_argument_rules "nav_interfaces.server_.*"',
+    )
+    assert argument_policy.explain(policy, GRIP, "server_port") == (
+        "ignore",
+        "bt_action_ignore_arguments",
+    )
+    assert argument_policy.explain(policy, GRIP, "client_port") == (
+        "default",
+        'bt_action_default_arguments ".*_port"',
+    )
+    assert argument_policy.explain(policy, GRIP, "force") == ("required", "-")
+
+
+def test_rule_patterns_match_the_whole_field_name():
+    policy = argument_policy.compile_argument_policy([], [], {"arm_interfaces.force": "ignore"})
+    assert argument_policy.decide(policy, GRIP, "force") == "ignore"
+    assert argument_policy.decide(policy, GRIP, "force_limit") == "required"
+
+
+def test_default_patterns_keep_backreferences_and_inline_flags():
+    policy = argument_policy.compile_argument_policy([r"(\w)\1_.*", "(?i)SERVER_.*"])
+
+    assert argument_policy.decide(policy, GRIP, "aa_x") == "default"
+    assert argument_policy.decide(policy, GRIP, "ab_x") == "required"
+    assert argument_policy.explain(policy, GRIP, "server_address") == (
+        "default",
+        'bt_action_default_arguments "(?i)SERVER_.*"',
+    )
+
+
+@pytest.mark.parametrize(
+    "rules",
+    [{"nav_interfaces": "ignore"}, {"nav_interfaces.x": "optional"}],
+)
+def test_invalid_rules_are_rejected(rules):
+    with pytest.raises(ValueError):
+        argument_policy.compile_argument_policy([], [], rules)
+
+
+def test_explain_does_not_need_the_template(tmp_path):
+    action_directory = tmp_path / "src" / "arm_interfaces" / "action"
+    action_directory.mkdir(parents=True)
+    (action_directory / "Grip.action").write_text("float64 force\n---\nbool success\n---\n")
+    config = {
+        "ros2_package_abs_path": [str(tmp_path / "src" / "*")],
+        "bt_plugin_save_path": str(tmp_path / "out"),
+        "bt_plugin_cpp_template": str(tmp_path / "missing_template.h"),
+        "bt_plugin_file_name_exclude_words": [],
+        "bt_action_name_exclude_words": [],
+        "bt_action_default_arguments": [],
+        "bt_action_ignore_arguments": ["success"],
+    }
+
+    result = bt_plugin_pipeline.explain_argument_policy(config)
+
+    assert result["errors"] == []
+    assert result["lines"][1].split() == ["goal", "force", "required", "-"]
@@ -0,0 +1,96 @@
+import os
+from modules import build_manifest
+
+
+def make_entry(tmp_path, input_digest="input"):
+    action_path = tmp_path / "MoveTo.action"
+    action_path.write_text("float64 speed\n---\n---\n")
+    output_path = tmp_path / "nav_move_to.h"
+    output_path.write_text("// generated\n")
+    source_digest, source_stat = build_manifest.source_digest(str(action_path), None)
+    entry = build_manifest.make_entry(
+        str(tmp_path), source_stat, source_digest, input_digest, str(output_path)
+    )
+    return entry, str(action_path), str(output_path)
+
+
+def test_up_to_date_when_inputs_and_output_are_unchanged(tmp_path):
+    entry, _, output_path = make_entry(tmp_path)
+
+    assert build_manifest.is_up_to_date(entry, "input", output_path)
+
+
+def test_stale_when_the_input_digest_changes(tmp_path):
+    entry, _, output_path = make_entry(tmp_path)
+
+    assert not build_manifest.is_up_to_date(entry, "other input", output_path)
+    assert not build_manifest.is_up_to_date(None, "input", output_path)
+
+
+def test_stale_when_the_output_was_modified_or_removed(tmp_path):
+    entry, _, output_path = make_entry(tmp_path)
+
+    # 内容を変えずに mtime だけが変わった場合も変更とみなす
+    stat = os.stat(output_path)
+    os.utime(output_path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1))
+    assert not build_manifest.is_up_to_date(entry, "input", output_path)
+
+    os.remove(output_path)
+    assert not build_manifest.is_up_to_date(entry, "input", output_path)
+
+
+def test_stale_when_the_output_path_changes(tmp_path):
+    entry, _, _ = make_entry(tmp_path)
+    other_path = tmp_path / "move_to.h"
+    other_path.write_text("// generated\n")
+
+    assert not build_manifest.is_up_to_date(entry, "input", str(other_path))
+
+
+def test_source_digest_reuses_the_manifest_while_the_stat_matches(tmp_path):
+    entry, action_path, _ = make_entry(tmp_path)
+    entry = dict(entry, source_digest="recorded")
+
+    assert build_manifest.source_digest(action_path, entry)[0] == "recorded"
+
+    with open(action_path, "a") as f:
+        f.write("# comment\n")
+    assert build_manifest.source_digest(action_path, entry)[0] == build_manifest.file_digest(
+        action_path
+    )
+
+
+def test_input_digest_depends_on_every_input():
+    digest = build_manifest.input_digest("source", "config", "nav_interfaces")
+
+    assert digest == build_manifest.input_digest("source", "config", "nav_interfaces")
+    assert digest != build_manifest.input_digest("source2", "config", "nav_interfaces")
+    assert digest != build_manifest.input_digest("source", "config2", "nav_interfaces")
+    assert digest != build_manifest.input_digest("source", "config", "arm_interfaces")
+
+
+def test_config_digest_follows_the_template_and_settings(tmp_path):
+    template_path = tmp_path / "template.h"
+    template_path.write_text("// template\n")
+    config = {"bt_plugin_cpp_template": str(template_path), "bt_action_default_arguments": []}
+    digest = build_manifest.config_digest(config)
+
+    assert build_manifest.config_digest(dict(config, unrelated_key=1)) == digest
+    assert build_manifest.config_digest(dict(config, bt_action_default_arguments=[".*"])) != digest
+    template_path.write_text("// template v2\n")
+    assert build_manifest.config_digest(config) != digest
+
+
+def test_load_manifest_ignores_missing_and_old_manifests(tmp_path):
+    manifest_path = build_manifest.get_manifest_path(str(tmp_path))
+    empty = {"version": build_manifest.MANIFEST_VERSION, "entries": {}}
+
+    assert build_manifest.load_manifest(manifest_path) == empty
+
+    build_manifest.save_manifest(manifest_path, {"version": 1, "entries": {"a": {}}})
+    assert build_manifest.load_manifest(manifest_path) == empty
+
+    entry, action_path, _ = make_entry(tmp_path)
+    manifest = {"version": build_manifest.MANIFEST_VERSION, "entries": {action_path: entry}}
+    build_manifest.save_manifest(manifest_path, manifest)
+    assert build_manifest.load_manifest(manifest_path) == manifest
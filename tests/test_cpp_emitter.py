@@ -0,0 +1,81 @@
+from modules import cpp_emitter
+from modules.specs import FieldSpec
+
+SPEED = FieldSpec(var_name="speed", var_c_type="double", unit="m_s")
+TARGET = FieldSpec(var_name="target", var_c_type="std::string")
+
+
+def test_port_list():
+    assert cpp_emitter.PortList().render() == ""
+    assert cpp_emitter.PortList((SPEED, TARGET), (TARGET,)).render() == (
+        'BT::InputPort<double>("speed__m_s"), '
+        'BT::InputPort<std::string>("target"), '
+        'BT::OutputPort<std::string>("target")'
+    )
+
+
+def test_local_declarations():
+    assert list(cpp_emitter.LocalDeclarations((SPEED, TARGET)).lines()) == [
+        "double speed__m_s;",
+        "std::string target;",
+    ]
+
+
+def test_optional_defaults():
+    assert list(cpp_emitter.OptionalDefaults((SPEED,)).lines()) == [
+        "if (speed__m_s_.has_value()) {",
+        "  speed__m_s = speed__m_s_.value();",
+        "} else {",
+        '  getInput<double>("speed__m_s", speed__m_s);',
+        "}",
+    ]
+
+
+def test_get_inputs():
+    assert list(cpp_emitter.GetInputs((TARGET,)).lines()) == [
+        'getInput<std::string>("target", target);'
+    ]
+
+
+def test_assignments():
+    assert list(cpp_emitter.Assignments("goal", (SPEED, TARGET)).lines()) == [
+        "goal.speed = speed__m_s;",
+        "goal.target = target;",
+    ]
+
+
+def test_set_outputs():
+    assert list(cpp_emitter.SetOutputs("result.result", (TARGET,)).lines()) == [
+        'setOutput<std::string>("target", result.result->target);'
+    ]
+
+
+def test_statements():
+    assert list(cpp_emitter.Statements(("return true;",)).lines()) == ["return true;"]
+
+
+def test_method_body_separates_groups_with_blank_lines():
+    body = cpp_emitter.MethodBody((
+        (cpp_emitter.GetInputs((TARGET,)),),
+        (
+            cpp_emitter.Assignments("goal", (TARGET,)),
+            cpp_emitter.Statements(("return true;",)),
+        ),
+    ))
+
+    assert body.render() == (
+        "\n"
+        '    getInput<std::string>("target", target);\n'
+        "\n"
+        "    goal.target = target;\n"
+        "    return true;\n"
+        "  "
+    )
+
+
+def test_method_body_keeps_blank_lines_of_empty_groups():
+    body = cpp_emitter.MethodBody(
+        ((cpp_emitter.LocalDeclarations(),), (cpp_emitter.Statements(("return;",)),)), indent=""
+    )
+
+    assert body.render() == "\n\n  return;\n"
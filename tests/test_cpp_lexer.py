@@ -0,0 +1,96 @@
+import time
+import pytest
+from modules import cpp_lexer
+
+HEADER = """#include "behaviortree_ros2/bt_action_node.hpp"
+#define BRACE {
+class Sample : public RosActionNode<Sample>
+{
+public:
+  Sample(const std::string& name, int port = 8080)
+    : RosActionNode<Sample>(name), port_(port), ids_{1, 2}
+  {
+    const char* text = "not a block {";
+  }
+
+  static BT::PortsList providedPorts()
+  {
+    // providedPorts() { in a comment
+    return {};
+  }
+
+private:
+  int port_;
+  std::vector<int> ids_;
+  void helper() { }
+};
+"""
+
+
+def texts(code):
+    return [token.text for token in cpp_lexer.tokenize(code)]
+
+
+@pytest.mark.parametrize(
+    "tail",
+    [
+        "/*" + "x" * 256_000 + "*/",
+        "\n".join(["// trailing comment"] * 20_000),
+        " " * 256_000,
+    ],
+)
+def test_trailing_skipped_content_is_scanned_in_linear_time(tail):
+    # 末尾にトークンがない場合も, 後ろの位置から走査し直さない
+    start = time.perf_counter()
+    tokens = cpp_lexer.tokenize(HEADER + tail)
+    assert time.perf_counter() - start < 1.0
+    assert tokens == cpp_lexer.tokenize(HEADER)
+
+
+def test_comments_strings_and_preprocessor_lines_are_skipped():
+    assert texts('// f()\n/* g() */ #define X {\nconst char* s = "h(";\nR"x(i())x"') == [";"]
+
+
+def test_numbers_are_not_tokens():
+    assert texts("case 0x10: x = 1(2);") == [":", "(", ")", ";"]
+
+
+def test_only_indexed_identifiers_are_tokens():
+    assert texts("int value = call(arg);") == ["call", "(", ")", ";"]
+
+
+def test_class_region_sections_and_members():
+    index = cpp_lexer.build_region_index(HEADER)
+    class_region = index.classes["Sample"]
+
+    assert HEADER[class_region.body.open] == "{"
+    assert HEADER[class_region.body.close] == "}"
+    assert [section.access for section in class_region.access_sections] == ["public", "private"]
+    private = class_region.access_sections[1]
+    assert [HEADER[start:end].strip() for start, end in private.members] == [
+        "int port_;",
+        "std::vector<int> ids_;",
+        "void helper() { }",
+    ]
+
+
+def test_constructor_initializer_list_and_body():
+    index = cpp_lexer.build_region_index(HEADER)
+    (constructor,) = index.classes["Sample"].constructors
+
+    # 初期化リストは ":" の後の最初のトークンから本体の "{" まで
+    start, end = constructor.initializer_list
+    assert HEADER[start:end].strip() == "(name), port_(port), ids_{1, 2}"
+    assert HEADER[constructor.parameters.open + 1 : constructor.parameters.close] == (
+        "const std::string& name, int port = 8080"
+    )
+    assert constructor.body is not None
+
+
+def test_block_and_parentheses_after_identifier():
+    index = cpp_lexer.build_region_index(HEADER)
+
+    block = index.block_after["providedPorts"]
+    assert HEADER[block.open + 1 : block.close].strip().endswith("return {};")
+    parentheses = index.parentheses_after["Sample"]
+    assert HEADER[parentheses.open + 1 : parentheses.close].startswith("const std::string& name")
@@ -0,0 +1,103 @@
+import pytest
+from modules import file_writer
+
+
+@pytest.fixture(autouse=True)
+def staging():
+    file_writer.begin_staging()
+    file_writer.reset_write_counts()
+    yield
+    file_writer.discard_staged()
+    file_writer.reset_write_counts()
+
+
+def test_writes_are_kept_in_memory_until_commit(tmp_path):
+    path = tmp_path / "plugin.h"
+    path.write_text("old\n")
+
+    assert file_writer.write_if_changed(str(path), "new\n")
+
+    assert file_writer.is_staged(str(path))
+    assert file_writer.read_file(str(path)) == "new\n"
+    assert path.read_text() == "old\n"
+
+    file_writer.commit_staged()
+
+    assert path.read_text() == "new\n"
+    assert not file_writer.is_staging()
+    assert not file_writer.is_staged(str(path))
+
+
+def test_unchanged_content_is_not_staged(tmp_path):
+    path = tmp_path / "plugin.h"
+    path.write_text("same\n")
+
+    assert not file_writer.write_if_changed(str(path), "same\n")
+    assert file_writer.write_if_changed(str(tmp_path / "new.h"), "new\n")
+    # 保持している内容と同じ書き込みも省略する
+    assert not file_writer.write_if_changed(str(tmp_path / "new.h"), "new\n")
+
+    assert not file_writer.is_staged(str(path))
+    assert file_writer.get_write_counts() == {"changed": 1, "unchanged": 2}
+
+
+def test_staged_removal_hides_the_file(tmp_path):
+    path = tmp_path / "stale.h"
+    path.write_text("stale\n")
+    (tmp_path / "keep.h").write_text("keep\n")
+
+    file_writer.remove_file(str(path))
+
+    assert not file_writer.exists(str(path))
+    assert file_writer.list_dir(str(tmp_path)) == ["keep.h"]
+    with pytest.raises(FileNotFoundError):
+        file_writer.read_file(str(path))
+    assert path.exists()
+
+    file_writer.commit_staged()
+
+    assert not path.exists()
+
+
+def test_discard_leaves_the_disk_unchanged(tmp_path):
+    path = tmp_path / "plugin.h"
+    path.write_text("old\n")
+    called = []
+    file_writer.write_if_changed(str(path), "new\n")
+    file_writer.write_if_changed(str(tmp_path / "new.h"), "new\n")
+    file_writer.after_commit(lambda: called.append(True))
+
+    file_writer.discard_staged()
+
+    assert path.read_text() == "old\n"
+    assert not (tmp_path / "new.h").exists()
+    assert called == []
+    assert not file_writer.is_staging()
+
+
+def test_after_commit_runs_once_the_files_are_written(tmp_path):
+    path = tmp_path / "plugin.h"
+    seen = []
+    file_writer.write_if_changed(str(path), "new\n")
+    file_writer.after_commit(lambda: seen.append(path.read_text()))
+
+    assert seen == []
+    file_writer.commit_staged()
+
+    assert seen == ["new\n"]
+
+
+def test_staged_diff(tmp_path):
+    changed = tmp_path / "a.h"
+    changed.write_text("x\ny\n")
+    removed = tmp_path / "b.h"
+    removed.write_text("z\n")
+    file_writer.write_if_changed(str(changed), "x\nY\n")
+    file_writer.remove_file(str(removed))
+    file_writer.write_if_changed(str(tmp_path / "c.h"), "c")
+
+    assert file_writer.staged_diff() == (
+        f"--- {changed}\n+++ {changed}\n@@ -1,2 +1,2 @@\n x\n-y\n+Y\n"
+        f"--- {removed}\n+++ /dev/null\n@@ -1 +0,0 @@\n-z\n"
+        f"--- /dev/null\n+++ {tmp_path / 'c.h'}\n@@ -0,0 +1 @@\n+c\n\\ No newline at end of file\n"
+    )
@@ -0,0 +1,50 @@
+import os, dataclasses
+from modules import ros2_action_analyzer
+from modules import bt_action_cpp_generator
+from modules import bt_node_generator
+
+TEMPLATE_PATH = os.path.join(
+    os.path.dirname(os.path.dirname(os.path.abspath(__file__))), "assets", "bt_action_cpp_template.h"
+)
+
+# default 引数の型に "," や入れ子の <> を含む action
+ACTION = """uint8[4] target_address
+geometry_msgs/Pose origin_address
+geometry_msgs/Point[] waypoints_address
+float64 speed # [m/s]
+---
+bool success
+---
+float32 progress
+"""
+
+DEFAULT_ARGUMENTS = [".*_address"]
+
+
+def analyze(tmp_path):
+    pkg_directory = tmp_path / "nav_interfaces"
+    (pkg_directory / "action").mkdir(parents=True)
+    (pkg_directory / "action" / "MoveTo.action").write_text(ACTION)
+    action = ros2_action_analyzer.analize_action(str(pkg_directory), os.path.join("action", "MoveTo.action"))
+    return dataclasses.replace(action, bt_plugin_file_name="nav_move_to.h", bt_action_name="NavMoveTo")
+
+
+def test_parses_array_and_nested_message_defaults(tmp_path):
+    action = analyze(tmp_path)
+    template = bt_action_cpp_generator.compile_bt_action_cpp_template(TEMPLATE_PATH)
+    header = bt_action_cpp_generator.render_bt_action_cpp(
+        template, "PREFIX", action, "nav_interfaces", DEFAULT_ARGUMENTS
+    )
+    assert "std::optional<std::array<uint8_t, 4>> target_address = std::nullopt" in header
+
+    plugin_info = bt_node_generator.parse_plugin_cpp(header, "_node", ["interfaces"])
+
+    assert [(port.name, port.type) for port in plugin_info.default_input_ports] == [
+        ("target_address", "std::array<uint8_t, 4>"),
+        ("origin_address", "geometry_msgs::msg::Pose"),
+        ("waypoints_address", "std::vector<geometry_msgs::msg::Point>"),
+    ]
+    # 生成時の bt plugin 情報 (manifest に記録するもの) と一致する
+    assert plugin_info == bt_action_cpp_generator.get_plugin_info(
+        action, "nav_interfaces", "_node", ["interfaces"], DEFAULT_ARGUMENTS
+    )
@@ -0,0 +1,66 @@
+from modules import cpp_code_editor
+
+CODE = """class MoveTo : public BT::RosActionNode<Action>
+{
+public:
+  MoveTo(int port) : port_(port) {}
+
+private:
+  std::optional<double> default_arg_speed_;  // [m/s]; 0 で停止
+  int port_;
+  std::optional<std::array<uint8_t, 4>> default_arg_address_;
+  void log() { int count; (void)count; }
+};
+"""
+
+
+def test_removes_matching_members_and_keeps_the_rest():
+    code = cpp_code_editor.replace_private_members(CODE, "MoveTo", ["default_arg.*"], [])
+
+    assert "default_arg" not in code
+    assert "  int port_;\n" in code
+    # ";" を含むメソッドの本体は1つのメンバとして残す
+    assert "  void log() { int count; (void)count; }\n};\n" in code
+    assert code.startswith(CODE[: CODE.index("  std::optional<double>")])
+
+
+def test_new_members_are_added_at_the_top_of_the_section():
+    code = cpp_code_editor.replace_private_members(
+        CODE, "MoveTo", ["default_arg.*"], ["std::optional<float> speed_;", "std::string name_;"]
+    )
+
+    assert "private:\nstd::optional<float> speed_;\nstd::string name_;\n" in code
+
+
+def test_members_already_in_the_section_are_not_added_twice():
+    code = cpp_code_editor.replace_private_members(
+        CODE, "MoveTo", [], ["int port_;", "std::string name_;"]
+    )
+
+    assert code.count("int port_;") == 1
+    assert "private:\nstd::string name_;\n" in code
+
+
+def test_removed_members_are_added_back_once():
+    code = cpp_code_editor.replace_private_members(CODE, "MoveTo", [r"int port_"], ["int port_;"])
+
+    assert code.count("int port_;") == 1
+    assert "private:\nint port_;\n" in code
+
+
+def test_only_the_first_private_section_is_edited():
+    code = CODE.replace("};\n", "\nprivate:\n  std::optional<int> default_arg_count_;\n};\n")
+
+    edited = cpp_code_editor.replace_private_members(code, "MoveTo", ["default_arg.*"], [])
+
+    assert "default_arg_speed_" not in edited
+    assert "default_arg_count_" in edited
+
+
+def test_code_without_the_class_or_private_section_is_unchanged():
+    assert cpp_code_editor.replace_private_members(CODE, "Grip", ["port_"], ["int x_;"]) == CODE
+
+    public_only = "class MoveTo\n{\npublic:\n  int port_;\n};\n"
+    assert cpp_code_editor.replace_private_members(public_only, "MoveTo", ["port_"], ["int x_;"]) == (
+        public_only
+    )
@@ -0,0 +1,55 @@
+import pytest
+from modules import source_edit
+
+
+def test_positions_refer_to_the_original_source():
+    batch = source_edit.EditBatch("int a; int b;")
+    batch.replace(4, 5, "alpha")
+    batch.replace(11, 12, "beta")
+    batch.insert(0, "static ")
+
+    assert batch.apply() == "static int alpha; int beta;"
+
+
+def test_inserts_at_the_same_position_keep_their_order():
+    batch = source_edit.EditBatch("{}")
+    batch.insert(1, "a;")
+    batch.insert(1, "b;")
+    batch.insert(1, "c;")
+
+    assert batch.apply() == "{a;b;c;}"
+
+
+def test_inserts_next_to_a_replacement_do_not_conflict():
+    batch = source_edit.EditBatch("(old)")
+    batch.insert(4, "]")
+    batch.replace(1, 4, "new")
+    batch.insert(1, "[")
+
+    assert batch.apply() == "([new])"
+
+
+@pytest.mark.parametrize(
+    "edits",
+    [
+        [source_edit.Edit(0, 3, "x"), source_edit.Edit(2, 5, "y")],
+        [source_edit.Edit(0, 3, "x"), source_edit.Edit(1, 1, "y")],
+        [source_edit.Edit(1, 4, "x"), source_edit.Edit(1, 4, "y")],
+    ],
+)
+def test_overlapping_edits_conflict(edits):
+    with pytest.raises(source_edit.EditConflictError):
+        source_edit.apply_edits("abcdef", edits)
+
+
+@pytest.mark.parametrize("start, end", [(-1, 0), (2, 1), (0, 7)])
+def test_out_of_range_edits_are_rejected(start, end):
+    batch = source_edit.EditBatch("abcdef")
+    with pytest.raises(ValueError):
+        batch.replace(start, end, "x")
+    assert batch.edits == []
+
+
+def test_apply_edits_ignores_none():
+    assert source_edit.apply_edits("abc", [None, source_edit.Edit(1, 2, "B"), None]) == "aBc"
+    assert source_edit.apply_edits("abc", []) == "abc"